@@ -1,8 +1,16 @@
+from sqlalchemy import inspect
 from src.app_factory import create_app, db
+from src.utils.migrations import baseline
 
 app = create_app()
 
 if __name__ == '__main__':
     with app.app_context():
+        fresh = not inspect(db.engine).get_table_names()
         db.create_all()
         print("Database tables created successfully.")
+        if fresh:
+            # The models already include every migration; later ones are applied by scripts/migrate.py
+            baseline(db.engine)
+        else:
+            print("Existing database: run scripts/migrate.py to bring its schema up to date.")
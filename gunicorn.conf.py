@@ -0,0 +1,36 @@
+import gc
+import multiprocessing
+import os
+
+# Pre-forked workers sharing the preloaded app copy-on-write:
+#   gunicorn -c gunicorn.conf.py app:app
+# The master imports and builds the app once; every worker forked from it maps
+# the same pages until it writes to them. /api/admin/admin/memory and
+# scripts/worker_memory.py show how much each worker has made its own.
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+# Logouts, refresh rotation and role changes must reach every worker, so they
+# share a revocation file unless TOKEN_REVOCATION_DB points elsewhere
+os.environ.setdefault('TOKEN_REVOCATION_DB', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'instance', 'token_revocations.db'
+))
+os.makedirs(os.path.dirname(os.environ['TOKEN_REVOCATION_DB']), exist_ok=True)
+
+
+def when_ready(server):
+    # Runs once the app is preloaded and before the first worker is forked.
+    # Frozen objects sit in a permanent generation no collector visits, so a
+    # worker's collections never write to (and copy) the pages they share
+    # with the master. The master keeps collecting everything created later.
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from src.utils.db_pool import dispose_after_fork
+
+    # A pooled connection the master opened must never be used by two processes
+    dispose_after_fork(server.app.wsgi())
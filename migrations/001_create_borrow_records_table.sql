@@ -2,10 +2,12 @@
 
 CREATE TABLE IF NOT EXISTS borrow_records (
     id SERIAL PRIMARY KEY,
-    user_id INTEGER NOT NULL REFERENCES "user"(id),
-    book_id INTEGER NOT NULL REFERENCES book(id),
-    borrow_date TIMESTAMP NOT NULL,
-    due_date TIMESTAMP NOT NULL,
-    return_date TIMESTAMP,
-    fine FLOAT DEFAULT 0.0
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    book_id INTEGER NOT NULL REFERENCES books(id),
+    borrow_date DATE NOT NULL,
+    due_date DATE NOT NULL,
+    return_date DATE,
+    fine FLOAT DEFAULT 0.0,
+    status VARCHAR(20) DEFAULT 'borrowed',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
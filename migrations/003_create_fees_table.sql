@@ -2,8 +2,9 @@
 
 CREATE TABLE IF NOT EXISTS fees (
     id SERIAL PRIMARY KEY,
-    user_id INTEGER NOT NULL REFERENCES "user"(id),
-    date TIMESTAMP NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    date DATE NOT NULL,
     amount FLOAT NOT NULL,
-    reason VARCHAR(255) NOT NULL
+    reason VARCHAR(200) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
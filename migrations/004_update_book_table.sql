@@ -1,6 +1,4 @@
--- Migration script to update book table with missing columns
+-- Migration script to add the copy counts the circulation endpoints keep on books
 
-ALTER TABLE book ADD COLUMN category VARCHAR(100);
-ALTER TABLE book ADD COLUMN total_quantity INTEGER DEFAULT 1;
-ALTER TABLE book ADD COLUMN available_quantity INTEGER DEFAULT 1;
-ALTER TABLE book ADD COLUMN description TEXT;
+ALTER TABLE books ADD COLUMN IF NOT EXISTS total_copies INTEGER DEFAULT 1;
+ALTER TABLE books ADD COLUMN IF NOT EXISTS available_copies INTEGER DEFAULT 1;
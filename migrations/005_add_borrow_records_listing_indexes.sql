@@ -0,0 +1,8 @@
+-- Migration script to index borrow_records for filtered, paginated listing
+
+-- Serves both the filtered listing and per-user history, newest loans first
+CREATE INDEX IF NOT EXISTS ix_borrow_records_user_id_borrow_date_desc
+    ON borrow_records (user_id, borrow_date DESC);
+
+CREATE INDEX IF NOT EXISTS ix_borrow_records_book_id_borrow_date
+    ON borrow_records (book_id, borrow_date);
@@ -0,0 +1,3 @@
+-- Migration script to track whether a fee has been paid
+
+ALTER TABLE fees ADD COLUMN IF NOT EXISTS paid BOOLEAN DEFAULT FALSE;
@@ -0,0 +1,14 @@
+-- Migration script to create the per-book hold (reservation) queue
+
+CREATE TABLE IF NOT EXISTS holds (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    book_id INTEGER NOT NULL REFERENCES books(id),
+    status VARCHAR(20) NOT NULL DEFAULT 'waiting',
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ready_at TIMESTAMP,
+    expires_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_holds_book_id_created_at ON holds (book_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_holds_user_id ON holds (user_id);
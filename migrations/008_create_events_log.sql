@@ -0,0 +1,43 @@
+-- Migration script to create the circulation event log (transactional outbox)
+-- and the catalog tables and columns the books and admin blueprints write
+
+CREATE TABLE IF NOT EXISTS events (
+    id BIGSERIAL PRIMARY KEY,
+    event_type VARCHAR(50) NOT NULL,
+    user_id INTEGER,
+    book_id INTEGER,
+    payload JSON NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS event_consumers (
+    name VARCHAR(100) PRIMARY KEY,
+    last_event_id BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP
+);
+
+ALTER TABLE books ADD COLUMN IF NOT EXISTS publisher VARCHAR(100);
+ALTER TABLE books ADD COLUMN IF NOT EXISTS pages INTEGER;
+ALTER TABLE books ADD COLUMN IF NOT EXISTS language VARCHAR(20) DEFAULT 'English';
+ALTER TABLE books ADD COLUMN IF NOT EXISTS cover_image VARCHAR(500);
+ALTER TABLE books ADD COLUMN IF NOT EXISTS description TEXT;
+ALTER TABLE books ADD COLUMN IF NOT EXISTS average_rating FLOAT;
+ALTER TABLE books ADD COLUMN IF NOT EXISTS ratings_count INTEGER DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS book_ratings (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    book_id INTEGER NOT NULL REFERENCES books(id),
+    rating FLOAT NOT NULL,
+    review TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (user_id, book_id)
+);
+
+CREATE TABLE IF NOT EXISTS book_recommendations (
+    id SERIAL PRIMARY KEY,
+    book_id INTEGER NOT NULL REFERENCES books(id),
+    recommended_book_id INTEGER NOT NULL REFERENCES books(id),
+    score FLOAT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,63 @@
+-- Migration script to range-partition borrow_records by borrow_date (PostgreSQL only)
+--
+-- Rebuilds borrow_records as a declaratively partitioned table with one
+-- partition per year plus a default partition, copies the existing rows
+-- across and recreates the indexes on the parent so every partition gets
+-- them. Queries that filter on borrow_date are pruned to the matching
+-- partitions by the planner. Later years are added by
+-- src.utils.partitioning.ensure_borrow_record_partitions.
+-- migrate: dialect postgresql
+
+ALTER TABLE borrow_records RENAME TO borrow_records_unpartitioned;
+
+CREATE TABLE borrow_records (
+    id SERIAL,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    book_id INTEGER NOT NULL REFERENCES books(id),
+    borrow_date DATE NOT NULL,
+    due_date DATE NOT NULL,
+    return_date DATE,
+    fine FLOAT DEFAULT 0.0,
+    status VARCHAR(20) DEFAULT 'borrowed',
+    created_at TIMESTAMP,
+    PRIMARY KEY (id, borrow_date)
+) PARTITION BY RANGE (borrow_date);
+
+DO $$
+DECLARE
+    first_year INTEGER;
+    last_year INTEGER := EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER + 1;
+    y INTEGER;
+BEGIN
+    SELECT COALESCE(MIN(EXTRACT(YEAR FROM borrow_date))::INTEGER, last_year - 1)
+      INTO first_year
+      FROM borrow_records_unpartitioned;
+
+    FOR y IN first_year..last_year LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS borrow_records_%s PARTITION OF borrow_records '
+            'FOR VALUES FROM (%L) TO (%L)',
+            y, make_date(y, 1, 1), make_date(y + 1, 1, 1)
+        );
+    END LOOP;
+END $$;
+
+CREATE TABLE IF NOT EXISTS borrow_records_default PARTITION OF borrow_records DEFAULT;
+
+INSERT INTO borrow_records (id, user_id, book_id, borrow_date, due_date, return_date, fine, status, created_at)
+SELECT id, user_id, book_id, borrow_date, due_date, return_date, fine, status, created_at
+  FROM borrow_records_unpartitioned;
+
+SELECT setval(pg_get_serial_sequence('borrow_records', 'id'), COALESCE(MAX(id), 1))
+  FROM borrow_records;
+
+DROP TABLE borrow_records_unpartitioned;
+
+CREATE INDEX IF NOT EXISTS ix_borrow_records_user_id_borrow_date_desc
+    ON borrow_records (user_id, borrow_date DESC);
+
+CREATE INDEX IF NOT EXISTS ix_borrow_records_book_id_borrow_date
+    ON borrow_records (book_id, borrow_date);
+
+CREATE INDEX IF NOT EXISTS ix_borrow_records_open_due_date
+    ON borrow_records (due_date) WHERE return_date IS NULL;
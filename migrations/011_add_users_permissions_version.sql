@@ -0,0 +1,4 @@
+-- Migration script to add the permissions version carried in access tokens
+-- (bumped on role changes so stale tokens are rejected)
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS permissions_version INTEGER NOT NULL DEFAULT 1;
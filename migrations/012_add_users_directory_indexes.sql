@@ -0,0 +1,15 @@
+-- Migration script to index users for the searchable, paginated directory
+
+-- Case-insensitive prefix search: lower(column) LIKE 'abc%'
+CREATE INDEX IF NOT EXISTS ix_users_lower_username
+    ON users (lower(username) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS ix_users_lower_email
+    ON users (lower(email) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS ix_users_lower_fullname
+    ON users (lower(fullname) text_pattern_ops);
+
+-- Role filter with keyset pagination on id
+CREATE INDEX IF NOT EXISTS ix_users_role_id
+    ON users (role, id);
@@ -0,0 +1,12 @@
+-- Migration script to create the per-user summary table
+-- (fill it with scripts/rebuild_user_stats.py after applying)
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id),
+    total_loans INTEGER NOT NULL DEFAULT 0,
+    open_loans INTEGER NOT NULL DEFAULT 0,
+    overdue_loans INTEGER NOT NULL DEFAULT 0,
+    unpaid_fines FLOAT NOT NULL DEFAULT 0.0,
+    ratings_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,13 @@
+-- Migration script to move server-side sessions from flask_session/ into the database
+-- (SESSION_BACKEND=sql). Deploy with SESSION_LEGACY_DIR=flask_session so existing
+-- sessions are copied over on their next request, and run scripts/sweep_sessions.py
+-- until it reports the legacy directory empty.
+
+CREATE TABLE IF NOT EXISTS web_sessions (
+    session_id VARCHAR(255) PRIMARY KEY,
+    data BYTEA NOT NULL,
+    expiry TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_web_sessions_expiry
+    ON web_sessions (expiry);
@@ -0,0 +1,42 @@
+-- Migration script to add indexes recommended by scripts/advise_indexes.py
+-- (built CONCURRENTLY on PostgreSQL, so circulation keeps writing meanwhile)
+
+-- admin.get_admin_stats
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_borrow_records_status
+    ON borrow_records (status);
+
+-- admin.get_admin_forecast
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_borrow_records_borrow_date
+    ON borrow_records (borrow_date);
+
+-- books.add_book_rating
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_book_ratings_book_id
+    ON book_ratings (book_id);
+
+-- books.get_books, books.get_genres
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_books_genre
+    ON books (genre);
+
+-- books.get_top_rated_books
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_books_average_rating_ratings_count
+    ON books (average_rating, ratings_count);
+
+-- books.get_books
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_books_author
+    ON books (author);
+
+-- admin.get_admin_stats
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_created_at
+    ON users (created_at);
+
+-- foreign key to books
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_book_recommendations_book_id
+    ON book_recommendations (book_id);
+
+-- foreign key to books
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_book_recommendations_recommended_book_id
+    ON book_recommendations (recommended_book_id);
+
+-- foreign key to users
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fees_user_id
+    ON fees (user_id);
@@ -0,0 +1,21 @@
+-- Migration script to number each book's waiting holds, so a queue position
+-- is one lookup at the head of a partial index instead of a count of the
+-- holds ahead (built CONCURRENTLY on PostgreSQL, so holds keep being placed)
+
+ALTER TABLE holds ADD COLUMN IF NOT EXISTS queue_number INTEGER;
+
+-- Existing queues, numbered from 1 in the order they were joined
+-- migrate: backfill
+UPDATE holds SET queue_number = (
+    SELECT COUNT(*) FROM holds ahead
+    WHERE ahead.book_id = holds.book_id
+      AND ahead.status = 'waiting'
+      AND (ahead.created_at < holds.created_at
+           OR (ahead.created_at = holds.created_at AND ahead.id <= holds.id))
+)
+WHERE id IN (
+    SELECT id FROM holds WHERE status = 'waiting' AND queue_number IS NULL LIMIT :batch_size
+);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_holds_waiting_book_id_queue_number
+    ON holds (book_id, queue_number) WHERE status = 'waiting';
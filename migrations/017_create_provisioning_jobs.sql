@@ -0,0 +1,14 @@
+-- Migration script to keep bulk student import jobs in the database, so their
+-- status can be read from any worker
+
+CREATE TABLE IF NOT EXISTS provisioning_jobs (
+    id VARCHAR(32) PRIMARY KEY,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',
+    total INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0,
+    created INTEGER NOT NULL DEFAULT 0,
+    errors JSON NOT NULL,
+    error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP
+);
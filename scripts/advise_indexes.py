@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, select
+
+from src.app_factory import create_app, db
+from src.models import Book, BorrowRecord, User
+from src.utils.index_advisor import Workload, advise, record_workload, verify, write_migration
+from src.utils.synthetic_data import GENRES
+from src.utils.token_auth import issue_token_pair
+
+# Recommend indexes for the queries the API actually runs. Point it at a
+# benchmark or staging copy (scripts/generate_data.py fills one): candidate
+# indexes are built and rolled back to compare plans and timings.
+#   python scripts/advise_indexes.py --database-url sqlite:///bench.db --write-migration
+#   python scripts/advise_indexes.py --workload slow-queries.json      # JSON from /api/admin/admin/slow-queries
+#   python scripts/advise_indexes.py --verify                          # exit 1 if a hot query scans a large table
+
+# The reads behind every blueprint's GET endpoints, with ids filled in per request
+HOT_REQUESTS = (
+    '/api/books/?per_page=20&page={page}',
+    '/api/books/?genre={genre}&per_page=20',
+    '/api/books/?author=Author%20{author}&per_page=20',
+    '/api/books/?search=River&per_page=20',
+    '/api/books/{book_id}',
+    '/api/books/genres',
+    '/api/books/top-rated',
+    '/api/books/{book_id}/recommendations',
+    '/api/borrow/?limit=50',
+    '/api/borrow/?user_id={user_id}&limit=50',
+    '/api/borrow/?book_id={book_id}&limit=50',
+    '/api/borrow/?status=overdue&limit=50',
+    '/api/borrow/history?user_id={user_id}',
+    '/api/users/?limit=50',
+    '/api/users/?q=stud&limit=50',
+    '/api/users/?role=admin&limit=50',
+    '/api/users/{user_id}/summary',
+    '/api/admin/admin/stats',
+    '/api/admin/admin/forecast',
+    '/api/admin/admin/books',
+)
+
+# Writes that look rows up before changing them; only replayed with --include-writes
+WRITE_REQUESTS = (
+    ('POST', '/api/books/{book_id}/ratings', lambda ids: {'rating': 4}),
+    ('POST', '/api/borrow/', lambda ids: {'user_id': ids['user_id'], 'book_id': ids['book_id']}),
+    ('POST', '/api/borrow/holds', lambda ids: {'user_id': ids['user_id'], 'book_id': ids['book_id']}),
+)
+
+
+def drive_api(app, rounds, include_writes, seed=0):
+    """Issue HOT_REQUESTS (and WRITE_REQUESTS) rounds times as an admin, recording the SQL"""
+    rng = random.Random(seed)
+    with app.app_context():
+        admin = db.session.execute(select(User).where(User.role == 'admin').limit(1)).scalar()
+        if admin is None:
+            sys.exit('No admin user to drive the API with; run scripts/generate_data.py first')
+        headers = {'Authorization': f"Bearer {issue_token_pair(admin)['access_token']}"}
+        max_user = db.session.scalar(select(func.max(User.id))) or 1
+        max_book = db.session.scalar(select(func.max(Book.id))) or 1
+        has_loans = db.session.scalar(select(func.count(BorrowRecord.id))) > 0
+        engine = db.engine
+
+    with record_workload(engine) as workload, app.test_client() as client:
+        for _ in range(rounds):
+            ids = {
+                'user_id': rng.randint(1, max_user),
+                'book_id': rng.randint(1, max_book),
+                'page': rng.randint(1, 20),
+                'genre': rng.choice(GENRES),
+                'author': rng.randint(0, 100)
+            }
+            for path in HOT_REQUESTS:
+                client.get(path.format(**ids), headers=headers)
+            if include_writes and has_loans:
+                for method, path, body in WRITE_REQUESTS:
+                    client.open(path.format(**ids), method=method, json=body(ids), headers=headers)
+    return workload
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recommend and verify indexes for the API workload')
+    parser.add_argument('--database-url', help='database to analyse (default: the app configuration)')
+    parser.add_argument('--workload', help='replay this workload JSON instead of driving the API')
+    parser.add_argument('--save-workload', help='write the recorded workload to this JSON file')
+    parser.add_argument('--rounds', type=int, default=5, help='times each hot request is issued')
+    parser.add_argument('--include-writes', action='store_true', help='also issue borrow, hold and rating writes')
+    parser.add_argument('--no-foreign-keys', action='store_true', help='only recommend indexes the workload needs')
+    parser.add_argument('--min-rows', type=int, default=1000, help='ignore full scans of smaller tables')
+    parser.add_argument('--write-migration', action='store_true', help='write the recommendations to migrations/')
+    parser.add_argument('--verify', action='store_true', help='only check that every hot query uses an index')
+    parser.add_argument('--output', help='write the full report (plans and timings) as JSON')
+    args = parser.parse_args()
+
+    app = create_app(dict(
+        {'RATE_LIMIT_ENABLED': False, 'SESSION_BACKEND': 'memory', 'SLOW_QUERY_MS': 0},
+        **({'SQLALCHEMY_DATABASE_URI': args.database_url} if args.database_url else {})
+    ))
+    app.logger.disabled = True
+
+    workload = Workload.load(args.workload) if args.workload else drive_api(app, args.rounds, args.include_writes)
+    if args.save_workload:
+        workload.save(args.save_workload)
+    print(f'{len(workload)} distinct statements')
+
+    with app.app_context():
+        engine = db.engine
+    if args.verify:
+        results = verify(engine, workload, min_rows=args.min_rows)
+        for result in results:
+            status = 'error' if 'error' in result else ('index' if result['uses_index'] else 'SCAN ' + ','.join(result['full_scans']))
+            print(f"{status:<28} {result['endpoint']:<40} {result['statement'][:90]}")
+        report = {'verify': results}
+        failed = [r for r in results if not r.get('uses_index', True)]
+    else:
+        recommendations = advise(engine, workload, min_rows=args.min_rows, foreign_keys=not args.no_foreign_keys)
+        for r in recommendations:
+            summary = f"{r['name']} on {r['table']} ({', '.join(r['columns'])}), {r['rows']} rows: "
+            if r['queries']:
+                query = r['queries'][0]
+                summary += f"{query['endpoint']} {query['before']['ms']} ms -> {query['after']['ms']} ms"
+            else:
+                summary += r['reason']
+            print(summary)
+        if not recommendations:
+            print('No missing indexes found')
+        if args.write_migration and recommendations:
+            directory = os.path.join(os.path.dirname(__file__), '..', 'migrations')
+            print(f'Wrote {write_migration(recommendations, directory)}')
+        report = {'recommendations': recommendations}
+        failed = []
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+import argparse
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app
+from src.utils.partitioning import archive_closed_loans, ensure_borrow_record_partitions
+
+parser = argparse.ArgumentParser(description='Move old closed loans out of borrow_records')
+parser.add_argument('--months', type=int, default=24, help='archive returned loans borrowed more than this many months ago')
+parser.add_argument('--batch-size', type=int, default=1000)
+args = parser.parse_args()
+
+app = create_app()
+
+with app.app_context():
+    partitions = ensure_borrow_record_partitions()
+    if partitions:
+        print(f"Ensured partitions: {', '.join(partitions)}")
+
+    moved = archive_closed_loans(older_than_months=args.months, batch_size=args.batch_size)
+    print(f"Archived {moved} closed loans older than {args.months} months")
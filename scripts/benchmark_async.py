@@ -0,0 +1,77 @@
+import argparse
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Compare how many concurrent catalog/history reads one worker process sustains
+# in sync (WSGI) and async (ASGI) mode. Start one worker of each first, e.g.
+#   gunicorn -w 1 --threads 10 -b :5000 src.app:app
+#   uvicorn --workers 1 --port 5001 src.asgi:application
+# then run
+#   python scripts/benchmark_async.py --server sync=http://localhost:5000 \
+#       --server async=http://localhost:5001 --concurrency 1,10,50,200
+
+DEFAULT_PATHS = ('/api/books/?per_page=20', '/api/books/top-rated', '/api/borrow/?limit=50')
+
+
+def fetch(url, token):
+    request = urllib.request.Request(url)
+    if token:
+        request.add_header('Authorization', f'Bearer {token}')
+
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            ok = response.status < 400
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def run_level(base_url, paths, concurrency, total, token):
+    urls = [base_url + paths[i % len(paths)] for i in range(total)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda url: fetch(url, token), urls))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        'rps': total / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'errors': sum(1 for _, ok in results if not ok)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sync vs async throughput per worker')
+    parser.add_argument('--server', action='append', required=True, metavar='NAME=URL',
+                        help='a running worker to measure; repeat for each mode')
+    parser.add_argument('--path', action='append', help='endpoint to request (default: catalog and listing reads)')
+    parser.add_argument('--concurrency', default='1,10,50,200', help='comma-separated in-flight request counts')
+    parser.add_argument('--requests', type=int, default=1000, help='requests per concurrency level')
+    parser.add_argument('--token', help='bearer token for authenticated paths such as /api/borrow/history')
+    args = parser.parse_args()
+
+    paths = args.path or list(DEFAULT_PATHS)
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    print(f"{'server':<10} {'conc':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    for server in args.server:
+        name, _, base_url = server.partition('=')
+        for level in levels:
+            result = run_level(base_url.rstrip('/'), paths, level, max(args.requests, level), args.token)
+            print(f"{name:<10} {level:>6} {result['rps']:>9.1f} {result['p50_ms']:>9.1f} "
+                  f"{result['p95_ms']:>9.1f} {result['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select, update
+
+from src.app_factory import create_app, db
+from src.models import Book, BorrowRecord
+from src.utils.synthetic_data import GENRES, dataset_sizes, generate_library
+
+# Read/write concurrency on one SQLite file with SQLite's default pragmas and
+# with the SQLITE_* profile (src/utils/sqlite_tuning.py). Generates a synthetic
+# library once, copies it per profile, then runs catalog/history readers and
+# borrowing writers side by side for a fixed time:
+#   python scripts/benchmark_sqlite.py --scale 0.01 --readers 8 --writers 2 --seconds 10
+
+PROFILES = {
+    'default': {'SQLITE_TUNING': False},
+    'tuned': {'SQLITE_TUNING': True}
+}
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def read_once(conn, rng, sizes):
+    """One of the catalog, book page and borrowing history reads"""
+    choice = rng.random()
+    if choice < 0.4:
+        conn.execute(select(Book).where(Book.genre == rng.choice(GENRES)).limit(20)).all()
+    elif choice < 0.7:
+        conn.execute(select(Book).where(Book.id == rng.randint(1, sizes['books']))).all()
+    else:
+        conn.execute(
+            select(BorrowRecord)
+            .where(BorrowRecord.user_id == rng.randint(1, sizes['users']))
+            .order_by(BorrowRecord.borrow_date.desc())
+            .limit(50)
+        ).all()
+
+
+def write_once(engine, rng, sizes):
+    """A checkout: record the loan and take a copy off the shelf in one transaction"""
+    book_id = rng.randint(1, sizes['books'])
+    with engine.begin() as conn:
+        conn.execute(BorrowRecord.__table__.insert().values(
+            user_id=rng.randint(1, sizes['users']), book_id=book_id,
+            borrow_date=date.today(), due_date=date.today(), status='borrowed'
+        ))
+        conn.execute(update(Book).where(Book.id == book_id).values(available_copies=Book.available_copies - 1))
+
+
+def run_mix(engine, sizes, readers, writers, seconds):
+    """Readers and writers hammering engine until the deadline; latency and error counts per side"""
+    results = {'read': [], 'write': []}
+    errors = {'read': 0, 'write': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(kind, seed):
+        rng = random.Random(seed)
+        latencies, failed = [], 0
+        with engine.connect() as conn:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    if kind == 'read':
+                        read_once(conn, rng, sizes)
+                        conn.rollback()
+                    else:
+                        write_once(engine, rng, sizes)
+                except Exception:
+                    failed += 1
+                    conn.rollback()
+                    continue
+                latencies.append(time.perf_counter() - started)
+        with lock:
+            results[kind].extend(latencies)
+            errors[kind] += failed
+
+    threads = [threading.Thread(target=worker, args=('read', i)) for i in range(readers)]
+    threads += [threading.Thread(target=worker, args=('write', 1000 + i)) for i in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    summary = {}
+    for kind, count in (('read', readers), ('write', writers)):
+        if not count:
+            continue
+        latencies = sorted(results[kind])
+        summary[kind] = {
+            'threads': count,
+            'per_s': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 3) if latencies else None,
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+            'errors': errors[kind]
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite read/write concurrency with and without the tuning profile')
+    parser.add_argument('--scale', type=float, default=0.01, help='synthetic library size (see generate_data.py)')
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10, help='duration of each scenario')
+    parser.add_argument('--output', help='also write the results as JSON')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='lms-sqlite-bench-')
+    base = os.path.join(directory, 'base.db')
+    sizes = dataset_sizes(args.scale)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{base}', 'SQLITE_TUNING': False,
+                      'SESSION_BACKEND': 'memory', 'SLOW_QUERY_MS': 0})
+    with app.app_context():
+        db.create_all()
+        generate_library(db.engine, sizes, 'unused-hash', seed=0)
+        db.engine.dispose()
+
+    scenarios = (
+        ('reads', args.readers, 0),
+        ('writes', 0, args.writers),
+        ('mixed', args.readers, args.writers)
+    )
+    report = {'scale': args.scale, 'seconds': args.seconds, 'results': {}}
+    try:
+        for profile, overrides in PROFILES.items():
+            path = os.path.join(directory, f'{profile}.db')
+            shutil.copy(base, path)
+            app = create_app(dict(
+                {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'SESSION_BACKEND': 'memory', 'SLOW_QUERY_MS': 0,
+                 'SQLITE_MAINTENANCE_SECONDS': 0, 'DB_POOL_SIZE': args.readers + args.writers},
+                **overrides
+            ))
+            with app.app_context():
+                engine = db.engine
+            report['results'][profile] = {}
+            for name, readers, writers in scenarios:
+                result = run_mix(engine, sizes, readers, writers, args.seconds)
+                report['results'][profile][name] = result
+                for kind, stats in result.items():
+                    print(f"{profile:<8} {name:<7} {kind:<5} {stats['threads']:>3} threads "
+                          f"{stats['per_s']:>10,.1f}/s  p50 {stats['p50_ms']} ms  p99 {stats['p99_ms']} ms  "
+                          f"errors {stats['errors']}")
+            engine.dispose()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
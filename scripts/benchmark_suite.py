@@ -0,0 +1,468 @@
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.engine import make_url
+
+from src.app_factory import create_app, db
+from src.utils.synthetic_data import GENRES, dataset_sizes, generate_library
+
+# End-to-end benchmarks on a reproducible synthetic library. Generates the
+# library (scale 1.0 = 1M books, 200k users, 10M loans, 5M ratings) into a
+# fresh SQLite file or the database given, then times every blueprint
+# endpoint in-process under fixed concurrency, the importers and the ML
+# modules, and writes throughput and p50/p95/p99 latency as JSON:
+#   python scripts/benchmark_suite.py --scale 0.01
+#   python scripts/benchmark_suite.py --database-url postgresql://localhost/bench --scale 1
+#   python scripts/benchmark_suite.py --scale 0.01 --compare benchmark_results/<older commit>.json
+# Results go to benchmark_results/<commit>.json unless --output is given.
+
+PASSWORD = 'benchmark-password'
+
+# Suites that can be selected with --only
+SUITES = ('endpoints', 'importers', 'ml')
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of sorted samples"""
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def summarize(latencies, elapsed, errors, concurrency):
+    latencies = sorted(latencies)
+    return {
+        'operations': len(latencies),
+        'concurrency': concurrency,
+        'throughput_per_s': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'errors': errors
+    }
+
+
+def run_concurrent(operation, total, concurrency):
+    """Call operation(rng) total times from concurrency threads; it returns True on success"""
+    local = threading.local()
+    counter = itertools.count()
+
+    def timed(_):
+        if not hasattr(local, 'rng'):
+            local.rng = random.Random(next(counter))
+        started = time.perf_counter()
+        try:
+            ok = operation(local.rng)
+        except Exception:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(total)))
+    elapsed = time.perf_counter() - started
+
+    errors = sum(1 for _, ok in results if not ok)
+    return summarize([latency for latency, _ in results], elapsed, errors, concurrency)
+
+
+def skipped(error):
+    return {'skipped': f'{type(error).__name__}: {error}'}
+
+
+class Endpoints:
+    """One callable per blueprint endpoint, each issuing a request with random ids"""
+
+    def __init__(self, app, ranges):
+        self.app = app
+        self.users = ranges['users']
+        self.books = ranges['books']
+        self.unique = itertools.count()
+        self.local = threading.local()
+
+        admin = f'admin{self.users[0]}'
+        student = f'student{self.users[0] + 1}' if self.users[1] > 1 else admin
+        self.admin = self._headers(self._login(admin)['access_token'])
+        self.student = self._headers(self._login(student)['access_token'])
+
+        # A book with no copies on the shelf, so holds can be placed on it
+        response = self.client.post('/api/admin/admin/books', headers=self.admin, json={
+            'title': 'Benchmark hold target', 'author': 'Benchmark', 'isbn': 'benchmark-holds', 'stock': 0
+        })
+        self.hold_book_id = response.get_json()['id']
+
+    @property
+    def client(self):
+        if not hasattr(self.local, 'client'):
+            self.local.client = self.app.test_client()
+        return self.local.client
+
+    @staticmethod
+    def _headers(token):
+        return {'Authorization': f'Bearer {token}'}
+
+    def _login(self, username):
+        return self.client.post('/api/auth/login', json={'username': username, 'password': PASSWORD}).get_json()
+
+    def _user(self, rng):
+        return self.users[0] + rng.randrange(self.users[1])
+
+    def _book(self, rng):
+        return self.books[0] + rng.randrange(self.books[1])
+
+    def _get(self, path, headers=None):
+        return self.client.get(path, headers=headers).status_code < 400
+
+    def scenarios(self):
+        """(name, operation, share of --requests) for every endpoint; chains are named a+b"""
+        get = self._get
+        return [
+            ('books.get_books', lambda rng: get(f'/api/books/?page={rng.randint(1, 50)}&per_page=20'), 1),
+            ('books.get_books?genre', lambda rng: get(f'/api/books/?genre={rng.choice(GENRES)}&per_page=20'), 1),
+            ('books.get_books?search', lambda rng: get('/api/books/?search=River&per_page=20'), 1),
+            ('books.get_book', lambda rng: get(f'/api/books/{self._book(rng)}'), 1),
+            ('books.get_genres', lambda rng: get('/api/books/genres'), 1),
+            ('books.get_top_rated_books', lambda rng: get('/api/books/top-rated'), 1),
+            ('books.get_book_recommendations', lambda rng: get(f'/api/books/{self._book(rng)}/recommendations'), 1),
+            ('books.add_book_rating', self.rate_book, 0.25),
+            ('borrowing.get_borrow_records', lambda rng: get('/api/borrow/?limit=50'), 1),
+            ('borrowing.get_borrow_records?user_id',
+             lambda rng: get(f'/api/borrow/?user_id={self._user(rng)}&limit=50'), 1),
+            ('borrowing.get_borrow_history',
+             lambda rng: get(f'/api/borrow/history?user_id={self._user(rng)}', self.admin), 1),
+            ('borrowing.create_borrow_record+return_book', self.borrow_and_return, 0.25),
+            ('borrowing.place_hold+get_hold_position+cancel_hold', self.hold_cycle, 0.25),
+            ('users.get_users', lambda rng: get('/api/users/?limit=50', self.admin), 1),
+            ('users.get_users?q', lambda rng: get(f'/api/users/?q=student{rng.randint(1, 9)}', self.admin), 1),
+            ('users.get_current_user', lambda rng: get('/api/users/me', self.student), 1),
+            ('users.get_user_summary', lambda rng: get(f'/api/users/{self._user(rng)}/summary', self.admin), 1),
+            ('users.create_user', self.create_user, 0.25),
+            ('admin.get_admin_stats', lambda rng: get('/api/admin/admin/stats', self.admin), 0.25),
+            ('admin.get_admin_forecast', lambda rng: get('/api/admin/admin/forecast', self.admin), 0.25),
+            ('admin.get_all_books', lambda rng: get('/api/admin/admin/books', self.admin), 0.25),
+            ('admin.add_book', self.add_book, 0.25),
+            ('admin.fine_calculation', lambda rng: get('/api/admin/admin/fine-calculation', self.admin), 1),
+            ('admin.get_events', lambda rng: get('/api/admin/admin/events?consumer=benchmark&limit=100', self.admin), 1),
+            ('admin.acknowledge_events', self.acknowledge_events, 0.25),
+            ('admin.get_rate_limit_counters', lambda rng: get('/api/admin/admin/rate-limits', self.admin), 1),
+            ('admin.get_db_pool_metrics', lambda rng: get('/api/admin/admin/db-pool', self.admin), 1),
+            ('admin.get_db_replicas', lambda rng: get('/api/admin/admin/db-replicas', self.admin), 1),
+            ('admin.get_slow_queries', lambda rng: get('/api/admin/admin/slow-queries', self.admin), 1),
+            ('admin.update_user_role', self.update_role, 0.25),
+            ('auth.register', self.register, 0.05),
+            ('auth.login+refresh+logout', self.login_refresh_logout, 0.05),
+        ]
+
+    def rate_book(self, rng):
+        response = self.client.post(f'/api/books/{self._book(rng)}/ratings', json={'rating': rng.randint(1, 5)})
+        return response.status_code < 400
+
+    def borrow_and_return(self, rng):
+        response = self.client.post('/api/borrow/', json={'user_id': self._user(rng), 'book_id': self._book(rng)})
+        if response.status_code == 400:
+            # No copy on the shelf is a normal outcome for a popular book
+            return True
+        if response.status_code >= 400:
+            return False
+        return self.client.put(f"/api/borrow/{response.get_json()['id']}/return").status_code < 400
+
+    def hold_cycle(self, rng):
+        response = self.client.post('/api/borrow/holds', json={'user_id': self._user(rng), 'book_id': self.hold_book_id})
+        if response.status_code == 409:
+            return True
+        if response.status_code >= 400:
+            return False
+        hold_id = response.get_json()['id']
+        return self._get(f'/api/borrow/holds/{hold_id}/position') and \
+            self.client.delete(f'/api/borrow/holds/{hold_id}').status_code < 400
+
+    def create_user(self, rng):
+        n = next(self.unique)
+        response = self.client.post('/api/users/', json={
+            'username': f'bench-user-{n}', 'email': f'bench-user-{n}@example.org', 'fullname': f'Bench {n}'
+        })
+        return response.status_code < 400
+
+    def add_book(self, rng):
+        n = next(self.unique)
+        response = self.client.post('/api/admin/admin/books', headers=self.admin, json={
+            'title': f'Benchmark book {n}', 'author': 'Benchmark', 'isbn': f'bench-{n}', 'genre': rng.choice(GENRES)
+        })
+        return response.status_code < 400
+
+    def acknowledge_events(self, rng):
+        response = self.client.post('/api/admin/admin/events/ack', headers=self.admin,
+                                    json={'consumer': 'benchmark', 'last_event_id': 0})
+        return response.status_code < 400
+
+    def update_role(self, rng):
+        user_id = self.users[0] + 2 + rng.randrange(max(self.users[1] - 2, 1))
+        response = self.client.put(f'/api/admin/admin/users/{user_id}/role', headers=self.admin,
+                                   json={'role': 'student'})
+        return response.status_code < 400
+
+    def register(self, rng):
+        n = next(self.unique)
+        response = self.client.post('/api/auth/register', json={
+            'username': f'bench-reg-{n}', 'email': f'bench-reg-{n}@example.org',
+            'fullname': f'Bench {n}', 'password': PASSWORD
+        })
+        return response.status_code < 400
+
+    def login_refresh_logout(self, rng):
+        tokens = self._login(f'student{self.users[0] + 1}')
+        refreshed = self.client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+        if refreshed.status_code >= 400:
+            return False
+        tokens = refreshed.get_json()
+        response = self.client.post('/api/auth/logout', headers=self._headers(tokens['access_token']),
+                                    json={'refresh_token': tokens['refresh_token']})
+        return response.status_code < 400
+
+
+def run_endpoints(app, ranges, requests, concurrency):
+    endpoints = Endpoints(app, ranges)
+    results = {}
+    for name, operation, share in endpoints.scenarios():
+        total = max(int(requests * share), concurrency)
+        results[name] = run_concurrent(operation, total, concurrency)
+        print(f"  {name:<52} {results[name]['throughput_per_s']:>9} /s  p95 {results[name]['p95_ms']:>9} ms"
+              f"  errors {results[name]['errors']}")
+    return results
+
+
+def timed_repeats(operation, repeats):
+    """Run operation repeats times in sequence and summarize"""
+    return run_concurrent(lambda rng: operation(rng) is not False, repeats, 1)
+
+
+def run_importers(app, roster_size, repeats):
+    from src.utils.provisioning import provision_students, read_roster
+    from src.utils.user_stats import rebuild_user_stats
+
+    results = {}
+    batches = itertools.count()
+
+    def provision(rng):
+        batch = next(batches)
+        lines = ['fullname,email,username,password'] + [
+            f'Roster {batch}-{i},roster{batch}-{i}@example.edu,roster{batch}-{i},{PASSWORD}'
+            for i in range(roster_size)
+        ]
+        with app.app_context():
+            rows, errors = read_roster('\n'.join(lines).encode())
+            report = provision_students(rows, errors)
+        return not report['errors']
+
+    results['provisioning.provision_students'] = timed_repeats(provision, repeats)
+    results['provisioning.provision_students']['rows_per_operation'] = roster_size
+
+    def rebuild(rng):
+        with app.app_context():
+            rebuild_user_stats()
+
+    results['user_stats.rebuild_user_stats'] = timed_repeats(rebuild, repeats)
+
+    try:
+        from src.utils.dataset_importer import import_book_recommendation_dataset
+    except (ImportError, SyntaxError) as e:
+        results['dataset_importer.import_book_recommendation_dataset'] = skipped(e)
+    else:
+        def import_dataset(rng):
+            with app.app_context():
+                import_book_recommendation_dataset()
+
+        results['dataset_importer.import_book_recommendation_dataset'] = timed_repeats(import_dataset, 1)
+
+    return results
+
+
+def _ml_data(app, book_limit, rating_limit):
+    from src.models import Book, BookRating
+
+    with app.app_context():
+        books = [
+            {'id': b.id, 'title': b.title, 'author': b.author, 'genre': b.genre or '',
+             'year': b.published_year, 'description': b.description or ''}
+            for b in db.session.execute(db.select(Book).order_by(Book.id).limit(book_limit)).scalars()
+        ]
+        ratings = db.session.execute(
+            db.select(BookRating.user_id, BookRating.book_id, BookRating.rating)
+            .where(BookRating.book_id <= books[-1]['id']).limit(rating_limit)
+        ).all()
+    return books, ratings
+
+
+def run_ml(app, book_limit, repeats):
+    from src.ml.simple_recommender import SimpleRecommender
+
+    results = {}
+    books, ratings = _ml_data(app, book_limit, book_limit * 20)
+    book_ids = [book['id'] for book in books]
+    user_ids = sorted({user_id for user_id, _, _ in ratings}) or [0]
+
+    recommender = SimpleRecommender()
+
+    def load(rng):
+        recommender.load_books(books)
+        for user_id, book_id, rating in ratings:
+            recommender.add_rating(user_id, book_id, rating)
+
+    results['simple_recommender.load'] = timed_repeats(load, 1)
+    results['simple_recommender.load']['books'] = len(books)
+    results['simple_recommender.load']['ratings'] = len(ratings)
+    for name, operation in (
+        ('get_content_based_recommendations', lambda rng: recommender.get_content_based_recommendations(rng.choice(book_ids))),
+        ('get_recommendations_for_user', lambda rng: recommender.get_recommendations_for_user(rng.choice(user_ids))),
+        ('get_popular_books', lambda rng: recommender.get_popular_books()),
+        ('search_books', lambda rng: recommender.search_books('river')),
+        ('get_book_insights', lambda rng: recommender.get_book_insights()),
+    ):
+        results[f'simple_recommender.{name}'] = timed_repeats(operation, repeats)
+
+    try:
+        import pandas as pd
+        from src.ml.recommendation_engine import BookRecommendationEngine
+
+        books_df = pd.DataFrame(books)
+        engine = BookRecommendationEngine()
+        results['recommendation_engine.prepare_content_features'] = timed_repeats(
+            lambda rng: engine.prepare_content_features(books_df), 1
+        )
+        results['recommendation_engine.get_content_based_recommendations'] = timed_repeats(
+            lambda rng: engine.get_content_based_recommendations(rng.choice(book_ids), books_df), repeats
+        )
+    except ImportError as e:
+        results['recommendation_engine'] = skipped(e)
+
+    try:
+        from src.ml.book_analyzer import BookAnalyzer
+
+        analyzer = BookAnalyzer(download_missing=False)
+        analyzer.analyze_book_sentiment('A probe for the optional NLP dependencies')
+        results['book_analyzer.analyze_book_sentiment'] = timed_repeats(
+            lambda rng: analyzer.analyze_book_sentiment(rng.choice(books)['title']), repeats
+        )
+    except (ImportError, LookupError) as e:
+        results['book_analyzer'] = skipped(e)
+
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(baseline, current):
+    """Print p95 and throughput changes of current against a baseline result file"""
+    print(f"\n{'benchmark':<60} {'p95 ms':>20} {'throughput/s':>22}")
+    for suite in SUITES:
+        for name, result in current['results'].get(suite, {}).items():
+            before = baseline['results'].get(suite, {}).get(name)
+            if not before or 'p95_ms' not in before or 'p95_ms' not in result:
+                continue
+            p95 = f"{before['p95_ms']} -> {result['p95_ms']}"
+            rate = f"{before['throughput_per_s']} -> {result['throughput_per_s']}"
+            print(f'{suite + "/" + name:<60} {p95:>20} {rate:>22}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end benchmarks on a synthetic library')
+    parser.add_argument('--database-url', help='database to load and benchmark (default: a new SQLite file)')
+    parser.add_argument('--scale', type=float, default=1.0, help='fraction of 1M books / 200k users / 10M loans / 5M ratings')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-generate', action='store_true', help='benchmark the data already in --database-url')
+    parser.add_argument('--only', action='append', choices=SUITES, help='run only these suites')
+    parser.add_argument('--concurrency', type=int, default=8, help='threads issuing endpoint requests')
+    parser.add_argument('--requests', type=int, default=400, help='requests per read endpoint')
+    parser.add_argument('--repeats', type=int, default=20, help='calls per importer and ML benchmark')
+    parser.add_argument('--roster-size', type=int, default=1000, help='students per provisioning import')
+    parser.add_argument('--ml-books', type=int, default=5000, help='books loaded into the ML models')
+    parser.add_argument('--output', help='result file (default: benchmark_results/<commit>.json)')
+    parser.add_argument('--compare', metavar='BASELINE_JSON', help='print changes against an earlier result file')
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='lms-bench-'), 'bench.db')}"
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': url,
+        'RATE_LIMIT_ENABLED': False,
+        'SESSION_BACKEND': 'memory'
+    })
+    # Failed requests are counted as errors in the results instead of logged
+    app.logger.setLevel(logging.CRITICAL)
+
+    sizes = dataset_sizes(args.scale)
+    report = {
+        'commit': git_commit(),
+        'started_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'database': make_url(url).render_as_string(hide_password=True),
+        'scale': args.scale,
+        'seed': args.seed,
+        'concurrency': args.concurrency,
+        'dataset': sizes,
+        'results': {}
+    }
+
+    with app.app_context():
+        if args.skip_generate:
+            from src.models import Book, BookRating, BorrowRecord, User
+            first = lambda model: db.session.query(db.func.min(model.id)).scalar() or 1
+            count = lambda model: db.session.query(db.func.count(model.id)).scalar()
+            ranges = {table: (first(model), count(model)) for table, model in (
+                ('users', User), ('books', Book), ('borrow_records', BorrowRecord), ('ratings', BookRating)
+            )}
+        else:
+            from src.utils.passwords import hash_password
+            db.create_all()
+            started = time.perf_counter()
+            ranges = generate_library(
+                db.engine, sizes, hash_password(PASSWORD), seed=args.seed,
+                progress=lambda table, rows: print(f'  loaded {rows} {table}')
+            )
+            report['generate_seconds'] = round(time.perf_counter() - started, 2)
+            print(f"Generated in {report['generate_seconds']}s")
+    report['dataset'] = {table: count for table, (_, count) in ranges.items()}
+
+    suites = args.only or SUITES
+    if 'importers' in suites:
+        print('importers')
+        report['results']['importers'] = run_importers(app, args.roster_size, max(args.repeats // 10, 1))
+    if 'endpoints' in suites:
+        print('endpoints')
+        report['results']['endpoints'] = run_endpoints(app, ranges, args.requests, args.concurrency)
+    if 'ml' in suites:
+        print('ml')
+        report['results']['ml'] = run_ml(app, args.ml_books, args.repeats)
+
+    output = args.output or os.path.join('benchmark_results', f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Wrote {output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app
+from src.utils.holds import expire_stale_holds
+
+# Run periodically (e.g. hourly from cron) to release uncollected hold copies
+app = create_app()
+
+with app.app_context():
+    expired = expire_stale_holds()
+    print(f"Expired {expired} stale holds")
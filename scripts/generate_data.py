@@ -0,0 +1,48 @@
+import argparse
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.utils.passwords import hash_password
+from src.utils.synthetic_data import dataset_sizes, generate_library
+
+# Fill a development or benchmark database with a synthetic library:
+#   python scripts/generate_data.py --scale 0.01            # 10k books, 2k users, 100k loans
+#   python scripts/generate_data.py --scale 1 --database-url postgresql://localhost/library_db
+# Rows are appended after any existing ones; --reset drops and recreates the tables first.
+# Every generated account uses --password; the first one (admin<id>) is an admin.
+parser = argparse.ArgumentParser(description='Generate a synthetic library')
+parser.add_argument('--scale', type=float, default=0.01,
+                    help='fraction of 1M books / 200k users / 10M loans / 5M ratings')
+parser.add_argument('--seed', type=int, default=0)
+parser.add_argument('--chunk-size', type=int, default=50_000, help='rows per COPY or executemany batch')
+parser.add_argument('--database-url', help='target database (default: the app configuration)')
+parser.add_argument('--password', default='password123', help='password of every generated account')
+parser.add_argument('--reset', action='store_true', help='drop and recreate all tables first')
+args = parser.parse_args()
+
+app = create_app({'SQLALCHEMY_DATABASE_URI': args.database_url} if args.database_url else None)
+sizes = dataset_sizes(args.scale)
+
+with app.app_context():
+    if args.reset:
+        db.drop_all()
+    db.create_all()
+
+    password_hash = hash_password(args.password)
+    started = last = time.perf_counter()
+
+    def report(table, rows):
+        global last
+        now = time.perf_counter()
+        print(f"{table:<15} {rows:>11,} rows {now - last:>8.1f}s {rows / max(now - last, 1e-9) * 60:>14,.0f} rows/min")
+        last = now
+
+    generate_library(db.engine, sizes, password_hash, seed=args.seed,
+                     chunk_size=args.chunk_size, progress=report)
+    total = sum(sizes.values())
+    elapsed = time.perf_counter() - started
+    print(f"{'total':<15} {total:>11,} rows {elapsed:>8.1f}s {total / elapsed * 60:>14,.0f} rows/min")
@@ -0,0 +1,55 @@
+import argparse
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.utils.migrations import MIGRATIONS_DIR, MigrationError, baseline, migrate, migration_status
+
+# Apply the numbered SQL files in migrations/ that this database has not run yet:
+#   python scripts/migrate.py                  # apply everything pending, in order
+#   python scripts/migrate.py --dry-run        # print what would run, change nothing
+#   python scripts/migrate.py --to 12          # stop after migration 012
+#   python scripts/migrate.py status
+#   python scripts/migrate.py baseline 14      # schema already at 014: record 001-014 as applied
+# Applied versions are kept in schema_migrations. A database made by create_tables.py is
+# baselined there, so only later migrations run against it.
+parser = argparse.ArgumentParser(description='Apply pending database migrations')
+parser.add_argument('command', nargs='?', default='up', choices=('up', 'status', 'baseline'))
+parser.add_argument('version', nargs='?', type=int, help='baseline: last version already in place (default: all)')
+parser.add_argument('--to', type=int, help='up: last version to apply')
+parser.add_argument('--dry-run', action='store_true', help='up: print the statements instead of running them')
+parser.add_argument('--database-url', help='target database (default: the app configuration)')
+parser.add_argument('--directory', default=MIGRATIONS_DIR)
+parser.add_argument('--batch-size', type=int, help='rows per backfill batch, unless the migration sets one')
+parser.add_argument('--pause-ms', type=int, help='pause between backfill batches, unless the migration sets one')
+parser.add_argument('--lock-timeout', default='5s', help="give up waiting for a table lock after this long (Postgres)")
+args = parser.parse_args()
+
+app = create_app({'SQLALCHEMY_DATABASE_URI': args.database_url} if args.database_url else None)
+
+with app.app_context():
+    engine = db.engine
+
+if args.command == 'status':
+    for entry in migration_status(engine, args.directory):
+        applied_at = f"{entry['applied_at']:%Y-%m-%d %H:%M}" if entry['applied_at'] else ''
+        note = ' (baseline)' if entry['baseline'] else ''
+        print(f"{entry['version']:03d} {entry['name']:<45} {entry['state']:<9} {applied_at}{note}")
+elif args.command == 'baseline':
+    versions = baseline(engine, args.directory, args.version)
+    print(f"Recorded {len(versions)} migrations as applied" + (f" (up to {versions[-1]:03d})" if versions else ''))
+else:
+    try:
+        versions = migrate(engine, args.directory, target=args.to, dry_run=args.dry_run,
+                           batch_size=args.batch_size, pause_ms=args.pause_ms,
+                           lock_timeout=args.lock_timeout, log=print)
+    except MigrationError as e:
+        sys.exit(str(e))
+    if not versions:
+        print('Database is up to date')
+    elif args.dry_run:
+        print(f"{len(versions)} migrations pending")
+    else:
+        print(f"Applied {len(versions)} migrations")
@@ -0,0 +1,37 @@
+import argparse
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app
+from src.utils.provisioning import provision_students, read_roster
+
+parser = argparse.ArgumentParser(description='Create student accounts in bulk from a CSV roster')
+parser.add_argument('roster', help='CSV file with fullname, email, username and password columns')
+parser.add_argument('--batch-size', type=int, default=1000)
+parser.add_argument('--processes', type=int, default=None, help='hashing processes (default and at most: CPU count)')
+parser.add_argument('--errors', help='write per-row errors to this JSON file')
+args = parser.parse_args()
+
+app = create_app()
+
+with app.app_context():
+    with open(args.roster, newline='', encoding='utf-8-sig') as f:
+        rows, errors = read_roster(f)
+
+    report = provision_students(
+        rows, errors,
+        batch_size=args.batch_size,
+        processes=args.processes,
+        progress=lambda done, total: print(f"{done}/{total} students created", flush=True)
+    )
+
+    print(f"Created {report['created']} students, {len(report['errors'])} rows rejected")
+    if args.errors:
+        with open(args.errors, 'w') as f:
+            json.dump(report['errors'], f, indent=2)
+    else:
+        for error in report['errors']:
+            print(f"  row {error['row']} ({error['username']}): {error['error']}")
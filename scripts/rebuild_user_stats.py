@@ -0,0 +1,24 @@
+import argparse
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app
+from src.utils.user_stats import rebuild_user_stats, refresh_overdue_counts
+
+# Run --overdue-only daily; run a full rebuild after migration 013 and to reconcile drift
+parser = argparse.ArgumentParser(description='Rebuild the user_stats summary table')
+parser.add_argument('--batch-size', type=int, default=1000)
+parser.add_argument('--overdue-only', action='store_true', help='only recount overdue loans')
+args = parser.parse_args()
+
+app = create_app()
+
+with app.app_context():
+    if args.overdue_only:
+        updated = refresh_overdue_counts()
+        print(f"Recounted overdue loans for {updated} users")
+    else:
+        rebuilt = rebuild_user_stats(batch_size=args.batch_size)
+        print(f"Rebuilt stats for {rebuilt} users")
@@ -0,0 +1,26 @@
+import argparse
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app
+from src.utils.sessions import LegacyFilesystemSessions, SqlSessionInterface
+
+# Run periodically (e.g. hourly from cron) to delete expired sessions
+parser = argparse.ArgumentParser(description='Delete expired server-side sessions')
+parser.add_argument('--legacy-dir', help='also prune expired files from the old flask_session/ directory')
+args = parser.parse_args()
+
+app = create_app()
+
+with app.app_context():
+    if isinstance(app.session_interface, SqlSessionInterface):
+        print(f"Deleted {app.session_interface.sweep_expired()} expired sessions")
+
+    legacy_dir = args.legacy_dir or app.config.get('SESSION_LEGACY_DIR')
+    if legacy_dir and os.path.isdir(legacy_dir):
+        removed, remaining = LegacyFilesystemSessions(legacy_dir).remove_expired()
+        print(f"Removed {removed} expired legacy session files, {remaining} still to drain")
+        if not remaining:
+            print(f"{legacy_dir} is drained; unset SESSION_LEGACY_DIR and delete the directory")
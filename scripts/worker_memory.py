@@ -0,0 +1,31 @@
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.memory import worker_memory
+
+# Memory of a gunicorn master and its workers (see gunicorn.conf.py):
+#   python scripts/worker_memory.py $(cat gunicorn.pid)
+# USS is what each worker holds on its own; with the app preloaded in the master
+# it stays well below RSS, and the PSS total is what the whole server really uses.
+parser = argparse.ArgumentParser(description='RSS, PSS and unique (USS) memory per pre-forked worker')
+parser.add_argument('master_pid', type=int)
+parser.add_argument('--json', action='store_true', help='print the report as JSON')
+args = parser.parse_args()
+
+report = worker_memory(args.master_pid)
+if not report['processes']:
+    sys.exit(f'No readable /proc/{args.master_pid}/smaps_rollup (not Linux, or not your process?)')
+
+if args.json:
+    print(json.dumps(report, indent=2))
+else:
+    print(f"{'role':<7} {'pid':>8} {'rss MiB':>9} {'pss MiB':>9} {'uss MiB':>9} {'shared MiB':>11}")
+    for entry in report['processes']:
+        print(f"{entry['role']:<7} {entry['pid']:>8} {entry['rss'] / 1024:>9.1f} {entry['pss'] / 1024:>9.1f} "
+              f"{entry['uss'] / 1024:>9.1f} {entry['shared'] / 1024:>11.1f}")
+    totals = report['totals']
+    print(f"{'total':<7} {'':>8} {totals['rss'] / 1024:>9.1f} {totals['pss'] / 1024:>9.1f} {totals['uss'] / 1024:>9.1f}")
@@ -0,0 +1,5 @@
+from src.app_factory import create_app
+from src.utils.asgi import create_asgi_app
+
+# uvicorn src.asgi:application --workers 4
+application = create_asgi_app(create_app())
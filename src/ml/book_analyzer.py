@@ -1,26 +1,35 @@
-import pandas as pd
-import numpy as np
-from textblob import TextBlob
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.decomposition import LatentDirichletAllocation
-import matplotlib.pyplot as plt
-import seaborn as sns
-from collections import Counter
-import re
+import os
+
+# pandas, NLTK, scikit-learn and matplotlib are imported inside the methods
+# that use them, so importing this module costs nothing until an analysis runs.
 
 class BookAnalyzer:
-    def __init__(self):
-        try:
-            nltk.data.find('vader_lexicon')
-        except LookupError:
-            nltk.download('vader_lexicon')
-        
-        self.sia = SentimentIntensityAnalyzer()
-        
+    def __init__(self, download_missing=True):
+        # Fetch the VADER lexicon on first sentiment analysis rather than at
+        # construction; deployments should pre-install it and pass False
+        self.download_missing = download_missing
+        self._sia = None
+    
+    @property
+    def sia(self):
+        if self._sia is None:
+            import nltk
+            from nltk.sentiment import SentimentIntensityAnalyzer
+            
+            try:
+                nltk.data.find('sentiment/vader_lexicon.zip')
+            except LookupError:
+                if not self.download_missing:
+                    raise
+                nltk.download('vader_lexicon')
+            
+            self._sia = SentimentIntensityAnalyzer()
+        return self._sia
+    
     def analyze_book_sentiment(self, text):
         """Analyze sentiment of book descriptions/reviews"""
+        import pandas as pd
+        
         if not text or pd.isna(text):
             return {'compound': 0, 'positive': 0, 'neutral': 0, 'negative': 0}
         
@@ -34,6 +43,10 @@ class BookAnalyzer:
     
     def extract_topics(self, texts, n_topics=5):
         """Extract topics from book descriptions using LDA"""
+        import pandas as pd
+        from sklearn.feature_extraction.text import CountVectorizer
+        from sklearn.decomposition import LatentDirichletAllocation
+        
         if not texts or all(pd.isna(text) for text in texts):
             return []
         
@@ -70,6 +83,8 @@ class BookAnalyzer:
         if not borrow_records:
             return {}
         
+        import pandas as pd
+        
         df = pd.DataFrame(borrow_records)
         
         # Genre preferences
@@ -171,7 +186,6 @@ class BookAnalyzer:
         import matplotlib
         matplotlib.use('Agg')  # Use non-interactive backend
         import matplotlib.pyplot as plt
-        import seaborn as sns
         
         os.makedirs(save_path, exist_ok=True)
         
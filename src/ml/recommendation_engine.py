@@ -1,24 +1,46 @@
-import numpy as np
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.decomposition import TruncatedSVD
-from sklearn.preprocessing import StandardScaler
-import tensorflow as tf
-from tensorflow.keras.models import Model
-from tensorflow.keras.layers import Input, Embedding, Dense, Flatten, Concatenate, Dropout
-from tensorflow.keras.optimizers import Adam
 import pickle
 import os
 
+# scikit-learn, NumPy and TensorFlow are imported inside the methods that use
+# them, so importing this module costs nothing until a model is actually built.
+
 class BookRecommendationEngine:
     def __init__(self):
-        self.content_vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
         self.collaborative_model = None
         self.content_similarity_matrix = None
-        self.svd_model = TruncatedSVD(n_components=50, random_state=42)
-        self.scaler = StandardScaler()
-        
+        self._content_vectorizer = None
+        self._svd_model = None
+        self._scaler = None
+    
+    @property
+    def content_vectorizer(self):
+        if self._content_vectorizer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self._content_vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
+        return self._content_vectorizer
+    
+    @content_vectorizer.setter
+    def content_vectorizer(self, value):
+        self._content_vectorizer = value
+    
+    @property
+    def svd_model(self):
+        if self._svd_model is None:
+            from sklearn.decomposition import TruncatedSVD
+            self._svd_model = TruncatedSVD(n_components=50, random_state=42)
+        return self._svd_model
+    
+    @svd_model.setter
+    def svd_model(self, value):
+        self._svd_model = value
+    
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            from sklearn.preprocessing import StandardScaler
+            self._scaler = StandardScaler()
+        return self._scaler
+    
     def prepare_content_features(self, books_df):
         """Prepare content-based features from book metadata"""
         # Combine text features
@@ -29,6 +51,8 @@ class BookRecommendationEngine:
             books_df['description'].fillna('')
         )
         
+        from sklearn.metrics.pairwise import cosine_similarity
+        
         # Create TF-IDF matrix
         content_matrix = self.content_vectorizer.fit_transform(books_df['content_features'])
         self.content_similarity_matrix = cosine_similarity(content_matrix)
@@ -37,6 +61,10 @@ class BookRecommendationEngine:
     
     def build_collaborative_model(self, n_users, n_books, embedding_dim=50):
         """Build neural collaborative filtering model"""
+        from tensorflow.keras.models import Model
+        from tensorflow.keras.layers import Input, Embedding, Dense, Flatten, Concatenate, Dropout
+        from tensorflow.keras.optimizers import Adam
+        
         # User embedding
         user_input = Input(shape=(1,), name='user_input')
         user_embedding = Embedding(n_users, embedding_dim, name='user_embedding')(user_input)
@@ -116,6 +144,8 @@ class BookRecommendationEngine:
         if self.collaborative_model is None:
             return []
         
+        import numpy as np
+        
         # Get all book IDs
         all_book_ids = books_df['id'].values
         
@@ -179,16 +209,37 @@ class BookRecommendationEngine:
         # Save SVD model
         with open(os.path.join(filepath, 'svd_model.pkl'), 'wb') as f:
             pickle.dump(self.svd_model, f)
+        
+        # Save the similarity matrix as a plain .npy file so it can be memory-mapped;
+        # float32 halves it and is plenty for ranking
+        if self.content_similarity_matrix is not None:
+            import numpy as np
+            np.save(
+                os.path.join(filepath, 'content_similarity_matrix.npy'),
+                np.asarray(self.content_similarity_matrix, dtype=np.float32)
+            )
     
-    def load_models(self, filepath='models/'):
-        """Load trained models"""
+    def load_models(self, filepath='models/', mmap=False):
+        """Load trained models.
+        
+        With mmap the similarity matrix is mapped read-only instead of read
+        into memory: every process on the host then shares the same page-cache
+        copy, and only the rows actually used are ever paged in.
+        """
         try:
+            # Load similarity matrix
+            matrix_path = os.path.join(filepath, 'content_similarity_matrix.npy')
+            if os.path.exists(matrix_path):
+                import numpy as np
+                self.content_similarity_matrix = np.load(matrix_path, mmap_mode='r' if mmap else None)
+            
             # Load vectorizer
             with open(os.path.join(filepath, 'content_vectorizer.pkl'), 'rb') as f:
                 self.content_vectorizer = pickle.load(f)
             
             # Load collaborative model
             if os.path.exists(os.path.join(filepath, 'collaborative_model.h5')):
+                import tensorflow as tf
                 self.collaborative_model = tf.keras.models.load_model(
                     os.path.join(filepath, 'collaborative_model.h5')
                 )
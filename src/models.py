@@ -1,6 +1,6 @@
 from src.app_factory import db
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from src.utils.passwords import hash_password, verify_password
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -11,33 +11,65 @@ class User(db.Model):
     username = db.Column(db.String(50), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(20), default='student')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped on role/permission changes; tokens carrying an older value are rejected
+    permissions_version = db.Column(db.Integer, nullable=False, default=1)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     # Relationships
     borrow_records = db.relationship('BorrowRecord', backref='user', lazy=True)
     fees = db.relationship('Fees', backref='user', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """Verify a password, upgrading the stored hash if its parameters are outdated"""
+        matches, needs_rehash = verify_password(self.password_hash, password)
+        if needs_rehash:
+            self.password_hash = hash_password(password)
+        return matches
+
+# Case-insensitive prefix search in the user directory (LIKE 'abc%')
+for _column in ('username', 'email', 'fullname'):
+    db.Index(
+        f'ix_users_lower_{_column}',
+        db.func.lower(getattr(User, _column)).label(f'lower_{_column}'),
+        postgresql_ops={f'lower_{_column}': 'text_pattern_ops'}
+    )
+
+# Role-filtered directory pages, in id order
+db.Index('ix_users_role_id', User.role, User.id)
 
 class Book(db.Model):
     __tablename__ = 'books'
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
-    author = db.Column(db.String(100), nullable=False)
+    author = db.Column(db.String(100), nullable=False, index=True)
     isbn = db.Column(db.String(20), unique=True)
-    genre = db.Column(db.String(50))
+    genre = db.Column(db.String(50), index=True)
     published_year = db.Column(db.Integer)
+    publisher = db.Column(db.String(100))
+    pages = db.Column(db.Integer)
+    language = db.Column(db.String(20), default='English')
+    cover_image = db.Column(db.String(500))
+    description = db.Column(db.Text)
+    average_rating = db.Column(db.Float)
+    ratings_count = db.Column(db.Integer, default=0)
     total_copies = db.Column(db.Integer, default=1)
     available_copies = db.Column(db.Integer, default=1)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # The blueprints refer to the number of copies on the shelf as `stock`
+    stock = db.synonym('available_copies')
+    year = db.synonym('published_year')
+    
     # Relationships
     borrow_records = db.relationship('BorrowRecord', backref='book', lazy=True)
+    
+    __table_args__ = (
+        db.Index('ix_books_average_rating_ratings_count', 'average_rating', 'ratings_count'),
+    )
 
 class BorrowRecord(db.Model):
     __tablename__ = 'borrow_records'
@@ -45,18 +77,163 @@ class BorrowRecord(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     book_id = db.Column(db.Integer, db.ForeignKey('books.id'), nullable=False)
-    borrow_date = db.Column(db.Date, nullable=False)
+    borrow_date = db.Column(db.Date, nullable=False, index=True)
     due_date = db.Column(db.Date, nullable=False)
     return_date = db.Column(db.Date)
     fine = db.Column(db.Float, default=0.0)
+    status = db.Column(db.String(20), default='borrowed', index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_borrow_records_book_id_borrow_date', 'book_id', 'borrow_date'),
+    )
+
+# Serves both the filtered listing and per-user history, newest loans first
+db.Index(
+    'ix_borrow_records_user_id_borrow_date_desc',
+    BorrowRecord.user_id,
+    BorrowRecord.borrow_date.desc()
+)
+
+# Open loans are a small, hot subset of the history; index only those
+db.Index(
+    'ix_borrow_records_open_due_date',
+    BorrowRecord.due_date,
+    postgresql_where=BorrowRecord.return_date.is_(None),
+    sqlite_where=BorrowRecord.return_date.is_(None)
+)
+
+# Closed loans moved out of borrow_records by the archival job
+class BorrowRecordArchive(db.Model):
+    __tablename__ = 'borrow_records_archive'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    book_id = db.Column(db.Integer, nullable=False)
+    borrow_date = db.Column(db.Date, nullable=False)
+    due_date = db.Column(db.Date, nullable=False)
+    return_date = db.Column(db.Date)
+    fine = db.Column(db.Float, default=0.0)
+    status = db.Column(db.String(20), default='returned')
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_borrow_records_archive_user_id_borrow_date', 'user_id', 'borrow_date'),
+        db.Index('ix_borrow_records_archive_book_id_borrow_date', 'book_id', 'borrow_date'),
+    )
+
+class Hold(db.Model):
+    __tablename__ = 'holds'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id'), nullable=False)
+    # waiting -> ready (copy set aside) -> fulfilled, or expired/cancelled
+    status = db.Column(db.String(20), default='waiting', nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    ready_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    # Place in the book's queue; consecutive among its waiting holds
+    queue_number = db.Column(db.Integer, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_holds_book_id_created_at', 'book_id', 'created_at'),
+        # Only the waiting holds are queued; their head and tail are one lookup each
+        db.Index(
+            'ix_holds_waiting_book_id_queue_number', 'book_id', 'queue_number',
+            postgresql_where=db.text("status = 'waiting'"),
+            sqlite_where=db.text("status = 'waiting'")
+        ),
+    )
 
 class Fees(db.Model):
     __tablename__ = 'fees'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     date = db.Column(db.Date, nullable=False)
     amount = db.Column(db.Float, nullable=False)
     reason = db.Column(db.String(200), nullable=False)
+    paid = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class BookRating(db.Model):
+    __tablename__ = 'book_ratings'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id'), nullable=False, index=True)
+    rating = db.Column(db.Float, nullable=False)
+    review = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('user_id', 'book_id'),)
+
+class BookRecommendation(db.Model):
+    __tablename__ = 'book_recommendations'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id'), nullable=False, index=True)
+    recommended_book_id = db.Column(db.Integer, db.ForeignKey('books.id'), nullable=False, index=True)
+    score = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    recommended_book = db.relationship('Book', foreign_keys=[recommended_book_id])
+
+# Per-user counters for the profile and dashboard, kept current by the
+# borrow/return/fee/rating paths and rebuilt by scripts/rebuild_user_stats.py
+class UserStats(db.Model):
+    __tablename__ = 'user_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True, autoincrement=False)
+    total_loans = db.Column(db.Integer, nullable=False, default=0)
+    open_loans = db.Column(db.Integer, nullable=False, default=0)
+    overdue_loans = db.Column(db.Integer, nullable=False, default=0)
+    unpaid_fines = db.Column(db.Float, nullable=False, default=0.0)
+    ratings_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+# Server-side web sessions (SESSION_BACKEND=sql); expired rows are swept in batches
+class WebSession(db.Model):
+    __tablename__ = 'web_sessions'
+    
+    session_id = db.Column(db.String(255), primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    expiry = db.Column(db.DateTime, nullable=False, index=True)
+
+# Append-only log of circulation and catalog changes, written in the same
+# transaction as the change itself (transactional outbox)
+class Event(db.Model):
+    __tablename__ = 'events'
+    
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    event_type = db.Column(db.String(50), nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    book_id = db.Column(db.Integer, nullable=True)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+# How far each downstream consumer has read the events log
+class EventConsumer(db.Model):
+    __tablename__ = 'event_consumers'
+    
+    name = db.Column(db.String(100), primary_key=True)
+    last_event_id = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Bulk student imports started from the admin API; any worker can report on one
+class ProvisioningJob(db.Model):
+    __tablename__ = 'provisioning_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    # running -> finished, or failed
+    status = db.Column(db.String(20), nullable=False, default='running')
+    total = db.Column(db.Integer, nullable=False, default=0)
+    done = db.Column(db.Integer, nullable=False, default=0)
+    created = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.JSON, nullable=False, default=list)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,9 +1,13 @@
-from flask import Blueprint, request, jsonify
+import os
+from flask import Blueprint, request, jsonify, send_from_directory, current_app
 from src.app_factory import db
-from src.models import User, Book, BorrowRecord, Fees
+from src.models import User, Book, Fees
 from datetime import datetime, timedelta
-from sqlalchemy import func
-from src.routes.auth import verify_token
+from sqlalchemy import case, func, select
+from src.routes.auth import publish_permissions_version, require_admin, verify_token
+from src.utils.events import BOOK_CREATED, acknowledge, read_events, record_event, serialize_event
+from src.utils.partitioning import all_borrow_records
+from src.utils.provisioning import provisioning_jobs
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -17,12 +21,6 @@ def get_admin_stats():
         # Total books
         total_books = Book.query.count()
         
-        # Total borrowed books
-        total_borrowed = BorrowRecord.query.filter_by(status='borrowed').count()
-        
-        # Total returned books
-        total_returned = BorrowRecord.query.filter_by(status='returned').count()
-        
         # Total fees
         total_fees = db.session.query(func.sum(Fees.amount)).filter_by(paid=False).scalar() or 0
         
@@ -30,8 +28,13 @@ def get_admin_stats():
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
         recent_users = User.query.filter(User.created_at >= thirty_days_ago).count()
         
-        # Recent borrowings (last 30 days)
-        recent_borrowings = BorrowRecord.query.filter(BorrowRecord.borrow_date >= thirty_days_ago).count()
+        # Borrowed, returned and recent (last 30 days) loans, archived ones included
+        loans = all_borrow_records()
+        total_borrowed, total_returned, recent_borrowings = db.session.execute(select(
+            func.coalesce(func.sum(case((loans.c.status == 'borrowed', 1), else_=0)), 0),
+            func.coalesce(func.sum(case((loans.c.status == 'returned', 1), else_=0)), 0),
+            func.coalesce(func.sum(case((loans.c.borrow_date >= thirty_days_ago.date(), 1), else_=0)), 0)
+        )).one()
         
         return jsonify({
             'total_users': total_users,
@@ -57,30 +60,27 @@ def get_admin_forecast():
         # Predict borrowing trends based on historical data
         # This is a simplified forecast - in a real application, you would use ML models
         
-        # Get borrowing data for the past 30 days
-        thirty_days_ago = today - timedelta(days=30)
-        recent_borrowings = BorrowRecord.query.filter(
-            BorrowRecord.borrow_date >= thirty_days_ago
-        ).all()
+        # Get borrowing data for the past 30 days, archived loans included
+        thirty_days_ago = (today - timedelta(days=30)).date()
+        loans = all_borrow_records()
         
         # Calculate average daily borrowings
-        daily_borrowings = {}
-        for record in recent_borrowings:
-            date_key = record.borrow_date.date()
-            if date_key in daily_borrowings:
-                daily_borrowings[date_key] += 1
-            else:
-                daily_borrowings[date_key] = 1
+        daily_borrowings = db.session.execute(
+            select(loans.c.borrow_date, func.count())
+            .where(loans.c.borrow_date >= thirty_days_ago)
+            .group_by(loans.c.borrow_date)
+        ).all()
         
-        avg_daily_borrowings = sum(daily_borrowings.values()) / len(daily_borrowings) if daily_borrowings else 0
+        avg_daily_borrowings = sum(count for _, count in daily_borrowings) / len(daily_borrowings) if daily_borrowings else 0
         
         # Get popular genres
-        genre_counts = db.session.query(
-            Book.genre, func.count(BorrowRecord.id)
-        ).join(Book, BorrowRecord.book_id == Book.id)\
-         .filter(BorrowRecord.borrow_date >= thirty_days_ago)\
-         .group_by(Book.genre)\
-         .all()
+        genre_counts = db.session.execute(
+            select(Book.genre, func.count())
+            .select_from(loans)
+            .join(Book, loans.c.book_id == Book.id)
+            .where(loans.c.borrow_date >= thirty_days_ago)
+            .group_by(Book.genre)
+        ).all()
         
         popular_genres = [{'genre': genre, 'count': count} for genre, count in genre_counts]
         
@@ -126,18 +126,6 @@ def get_all_books():
 @admin_bp.route('/admin/books', methods=['POST'])
 def add_book():
     """Add a new book"""
-
-@admin_bp.route('/admin/fine-calculation', methods=['GET'])
-def fine_calculation():
-    """Protected fine calculation page"""
-    user, error_response = verify_token(request)
-    if error_response:
-        return error_response
-    
-    if user['role'] != 'admin':
-        return jsonify({'error': 'Forbidden: Admin access required'}), 403
-        
-    return send_from_directory('public', 'fine_calculation.html')
     try:
         data = request.get_json()
         
@@ -165,6 +153,8 @@ def fine_calculation():
         )
         
         db.session.add(new_book)
+        db.session.flush()
+        record_event(BOOK_CREATED, book_id=new_book.id, title=new_book.title, stock=new_book.stock)
         db.session.commit()
         
         return jsonify({
@@ -175,3 +165,203 @@ def fine_calculation():
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/admin/fine-calculation', methods=['GET'])
+def fine_calculation():
+    """Protected fine calculation page"""
+    user, error_response = verify_token(request)
+    if error_response:
+        return error_response
+    
+    if user['role'] != 'admin':
+        return jsonify({'error': 'Forbidden: Admin access required'}), 403
+        
+    return send_from_directory('public', 'fine_calculation.html')
+
+@admin_bp.route('/admin/events', methods=['GET'])
+def get_events():
+    """Read the next batch of events after a consumer's checkpoint"""
+    user, error_response = require_admin(request)
+    if error_response:
+        return error_response
+    
+    consumer = request.args.get('consumer')
+    if not consumer:
+        return jsonify({'error': 'consumer is required'}), 400
+    
+    limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+    types = request.args.get('types', '')
+    event_types = [t for t in types.split(',') if t] or None
+    
+    events = read_events(consumer, batch_size=limit, event_types=event_types)
+    
+    return jsonify({
+        'consumer': consumer,
+        'events': [serialize_event(event) for event in events]
+    }), 200
+
+@admin_bp.route('/admin/events/ack', methods=['POST'])
+def acknowledge_events():
+    """Advance a consumer's checkpoint after it has processed a batch"""
+    user, error_response = require_admin(request)
+    if error_response:
+        return error_response
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'consumer and last_event_id are required'}), 400
+    
+    consumer = data.get('consumer')
+    last_event_id = data.get('last_event_id')
+    if not isinstance(consumer, str) or not consumer:
+        return jsonify({'error': 'consumer and last_event_id are required'}), 400
+    if type(last_event_id) is not int or last_event_id < 0:
+        return jsonify({'error': 'last_event_id must be a non-negative integer'}), 400
+    
+    last_event_id = acknowledge(consumer, last_event_id)
+    
+    return jsonify({
+        'consumer': consumer,
+        'last_event_id': last_event_id
+    }), 200
+
+@admin_bp.route('/admin/rate-limits', methods=['GET'])
+def get_rate_limit_counters():
+    """Allowed and rejected request counts for the rate-limited endpoints"""
+    user, error_response = require_admin(request)
+    if error_response:
+        return error_response
+    
+    return jsonify(current_app.extensions['rate_limiter'].snapshot()), 200
+
+@admin_bp.route('/admin/db-pool', methods=['GET'])
+def get_db_pool_metrics():
+    """Live connection pool occupancy and checkout wait times for this worker"""
+    user, error_response = require_admin(request)
+    if error_response:
+        return error_response
+    
+    metrics = current_app.extensions['pool_metrics']
+    return jsonify(metrics.snapshot(db.engine.pool)), 200
+
+@admin_bp.route('/admin/db-sqlite', methods=['GET'])
+def get_db_sqlite():
+    """SQLite pragmas in effect and the last background checkpoint/optimize run of this worker"""
+    user, error_response = require_admin(request)
+    if error_response:
+        return error_response
+    
+    profile = current_app.extensions.get('sqlite_profile')
+    maintenance = current_app.extensions.get('sqlite_maintenance')
+    return jsonify({
+        'enabled': profile is not None,
+        'pragmas': profile.snapshot(db.engine) if profile else None,
+        'maintenance': maintenance.snapshot() if maintenance else None
+    }), 200
+
+@admin_bp.route('/admin/memory', methods=['GET'])
+def get_memory():
+    """RSS/PSS/USS of this worker; USS is the memory it does not share with the master"""
+    user, error_response = require_admin(request)
+    if error_response:
+        return error_response
+    
+    from src.utils.memory import process_memory
+    return jsonify({
+        'pid': os.getpid(),
+        'master_pid': os.getppid(),
+        'memory_kb': process_memory()
+    }), 200
+
+@admin_bp.route('/admin/db-replicas', methods=['GET'])
+def get_db_replicas():
+    """Health and replication lag of the read replicas, as last checked by this worker"""
+    user, error_response = require_admin(request)
+    if error_response:
+        return error_response
+    
+    replicas = current_app.extensions.get('replicas')
+    return jsonify({
+        'enabled': replicas is not None,
+        'max_lag_seconds': replicas.max_lag_seconds if replicas else None,
+        'replicas': replicas.snapshot() if replicas else []
+    }), 200
+
+@admin_bp.route('/admin/slow-queries', methods=['GET'])
+def get_slow_queries():
+    """Recent statements slower than SLOW_QUERY_MS in this worker, newest first, with query plans"""
+    user, error_response = require_admin(request)
+    if error_response:
+        return error_response
+    
+    log = current_app.extensions.get('slow_query_log')
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    return jsonify({
+        'enabled': log is not None,
+        'threshold_ms': log.threshold_ms if log else None,
+        'queries': log.snapshot(limit) if log else []
+    }), 200
+
+@admin_bp.route('/admin/users/import', methods=['POST'])
+def import_students():
+    """Start a bulk student import from a CSV roster"""
+    user, error_response = require_admin(request)
+    if error_response:
+        return error_response
+    
+    upload = request.files.get('roster')
+    roster = upload.read() if upload else request.get_data()
+    if not roster:
+        return jsonify({'error': 'A CSV roster is required'}), 400
+    
+    try:
+        job_id = provisioning_jobs.start(
+            current_app._get_current_object(),
+            roster,
+            batch_size=request.args.get('batch_size', 1000, type=int),
+            processes=request.args.get('processes', type=int)
+        )
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'job_id': job_id, 'status_url': f'/api/admin/admin/users/import/{job_id}'}), 202
+
+@admin_bp.route('/admin/users/import/<job_id>', methods=['GET'])
+def get_import_status(job_id):
+    """Progress and per-row errors of a bulk student import"""
+    user, error_response = require_admin(request)
+    if error_response:
+        return error_response
+    
+    job = provisioning_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Import not found'}), 404
+    
+    return jsonify(job), 200
+
+@admin_bp.route('/admin/users/<int:user_id>/role', methods=['PUT'])
+def update_user_role(user_id):
+    """Change a user's role and invalidate their outstanding tokens"""
+    admin, error_response = require_admin(request)
+    if error_response:
+        return error_response
+    
+    data = request.get_json(silent=True) or {}
+    role = data.get('role')
+    if not isinstance(role, str) or not role:
+        return jsonify({'error': 'Role is required'}), 400
+    
+    user = db.session.get(User, user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    user.role = role
+    user.permissions_version = (user.permissions_version or 0) + 1
+    db.session.commit()
+    publish_permissions_version(user)
+    
+    return jsonify({
+        'id': user.id,
+        'role': user.role,
+        'permissions_version': user.permissions_version
+    }), 200
@@ -1,9 +1,10 @@
-from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, request, jsonify, g
 from src.models import User
 from src.app_factory import db
+from src.utils.token_auth import (
+    TokenRevoked, access_token_lifetime, authenticate_request, bearer_token, get_token_verifier, issue_token_pair
+)
 import jwt
-from datetime import datetime, timedelta
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -40,18 +41,118 @@ def login():
     if not user or not user.check_password(data['password']):
         return jsonify({'message': 'Invalid credentials'}), 401
     
-    token = jwt.encode({
-        'user_id': user.id,
+    # check_password may have upgraded an outdated hash
+    if db.session.is_modified(user):
+        db.session.commit()
+    
+    tokens = issue_token_pair(user)
+    tokens['user'] = {
+        'id': user.id,
         'username': user.username,
-        'role': user.role,
-        'exp': datetime.utcnow() + timedelta(hours=24)
-    }, 'your-secret-key', algorithm='HS256')
-    
-    return jsonify({
-        'access_token': token,
-        'user': {
-            'id': user.id,
-            'username': user.username,
-            'role': user.role
-        }
-    }), 200
+        'name': user.fullname,
+        'role': user.role
+    }
+    
+    return jsonify(tokens), 200
+
+@auth_bp.route('/refresh', methods=['POST'])
+def refresh():
+    """Exchange a refresh token for a new access/refresh pair"""
+    data = request.get_json(silent=True) or {}
+    token = data.get('refresh_token')
+    if not token:
+        return jsonify({'error': 'Missing refresh token'}), 400
+    
+    verifier = get_token_verifier()
+    try:
+        claims = verifier.decode(token)
+    except jwt.ExpiredSignatureError:
+        return jsonify({'error': 'Refresh token expired'}), 401
+    except TokenRevoked:
+        # Already rotated or logged out: whoever presents it again holds a copy
+        end_refresh_family(jwt.decode(token, verifier.secret, algorithms=['HS256'], options={'verify_exp': False}))
+        return jsonify({'error': 'Invalid refresh token'}), 401
+    except jwt.InvalidTokenError:
+        return jsonify({'error': 'Invalid refresh token'}), 401
+    
+    if claims.get('type') != 'refresh':
+        return jsonify({'error': 'Invalid refresh token'}), 401
+    
+    # The only authenticated path that reads users: picks up role changes
+    user = db.session.get(User, claims['user_id'])
+    if not user or claims.get('pv', 0) < user.permissions_version:
+        return jsonify({'error': 'Invalid refresh token'}), 401
+    
+    # Rotation: each refresh token can be used once, on any worker sharing the
+    # revocation store; losing the race to a concurrent refresh counts as reuse
+    if not verifier.revoke(token, expires_at=claims['exp']):
+        end_refresh_family(claims)
+        return jsonify({'error': 'Invalid refresh token'}), 401
+    
+    return jsonify(issue_token_pair(user)), 200
+
+def end_refresh_family(claims):
+    """Invalidate every token of the user a reused refresh token belongs to.
+
+    Bumping the permissions version rejects the access and refresh tokens
+    issued from it so far, both the attacker's and the user's; the user
+    signs in again. A token from before an earlier bump changes nothing.
+    """
+    if claims.get('type') != 'refresh':
+        return
+    
+    user = db.session.get(User, claims.get('user_id'))
+    if not user or claims.get('pv', 0) < user.permissions_version:
+        return
+    
+    user.permissions_version = user.permissions_version + 1
+    db.session.commit()
+    publish_permissions_version(user)
+
+
+def verify_token(request):
+    """Return the claims of the request's bearer token if valid.
+
+    Tokens are decoded once per request by the authentication middleware,
+    which caches verified claims and checks the revocation list in memory.
+    """
+    if 'auth_error' not in g:
+        authenticate_request()
+    
+    if g.current_user is None:
+        return None, (jsonify({'error': g.auth_error}), 401)
+    
+    return g.current_user, None
+
+def publish_permissions_version(user):
+    """Reject a user's older tokens on every worker; call after committing the bump"""
+    get_token_verifier().bump_permissions_version(
+        user.id, user.permissions_version, access_token_lifetime()
+    )
+
+def require_admin(request):
+    """Like verify_token, but also reject tokens without the admin role"""
+    user, error_response = verify_token(request)
+    if error_response:
+        return None, error_response
+    
+    if user['role'] != 'admin':
+        return None, (jsonify({'error': 'Forbidden: Admin access required'}), 403)
+    
+    return user, None
+
+@auth_bp.route('/logout', methods=['POST'])
+def logout():
+    """Revoke the presented token on every worker"""
+    user, error_response = verify_token(request)
+    if error_response:
+        return error_response
+    
+    verifier = get_token_verifier()
+    verifier.revoke(bearer_token(request), expires_at=user.get('exp'))
+    
+    data = request.get_json(silent=True) or {}
+    if data.get('refresh_token'):
+        verifier.revoke(data['refresh_token'])
+    
+    return jsonify({'message': 'Logout successful'}), 200
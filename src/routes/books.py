@@ -1,23 +1,46 @@
 from flask import Blueprint, request, jsonify
 from src.app_factory import db
 from src.models import Book, BookRating, BookRecommendation
-from sqlalchemy import or_, desc
+from src.routes.auth import verify_token
+from src.utils.events import BOOK_RATED, record_event
+from src.utils.user_stats import apply_user_stats
+from src.utils.async_routes import AsyncRoutes, paginate
+from sqlalchemy import desc, or_, select
 
 books_bp = Blueprint('books', __name__)
 
-@books_bp.route('/', methods=['GET'])
-def get_books():
-    """Get all books with optional filtering and pagination"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
-    search = request.args.get('search', '')
-    genre = request.args.get('genre', '')
-    author = request.args.get('author', '')
+# Async versions of the catalog reads, served by src/asgi.py
+books_async = AsyncRoutes('books')
+
+def _serialize_book(book):
+    return {
+        'id': book.id,
+        'isbn': book.isbn,
+        'title': book.title,
+        'author': book.author,
+        'publisher': book.publisher,
+        'year': book.year,
+        'genre': book.genre,
+        'pages': book.pages,
+        'language': book.language,
+        'cover_image': book.cover_image,
+        'description': book.description,
+        'average_rating': book.average_rating,
+        'ratings_count': book.ratings_count,
+        'stock': book.stock,
+        'created_at': book.created_at.isoformat()
+    }
+
+def _books_statement(args):
+    """The catalog search behind GET /, shared by the sync and async views"""
+    search = args.get('search', '')
+    genre = args.get('genre', '')
+    author = args.get('author', '')
     
-    query = Book.query
+    statement = select(Book)
     
     if search:
-        query = query.filter(
+        statement = statement.where(
             or_(
                 Book.title.contains(search),
                 Book.author.contains(search),
@@ -26,31 +49,66 @@ def get_books():
         )
     
     if genre:
-        query = query.filter(Book.genre == genre)
+        statement = statement.where(Book.genre == genre)
     
     if author:
-        query = query.filter(Book.author.contains(author))
+        statement = statement.where(Book.author.contains(author))
+    
+    return statement
+
+def _top_rated_statement(limit):
+    return select(Book).where(
+        Book.average_rating.isnot(None),
+        Book.ratings_count > 0
+    ).order_by(desc(Book.average_rating)).limit(limit)
+
+def _serialize_top_rated(book):
+    return {
+        'id': book.id,
+        'title': book.title,
+        'author': book.author,
+        'average_rating': book.average_rating,
+        'ratings_count': book.ratings_count,
+        'cover_image': book.cover_image
+    }
+
+GENRES_STATEMENT = select(Book.genre).distinct().where(Book.genre.isnot(None))
+
+def _recommendations_statement(book_id):
+    # Only the columns the response needs, so no per-row load of the recommended book
+    return select(
+        BookRecommendation.score,
+        Book.id,
+        Book.title,
+        Book.author,
+        Book.average_rating,
+        Book.cover_image
+    ).join(Book, BookRecommendation.recommended_book_id == Book.id)\
+     .where(BookRecommendation.book_id == book_id)\
+     .order_by(desc(BookRecommendation.score)).limit(10)
+
+def _serialize_recommendation(row):
+    return {
+        'book': {
+            'id': row.id,
+            'title': row.title,
+            'author': row.author,
+            'average_rating': row.average_rating,
+            'cover_image': row.cover_image
+        },
+        'score': row.score
+    }
+
+@books_bp.route('/', methods=['GET'])
+def get_books():
+    """Get all books with optional filtering and pagination"""
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
     
-    books = query.paginate(page=page, per_page=per_page, error_out=False)
+    books = db.paginate(_books_statement(request.args), page=page, per_page=per_page, error_out=False)
     
     return jsonify({
-        'books': [{
-            'id': book.id,
-            'isbn': book.isbn,
-            'title': book.title,
-            'author': book.author,
-            'publisher': book.publisher,
-            'year': book.year,
-            'genre': book.genre,
-            'pages': book.pages,
-            'language': book.language,
-            'cover_image': book.cover_image,
-            'description': book.description,
-            'average_rating': book.average_rating,
-            'ratings_count': book.ratings_count,
-            'stock': book.stock,
-            'created_at': book.created_at.isoformat()
-        } for book in books.items],
+        'books': [_serialize_book(book) for book in books.items],
         'total': books.total,
         'pages': books.pages,
         'current_page': page
@@ -61,69 +119,37 @@ def get_book(book_id):
     """Get a specific book by ID"""
     book = Book.query.get_or_404(book_id)
     
-    return jsonify({
-        'id': book.id,
-        'isbn': book.isbn,
-        'title': book.title,
-        'author': book.author,
-        'publisher': book.publisher,
-        'year': book.year,
-        'genre': book.book_genre,
-        'pages': book.pages,
-        'language': book.language,
-        'cover_image': book.cover_image,
-        'description': book.description,
-        'average_rating': book.average_rating,
-        'ratings_count': book.ratings_count,
-        'stock': book.stock,
-        'created_at': book.created_at.isoformat()
-    })
+    return jsonify(_serialize_book(book))
 
 @books_bp.route('/genres', methods=['GET'])
 def get_genres():
     """Get all unique genres"""
-    genres = db.session.query(Book.genre).distinct().filter(Book.genre != None).all()
-    return jsonify([genre[0] for genre in genres if genre[0]])
+    genres = db.session.execute(GENRES_STATEMENT).scalars()
+    return jsonify([genre for genre in genres if genre])
 
 @books_bp.route('/top-rated', methods=['GET'])
 def get_top_rated_books():
     """Get top rated books"""
     limit = request.args.get('limit', 10, type=int)
-    books = Book.query.filter(
-        Book.average_rating.isnot(None),
-        Book.ratings_count > 0
-    ).order_by(desc(Book.average_rating)).limit(limit).all()
+    books = db.session.execute(_top_rated_statement(limit)).scalars()
     
-    return jsonify([{
-        'id': book.id,
-        'title': book.title,
-        'author': book.author,
-        'average_rating': book.average_rating,
-        'ratings_count': book.ratings_count,
-        'cover_image': book.cover_image
-    } for book in books])
+    return jsonify([_serialize_top_rated(book) for book in books])
 
 @books_bp.route('/<int:book_id>/recommendations', methods=['GET'])
 def get_book_recommendations(book_id):
     """Get book recommendations based on a specific book"""
-    recommendations = BookRecommendation.query.filter_by(book_id=book_id)\
-        .join(Book, BookRecommendation.recommended_book_id == Book.id)\
-        .order_by(desc(BookRecommendation.score)).limit(10).all()
+    recommendations = db.session.execute(_recommendations_statement(book_id))
     
-    return jsonify([{
-        'book': {
-            'id': rec.recommended_book.id,
-            'title': rec.recommended_book.title,
-            'author': rec.recommended_book.author,
-            'average_rating': rec.recommended_book.average_rating,
-            'cover_image': rec.recommended_book.cover_image
-        },
-        'score': rec.score
-    } for rec in recommendations])
+    return jsonify([_serialize_recommendation(row) for row in recommendations])
 
 @books_bp.route('/<int:book_id>/ratings', methods=['POST'])
 def add_book_rating(book_id):
-    """Add a rating for a book"""
+    """Add or update the signed-in user's rating for a book"""
+    claims, error_response = verify_token(request)
+    if error_response:
+        return error_response
+    
+    user_id = claims['user_id']
     data = request.get_json()
     
     if not data or 'rating' not in data:
@@ -137,7 +163,7 @@ def add_book_rating(book_id):
     
     # Check if user already rated this book
     existing_rating = BookRating.query.filter_by(
-        user_id=1,  # For demo purposes, using user_id=1
+        user_id=user_id,
         book_id=book_id
     ).first()
     
@@ -146,22 +172,26 @@ def add_book_rating(book_id):
         existing_rating.review = review
     else:
         new_rating = BookRating(
-            user_id=1,  # For demo purposes
+            user_id=user_id,
             book_id=book_id,
             rating=rating,
             review=review
         )
         db.session.add(new_rating)
     
-    db.session.commit()
+    db.session.flush()
     
-    # Update book average rating
+    # Update book average rating in the same transaction as the rating
     book = Book.query.get(book_id)
     ratings = BookRating.query.filter_by(book_id=book_id).all()
     if ratings:
         book.average_rating = sum(r.rating for r in ratings) / len(ratings)
         book.ratings_count = len(ratings)
-        db.session.commit()
+    
+    record_event(BOOK_RATED, user_id=user_id, book_id=book_id, rating=rating, updated=bool(existing_rating))
+    if not existing_rating:
+        apply_user_stats(user_id, ratings_count=1)
+    db.session.commit()
     
     return jsonify({'message': 'Rating added successfully'})
 
@@ -175,3 +205,49 @@ def import_book_dataset():
         return jsonify({'message': f'Successfully imported {count} books'}), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+@books_async.get('/')
+async def get_books_async(request, session):
+    """Async version of get_books"""
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    
+    books, total, pages = await paginate(session, _books_statement(request.args), page, per_page)
+    
+    return {
+        'books': [_serialize_book(book) for book in books],
+        'total': total,
+        'pages': pages,
+        'current_page': page
+    }
+
+@books_async.get('/<int:book_id>')
+async def get_book_async(request, session, book_id):
+    """Async version of get_book"""
+    book = await session.get(Book, book_id)
+    if book is None:
+        return {'error': 'Book not found'}, 404
+    
+    return _serialize_book(book)
+
+@books_async.get('/genres')
+async def get_genres_async(request, session):
+    """Async version of get_genres"""
+    genres = (await session.execute(GENRES_STATEMENT)).scalars()
+    return [genre for genre in genres if genre]
+
+@books_async.get('/top-rated')
+async def get_top_rated_books_async(request, session):
+    """Async version of get_top_rated_books"""
+    limit = request.args.get('limit', 10, type=int)
+    books = (await session.execute(_top_rated_statement(limit))).scalars()
+    
+    return [_serialize_top_rated(book) for book in books]
+
+@books_async.get('/<int:book_id>/recommendations')
+async def get_book_recommendations_async(request, session, book_id):
+    """Async version of get_book_recommendations"""
+    recommendations = await session.execute(_recommendations_statement(book_id))
+    
+    return [_serialize_recommendation(row) for row in recommendations]
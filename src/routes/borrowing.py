@@ -1,30 +1,329 @@
 from flask import Blueprint, request, jsonify
 from src.app_factory import db
-from src.models import BorrowRecord, Book, User
-from datetime import datetime, timedelta
+from src.models import BorrowRecord, BorrowRecordArchive, Book, Fees, Hold, User, UserStats
+from src.routes.auth import verify_token
+from src.utils.cache import TTLCache
+from src.utils.events import (
+    BOOK_BORROWED, BOOK_RETURNED, HOLD_CANCELLED, HOLD_PLACED, record_event
+)
+from src.utils.holds import (
+    ACTIVE_HOLD_STATUSES, allocate_returned_copy, claim_ready_hold, leave_queue, next_queue_number,
+    queue_position
+)
+from src.utils.async_routes import AsyncRoutes
+from src.utils.pagination import decode_cursor, encode_cursor, get_page_size
+from src.utils.partitioning import all_borrow_records
+from src.utils.user_stats import apply_user_stats
+from sqlalchemy import and_, case, desc, func, or_, select, union_all
+from datetime import date, datetime, timedelta
 
 borrowing_bp = Blueprint('borrowing', __name__)
 
-@borrowing_bp.route('/', methods=['GET'])
-def get_borrow_records():
-    """Get all borrow records"""
-    records = BorrowRecord.query.all()
-    return jsonify([{
-        'id': record.id,
+# Async versions of the listing and history reads, served by src/asgi.py
+borrowing_async = AsyncRoutes('borrowing')
+
+# Per-user history summaries, each kept with the user_stats.updated_at it was
+# computed under. Every borrow and return moves that stamp in its own
+# transaction, so a summary cached by any worker is recomputed once it is stale.
+history_summary_cache = TTLCache(maxsize=10000, ttl=300)
+
+def _parse_date(value):
+    """Parse an ISO date query argument, returning None when absent"""
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def _after_cursor(statement, cursor, table=BorrowRecord):
+    """Restrict a (borrow_date DESC, id DESC) ordered statement on table to rows after cursor.
+
+    Raises ValueError unless the cursor holds an ISO date and an integer id,
+    as encode_cursor writes them.
+    """
+    last_date, last_id = decode_cursor(cursor)
+    if not isinstance(last_date, str) or not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise ValueError('Invalid cursor')
+    last_date = _parse_date(last_date)
+    if last_date is None:
+        raise ValueError('Invalid cursor')
+    return statement.where(or_(
+        table.borrow_date < last_date,
+        and_(table.borrow_date == last_date, table.id < last_id)
+    ))
+
+def _page_statement(statement, limit):
+    """One page newest first, plus one row to tell whether another page follows"""
+    return statement.order_by(desc(BorrowRecord.borrow_date), desc(BorrowRecord.id))\
+        .limit(limit + 1)
+
+def _page_result(rows, limit):
+    """Trim a fetched page to limit rows, returning the rows and the next cursor"""
+    rows = list(rows)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].borrow_date, rows[-1].id])
+    
+    return rows, next_cursor
+
+def _history_summary_version(user_id):
+    """The user_stats stamp a cached history summary is checked against"""
+    return select(UserStats.updated_at).where(UserStats.user_id == user_id)
+
+def _cached_history_summary(user_id, version):
+    """The cached summary for user_id if it was computed under version, else None"""
+    cached = history_summary_cache.get(user_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    return None
+
+def _history_summary_statements(user_id):
+    """The four aggregates behind a history summary, in _build_history_summary order"""
+    loans = select(
+        func.count(BorrowRecord.id),
+        func.coalesce(func.sum(case((BorrowRecord.return_date.is_(None), 1), else_=0)), 0)
+    ).where(BorrowRecord.user_id == user_id)
+    
+    # Closed loans moved to the archive still count towards the patron's history
+    archived_loans = select(func.count(BorrowRecordArchive.id))\
+        .where(BorrowRecordArchive.user_id == user_id)
+    
+    outstanding_fines = select(func.coalesce(func.sum(Fees.amount), 0.0))\
+        .where(Fees.user_id == user_id, Fees.paid == False)  # noqa: E712
+    
+    history = all_borrow_records()
+    genre_counts = select(Book.genre, func.count().label('loans'))\
+        .select_from(history)\
+        .join(Book, history.c.book_id == Book.id)\
+        .where(history.c.user_id == user_id, Book.genre.isnot(None))\
+        .group_by(Book.genre)\
+        .order_by(desc('loans'), Book.genre)\
+        .limit(3)
+    
+    return loans, archived_loans, outstanding_fines, genre_counts
+
+def _build_history_summary(loans, archived_loans, outstanding_fines, genre_counts):
+    total_loans, open_loans = loans
+    return {
+        'total_loans': total_loans + archived_loans,
+        'open_loans': int(open_loans),
+        'archived_loans': archived_loans,
+        'outstanding_fines': float(outstanding_fines),
+        'favourite_genres': [genre for genre, _ in genre_counts]
+    }
+
+def get_history_summary(user_id):
+    """Return the loan and fine summary for a user, computing it on a cache miss"""
+    version = db.session.execute(_history_summary_version(user_id)).scalar()
+    summary = _cached_history_summary(user_id, version)
+    if summary is not None:
+        return summary
+    
+    loans, archived_loans, outstanding_fines, genre_counts = _history_summary_statements(user_id)
+    summary = _build_history_summary(
+        db.session.execute(loans).one(),
+        db.session.execute(archived_loans).scalar(),
+        db.session.execute(outstanding_fines).scalar(),
+        db.session.execute(genre_counts).all()
+    )
+    history_summary_cache.set(user_id, (version, summary))
+    return summary
+
+async def get_history_summary_async(session, user_id):
+    """Async version of get_history_summary, sharing its cache"""
+    version = (await session.execute(_history_summary_version(user_id))).scalar()
+    summary = _cached_history_summary(user_id, version)
+    if summary is not None:
+        return summary
+    
+    loans, archived_loans, outstanding_fines, genre_counts = _history_summary_statements(user_id)
+    summary = _build_history_summary(
+        (await session.execute(loans)).one(),
+        (await session.execute(archived_loans)).scalar(),
+        (await session.execute(outstanding_fines)).scalar(),
+        (await session.execute(genre_counts)).all()
+    )
+    history_summary_cache.set(user_id, (version, summary))
+    return summary
+
+def _borrow_records_statement(args):
+    """The filtered listing behind GET /, as (statement, None) or (None, error message)"""
+    user_id = args.get('user_id', type=int)
+    book_id = args.get('book_id', type=int)
+    status = args.get('status', '')
+    cursor = args.get('cursor')
+    
+    try:
+        borrowed_from = _parse_date(args.get('from'))
+        borrowed_to = _parse_date(args.get('to'))
+    except ValueError:
+        return None, 'Dates must be in YYYY-MM-DD format'
+    
+    # Select only the columns the response needs, joined in a single query
+    statement = select(
+        BorrowRecord.id,
+        BorrowRecord.borrow_date,
+        BorrowRecord.due_date,
+        BorrowRecord.return_date,
+        BorrowRecord.status,
+        User.id.label('user_id'),
+        User.username,
+        Book.id.label('book_id'),
+        Book.title,
+        Book.author
+    ).join(User, BorrowRecord.user_id == User.id)\
+     .join(Book, BorrowRecord.book_id == Book.id)
+    
+    if user_id is not None:
+        statement = statement.where(BorrowRecord.user_id == user_id)
+    
+    if book_id is not None:
+        statement = statement.where(BorrowRecord.book_id == book_id)
+    
+    if status == 'overdue':
+        statement = statement.where(
+            BorrowRecord.return_date.is_(None),
+            BorrowRecord.due_date < date.today()
+        )
+    elif status:
+        statement = statement.where(BorrowRecord.status == status)
+    
+    if borrowed_from:
+        statement = statement.where(BorrowRecord.borrow_date >= borrowed_from)
+    
+    if borrowed_to:
+        statement = statement.where(BorrowRecord.borrow_date <= borrowed_to)
+    
+    # Keyset pagination on (borrow_date, id), newest first
+    if cursor:
+        try:
+            statement = _after_cursor(statement, cursor)
+        except (TypeError, ValueError):
+            return None, 'Invalid cursor'
+    
+    return statement, None
+
+def _serialize_record(row):
+    return {
+        'id': row.id,
         'user': {
-            'id': record.user.id,
-            'username': record.user.username
+            'id': row.user_id,
+            'username': row.username
         },
         'book': {
-            'id': record.book.id,
-            'title': record.book.title,
-            'author': record.book.author
+            'id': row.book_id,
+            'title': row.title,
+            'author': row.author
         },
-        'borrow_date': record.borrow_date.isoformat(),
-        'due_date': record.due_date.isoformat(),
-        'return_date': record.return_date.isoformat() if record.return_date else None,
-        'status': record.status
-    } for record in records])
+        'borrow_date': row.borrow_date.isoformat(),
+        'due_date': row.due_date.isoformat(),
+        'return_date': row.return_date.isoformat() if row.return_date else None,
+        'status': row.status
+    }
+
+def _history_user_id(claims, args):
+    """Admins may look at any patron's history; everyone else sees their own"""
+    if claims.get('role') == 'admin':
+        return args.get('user_id', claims['user_id'], type=int)
+    return claims['user_id']
+
+def _history_statement(user_id, cursor, limit):
+    """One page of a user's loans behind GET /history, as (statement, None) or (None, error message)
+
+    Archived loans are part of the history, as they are of its summary. Each
+    table is paged through its (user_id, borrow_date) index and only the two
+    pages are merged, rather than paging over all_borrow_records().
+    """
+    pages = []
+    for table in (BorrowRecord, BorrowRecordArchive):
+        page = select(
+            table.id,
+            table.book_id,
+            table.borrow_date,
+            table.due_date,
+            table.return_date,
+            table.status,
+            table.fine
+        ).where(table.user_id == user_id)
+        
+        if cursor:
+            try:
+                page = _after_cursor(page, cursor, table)
+            except (TypeError, ValueError):
+                return None, 'Invalid cursor'
+        
+        page = page.order_by(desc(table.borrow_date), desc(table.id)).limit(limit + 1)
+        pages.append(select(page.subquery()))
+    
+    history = union_all(*pages).subquery('history')
+    statement = select(
+        history.c.id,
+        history.c.borrow_date,
+        history.c.due_date,
+        history.c.return_date,
+        history.c.status,
+        history.c.fine,
+        Book.id.label('book_id'),
+        Book.title,
+        Book.author,
+        Book.genre
+    ).join(Book, history.c.book_id == Book.id)\
+     .order_by(desc(history.c.borrow_date), desc(history.c.id))\
+     .limit(limit + 1)
+    
+    return statement, None
+
+def _serialize_history_row(row):
+    return {
+        'id': row.id,
+        'book': {
+            'id': row.book_id,
+            'title': row.title,
+            'author': row.author,
+            'genre': row.genre
+        },
+        'borrow_date': row.borrow_date.isoformat(),
+        'due_date': row.due_date.isoformat(),
+        'return_date': row.return_date.isoformat() if row.return_date else None,
+        'status': row.status,
+        'fine': row.fine
+    }
+
+@borrowing_bp.route('/', methods=['GET'])
+def get_borrow_records():
+    """Get borrow records with optional filtering and keyset pagination"""
+    limit = get_page_size(request.args)
+    statement, error = _borrow_records_statement(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    rows, next_cursor = _page_result(db.session.execute(_page_statement(statement, limit)), limit)
+    
+    return jsonify({
+        'records': [_serialize_record(row) for row in rows],
+        'next_cursor': next_cursor
+    })
+
+@borrowing_bp.route('/history', methods=['GET'])
+def get_borrow_history():
+    """Get the signed-in user's borrowing history with a summary block"""
+    user, error_response = verify_token(request)
+    if error_response:
+        return error_response
+    
+    user_id = _history_user_id(user, request.args)
+    limit = get_page_size(request.args, default=20)
+    statement, error = _history_statement(user_id, request.args.get('cursor'), limit)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    rows, next_cursor = _page_result(db.session.execute(statement), limit)
+    
+    return jsonify({
+        'user_id': user_id,
+        'summary': get_history_summary(user_id),
+        'records': [_serialize_history_row(row) for row in rows],
+        'next_cursor': next_cursor
+    })
 
 @borrowing_bp.route('/', methods=['POST'])
 def create_borrow_record():
@@ -38,18 +337,37 @@ def create_borrow_record():
     if not book:
         return jsonify({'error': 'Book not found'}), 404
     
-    if book.stock <= 0:
-        return jsonify({'error': 'Book not available'}), 400
+    # A copy set aside for this patron's hold is already out of stock
+    hold = claim_ready_hold(data['user_id'], book.id)
+    if hold:
+        hold.status = 'fulfilled'
+    elif book.stock <= 0:
+        return jsonify({
+            'error': 'Book not available',
+            'hold_url': '/api/borrow/holds'
+        }), 400
+    else:
+        book.stock -= 1
     
+    today = date.today()
     borrow_record = BorrowRecord(
         user_id=data['user_id'],
         book_id=data['book_id'],
-        due_date=datetime.utcnow() + timedelta(days=14)
+        borrow_date=today,
+        due_date=today + timedelta(days=14)
     )
     
-    book.stock -= 1
-    
     db.session.add(borrow_record)
+    db.session.flush()
+    record_event(
+        BOOK_BORROWED,
+        user_id=borrow_record.user_id,
+        book_id=borrow_record.book_id,
+        record_id=borrow_record.id,
+        due_date=borrow_record.due_date.isoformat(),
+        hold_id=hold.id if hold else None
+    )
+    apply_user_stats(borrow_record.user_id, total_loans=1, open_loans=1)
     db.session.commit()
     
     return jsonify({
@@ -68,16 +386,135 @@ def return_book(record_id):
     if record.status == 'returned':
         return jsonify({'error': 'Book already returned'}), 400
     
-    record.return_date = datetime.utcnow()
+    record.return_date = date.today()
     record.status = 'returned'
     
+    # The copy goes to the head of the hold queue in the same transaction
     book = Book.query.get(record.book_id)
-    book.stock += 1
+    hold = allocate_returned_copy(book)
+    record_event(
+        BOOK_RETURNED,
+        user_id=record.user_id,
+        book_id=record.book_id,
+        record_id=record.id,
+        return_date=record.return_date.isoformat()
+    )
+    db.session.flush()
+    apply_user_stats(record.user_id, open_loans=-1, recount_overdue=True)
     
     db.session.commit()
     
     return jsonify({
         'id': record.id,
         'return_date': record.return_date.isoformat(),
-        'status': record.status
+        'status': record.status,
+        'allocated_hold_id': hold.id if hold else None
+    })
+
+@borrowing_bp.route('/holds', methods=['POST'])
+def place_hold():
+    """Join the hold queue for a book with no copies on the shelf"""
+    data = request.get_json()
+    
+    if not data or 'user_id' not in data or 'book_id' not in data:
+        return jsonify({'error': 'User ID and Book ID are required'}), 400
+    
+    # Locked so concurrent joins take consecutive queue numbers
+    book = db.session.get(Book, data['book_id'], with_for_update=True)
+    if not book:
+        return jsonify({'error': 'Book not found'}), 404
+    
+    if book.stock > 0:
+        return jsonify({'error': 'Book is available to borrow'}), 400
+    
+    existing_hold = Hold.query.filter(
+        Hold.user_id == data['user_id'],
+        Hold.book_id == book.id,
+        Hold.status.in_(ACTIVE_HOLD_STATUSES)
+    ).first()
+    if existing_hold:
+        return jsonify({'error': 'Hold already placed', 'hold_id': existing_hold.id}), 409
+    
+    hold = Hold(user_id=data['user_id'], book_id=book.id, queue_number=next_queue_number(book.id))
+    db.session.add(hold)
+    db.session.flush()
+    record_event(HOLD_PLACED, user_id=hold.user_id, book_id=hold.book_id, hold_id=hold.id)
+    db.session.commit()
+    
+    return jsonify({
+        'id': hold.id,
+        'book_id': hold.book_id,
+        'status': hold.status,
+        'position': queue_position(hold)
+    }), 201
+
+@borrowing_bp.route('/holds/<int:hold_id>/position', methods=['GET'])
+def get_hold_position(hold_id):
+    """Get a hold's place in its book's queue"""
+    hold = Hold.query.get_or_404(hold_id)
+    
+    return jsonify({
+        'id': hold.id,
+        'book_id': hold.book_id,
+        'status': hold.status,
+        'position': queue_position(hold),
+        'expires_at': hold.expires_at.isoformat() if hold.expires_at else None
     })
+
+@borrowing_bp.route('/holds/<int:hold_id>', methods=['DELETE'])
+def cancel_hold(hold_id):
+    """Cancel a hold, passing any copy set aside for it to the next patron"""
+    hold = Hold.query.get_or_404(hold_id)
+    
+    if hold.status not in ACTIVE_HOLD_STATUSES:
+        return jsonify({'error': f'Hold already {hold.status}'}), 400
+    
+    was_ready = hold.status == 'ready'
+    if not was_ready:
+        leave_queue(hold)
+    hold.status = 'cancelled'
+    record_event(HOLD_CANCELLED, user_id=hold.user_id, book_id=hold.book_id, hold_id=hold.id)
+    
+    if was_ready:
+        allocate_returned_copy(Book.query.get(hold.book_id))
+    
+    db.session.commit()
+    
+    return jsonify({'id': hold.id, 'status': hold.status})
+
+@borrowing_async.get('/')
+async def get_borrow_records_async(request, session):
+    """Async version of get_borrow_records"""
+    limit = get_page_size(request.args)
+    statement, error = _borrow_records_statement(request.args)
+    if error:
+        return {'error': error}, 400
+    
+    rows, next_cursor = _page_result(await session.execute(_page_statement(statement, limit)), limit)
+    
+    return {
+        'records': [_serialize_record(row) for row in rows],
+        'next_cursor': next_cursor
+    }
+
+@borrowing_async.get('/history')
+async def get_borrow_history_async(request, session):
+    """Async version of get_borrow_history"""
+    user, error_response = request.verify_token()
+    if error_response:
+        return error_response
+    
+    user_id = _history_user_id(user, request.args)
+    limit = get_page_size(request.args, default=20)
+    statement, error = _history_statement(user_id, request.args.get('cursor'), limit)
+    if error:
+        return {'error': error}, 400
+    
+    rows, next_cursor = _page_result(await session.execute(statement), limit)
+    
+    return {
+        'user_id': user_id,
+        'summary': await get_history_summary_async(session, user_id),
+        'records': [_serialize_history_row(row) for row in rows],
+        'next_cursor': next_cursor
+    }
@@ -1,20 +1,199 @@
 from flask import Blueprint, request, jsonify
 from src.app_factory import db
 from src.models import User
+from src.routes.auth import require_admin, verify_token
+from src.utils.async_routes import AsyncRoutes
+from src.utils.pagination import decode_cursor, encode_cursor, get_page_size
+from src.utils.user_stats import get_user_stats
+from sqlalchemy import func, literal_column, select
+from datetime import datetime
 
 users_bp = Blueprint('users', __name__)
 
+# Async version of the directory search, served by src/asgi.py
+users_async = AsyncRoutes('users')
+
+# Columns a client may request through ?fields=
+USER_FIELDS = {
+    'id': User.id,
+    'username': User.username,
+    'fullname': User.fullname,
+    'email': User.email,
+    'role': User.role,
+    'created_at': User.created_at
+}
+DEFAULT_USER_FIELDS = ('id', 'username', 'fullname', 'email', 'role', 'created_at')
+
+# Columns searched by ?q=, in the order their matches are listed
+SEARCH_COLUMNS = (User.username, User.email, User.fullname)
+
+# Comparisons the text_pattern_ops indexes on lower(column) can serve in
+# PostgreSQL; elsewhere (SQLite) plain comparisons already use C ordering
+_PATTERN_OPERATORS = {'>=': '~>=~', '>': '~>~', '<': '~<~'}
+
+def _compare(dialect_name, left, operator, right):
+    if dialect_name == 'postgresql':
+        return left.op(_PATTERN_OPERATORS[operator], is_comparison=True)(right)
+    return {'>=': left >= right, '>': left > right, '<': left < right}[operator]
+
+def _ascending(dialect_name, key):
+    """ORDER BY key in the order _compare uses, which the lower() indexes store"""
+    if dialect_name == 'postgresql':
+        return key.op('USING')(literal_column(_PATTERN_OPERATORS['<']))
+    return key
+
+def _prefix_match(dialect_name, key, prefix):
+    """key starts with prefix, as a range both SQLite and PostgreSQL can search an index for.
+
+    SQLite never uses an index on lower(column) for LIKE, so the prefix is
+    matched as prefix <= key < the next string after every prefix match.
+    """
+    condition = _compare(dialect_name, key, '>=', prefix)
+    following = ord(prefix[-1]) + 1
+    if 0xD800 <= following < 0xE000:
+        # Surrogates can't be encoded; the next character is U+E000
+        following = 0xE000
+    if following <= 0x10FFFF:
+        condition = condition & _compare(dialect_name, key, '<', prefix[:-1] + chr(following))
+    return condition
+
+def _serialize(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _search_cursor(cursor):
+    """Decode a search cursor into (column index, last key, last id), raising ValueError if malformed"""
+    column, key, last_id = decode_cursor(cursor)
+    if not (type(column) is int and 0 <= column < len(SEARCH_COLUMNS)
+            and isinstance(key, str) and type(last_id) is int):
+        raise ValueError('Invalid cursor')
+    return column, key, last_id
+
+def _users_statements(args, limit, dialect_name):
+    """The queries behind GET /, as (statements, fields, None) or (None, None, error message)
+
+    Without a search there is one query in id order. A search runs one query
+    per name column in SEARCH_COLUMNS, each ordered and keyset-paginated on
+    that column's lower() index so no page has to sort every match; a user is
+    listed under the first column that matches. Statements are
+    (column index or None, statement) pairs, to be read in order until a page
+    is full.
+    """
+    search = args.get('q', '').strip().lower()
+    role = args.get('role')
+    cursor = args.get('cursor')
+    
+    fields = args.get('fields')
+    fields = fields.split(',') if fields else list(DEFAULT_USER_FIELDS)
+    unknown = [field for field in fields if field not in USER_FIELDS]
+    if unknown:
+        return None, None, f"Unknown fields: {', '.join(unknown)}"
+    
+    # Select only the requested columns; id is always needed for the cursor
+    columns = [USER_FIELDS[field] for field in fields if field != 'id']
+    statement = select(User.id, *columns)
+    if role:
+        statement = statement.where(User.role == role)
+    
+    if not search:
+        # Keyset pagination on id
+        if cursor:
+            try:
+                last_id, = decode_cursor(cursor)
+                statement = statement.where(User.id > int(last_id))
+            except (TypeError, ValueError):
+                return None, None, 'Invalid cursor'
+        return [(None, statement.order_by(User.id).limit(limit + 1))], fields, None
+    
+    first, last_key, last_id = 0, None, None
+    if cursor:
+        try:
+            first, last_key, last_id = _search_cursor(cursor)
+        except (TypeError, ValueError):
+            return None, None, 'Invalid cursor'
+    
+    keys = [func.lower(column) for column in SEARCH_COLUMNS]
+    statements = []
+    for index in range(first, len(SEARCH_COLUMNS)):
+        key = keys[index]
+        matches = statement.add_columns(key.label('search_key')).where(
+            _prefix_match(dialect_name, key, search),
+            *[~_prefix_match(dialect_name, earlier, search) for earlier in keys[:index]]
+        )
+        if index == first and last_key is not None:
+            # Keyset pagination on (key, id); the first bound is the index condition
+            matches = matches.where(
+                _compare(dialect_name, key, '>=', last_key),
+                _compare(dialect_name, key, '>', last_key) | (User.id > last_id)
+            )
+        statements.append((index, matches.order_by(_ascending(dialect_name, key), User.id).limit(limit + 1)))
+    return statements, fields, None
+
+def _users_page(results, fields, limit):
+    """Build the response body from the (column index, row) pairs read for a page"""
+    results = list(results)
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        index, row = results[-1]
+        next_cursor = encode_cursor([row.id] if index is None else [index, row.search_key, row.id])
+    
+    return {
+        'users': [{
+            field: _serialize(getattr(row, field)) for field in fields
+        } for _, row in results],
+        'next_cursor': next_cursor
+    }
+
 @users_bp.route('/', methods=['GET'])
 def get_users():
-    """Get all users"""
-    users = User.query.all()
-    return jsonify([{
-        'id': user.id,
-        'username': user.username,
-        'email': user.email,
-        'role': user.role,
-        'created_at': user.created_at.isoformat()
-    } for user in users])
+    """Search users by prefix with role filtering and keyset pagination"""
+    admin, error_response = require_admin(request)
+    if error_response:
+        return error_response
+    
+    limit = get_page_size(request.args)
+    statements, fields, error = _users_statements(request.args, limit, db.session.get_bind().dialect.name)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    results = []
+    for index, statement in statements:
+        if len(results) > limit:
+            break
+        results.extend((index, row) for row in db.session.execute(statement))
+    
+    return jsonify(_users_page(results, fields, limit))
+
+@users_bp.route('/me', methods=['GET'])
+def get_current_user():
+    """Profile of the authenticated user, straight from the access token"""
+    claims, error_response = verify_token(request)
+    if error_response:
+        return error_response
+    
+    return jsonify({
+        'id': claims['user_id'],
+        'username': claims.get('username'),
+        'name': claims.get('name'),
+        'role': claims['role']
+    }), 200
+
+@users_bp.route('/<int:user_id>/summary', methods=['GET'])
+def get_user_summary(user_id):
+    """Loan, fine and rating counters for a user, from the user_stats table"""
+    claims, error_response = verify_token(request)
+    if error_response:
+        return error_response
+    
+    if claims['user_id'] != user_id and claims['role'] != 'admin':
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    summary = get_user_stats(user_id)
+    if summary is None:
+        return jsonify({'error': 'User not found'}), 404
+    
+    summary['updated_at'] = summary['updated_at'].isoformat()
+    return jsonify(summary), 200
 
 @users_bp.route('/', methods=['POST'])
 def create_user():
@@ -40,3 +219,23 @@ def create_user():
         'email': user.email,
         'role': user.role
     }), 201
+
+@users_async.get('/')
+async def get_users_async(request, session):
+    """Async version of get_users"""
+    admin, error_response = request.require_admin()
+    if error_response:
+        return error_response
+    
+    limit = get_page_size(request.args)
+    statements, fields, error = _users_statements(request.args, limit, session.bind.dialect.name)
+    if error:
+        return {'error': error}, 400
+    
+    results = []
+    for index, statement in statements:
+        if len(results) > limit:
+            break
+        results.extend((index, row) for row in await session.execute(statement))
+    
+    return _users_page(results, fields, limit)
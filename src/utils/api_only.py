@@ -0,0 +1,20 @@
+from flask import jsonify, request
+
+# Endpoints whose views import pandas, the document writers or the ML stack
+HEAVY_ENDPOINTS = ('books.import_book_dataset',)
+
+# Modules an API worker must never load (checked by tests/test_import_budget.py)
+HEAVY_MODULES = (
+    'tensorflow', 'keras', 'sklearn', 'nltk', 'textblob', 'matplotlib',
+    'seaborn', 'pandas', 'numpy', 'docx', 'openpyxl'
+)
+
+
+def disable_heavy_endpoints(app):
+    """Answer 404 for HEAVY_ENDPOINTS so an API-only worker never imports their stack"""
+
+    @app.before_request
+    def reject_heavy_endpoints():
+        if request.endpoint in HEAVY_ENDPOINTS:
+            return jsonify({'error': 'Not available on API-only workers'}), 404
+        return None
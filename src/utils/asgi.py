@@ -0,0 +1,216 @@
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from asgiref.sync import async_to_sync, sync_to_async
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, Rule
+
+from src.utils.async_db import init_async_db
+from src.utils.async_routes import AsyncRequest
+from src.utils.request_metrics import start_tally, stop_tally
+
+
+class PooledWsgiToAsgi:
+    """Serve a WSGI app over ASGI, running each request on a bounded thread pool.
+
+    asgiref's WsgiToAsgi runs every WSGI call on one shared thread. This
+    adapter uses only asgiref's public sync_to_async/async_to_sync: the body
+    is read on the event loop, the app runs on the executor and streams its
+    response back through send.
+    """
+
+    def __init__(self, wsgi_application, threads):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            raise ValueError(f"WSGI apps only serve HTTP, not {scope['type']!r}")
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            body.seek(0)
+            run = sync_to_async(self._run, thread_sensitive=False, executor=self.executor)
+            await run(scope, body, async_to_sync(send))
+
+    def _run(self, scope, body, send):
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['start'] = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+            }
+
+        chunks = self.wsgi_application(wsgi_environ(scope, body), start_response)
+        try:
+            for chunk in chunks:
+                if not response.get('sent'):
+                    send(response['start'])
+                    response['sent'] = True
+                if chunk:
+                    send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+        if not response.get('sent'):
+            send(response['start'])
+        send({'type': 'http.response.body'})
+
+
+def wsgi_environ(scope, body):
+    """The WSGI environ for an ASGI http scope (PEP 3333 and the ASGI spec's mapping)"""
+    script_name = scope.get('root_path', '').encode('utf-8').decode('latin-1')
+    path_info = scope['path'].encode('utf-8').decode('latin-1')
+    if script_name and path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name,
+        'PATH_INFO': path_info,
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin-1')
+        # Repeated headers are joined, as a WSGI server would
+        environ[name] = f'{environ[name]},{value}' if name in environ else value
+    return environ
+
+
+class AsyncReadApp:
+    """ASGI app serving the async read views, with Flask behind it for the rest.
+
+    GET requests matching a mounted AsyncRoutes view run on the event loop
+    with an AsyncSession, so a worker can keep many catalog and history
+    queries in flight at once. Every other request, including writes, is
+    handed to the unchanged Flask app on a thread pool.
+    """
+
+    def __init__(self, flask_app, sessionmaker, wsgi_threads=10):
+        self.flask_app = flask_app
+        self.sessionmaker = sessionmaker
+        self.wsgi = PooledWsgiToAsgi(flask_app, wsgi_threads)
+        self.url_map = Map()
+        self.endpoints = {}
+
+    def mount(self, routes, prefix):
+        for rule, view in routes.views:
+            self.url_map.add(Rule(prefix + rule, endpoint=view, methods=['GET']))
+            self.endpoints[view] = f'{routes.name}.{view.__name__}'
+
+    def _match(self, scope):
+        if scope['type'] != 'http' or scope['method'] != 'GET':
+            return None, None
+        try:
+            return self.url_map.bind('').match(scope['path'], method='GET')
+        except HTTPException:
+            # Not found, redirects and the like are Flask's to answer
+            return None, None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+
+        view, url_values = self._match(scope)
+        if view is None:
+            await self.wsgi(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        tally = start_tally(self.endpoints[view])
+        request = AsyncRequest(self.flask_app, scope)
+        try:
+            async with self.sessionmaker() as session:
+                result = await view(request, session, **url_values)
+        except Exception:
+            self.flask_app.logger.exception('Exception on %s [GET]', scope['path'])
+            result = ({'error': 'Internal server error'}, 500)
+
+        data, status = result if isinstance(result, tuple) else (result, 200)
+        size = await self._send_json(send, data, status)
+        stop_tally()
+
+        metrics = self.flask_app.extensions.get('request_metrics')
+        if metrics:
+            metrics.observe(
+                self.endpoints[view], 'GET', status, (time.perf_counter() - started) * 1000, tally, size
+            )
+
+    async def _send_json(self, send, data, status):
+        body = f'{self.flask_app.json.dumps(data)}\n'.encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', self.flask_app.json.mimetype.encode('latin-1')),
+                (b'content-length', str(len(body)).encode('latin-1'))
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+        return len(body)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.sessionmaker.kw['bind'].dispose()
+                self.wsgi.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(flask_app):
+    """Wrap a Flask app from create_app() in an AsyncReadApp with its async views mounted"""
+    sessionmaker = init_async_db(flask_app)
+    app = AsyncReadApp(
+        flask_app,
+        sessionmaker,
+        wsgi_threads=flask_app.config.get('ASGI_WSGI_THREADS', 10)
+    )
+
+    slow_query_log = flask_app.extensions.get('slow_query_log')
+    if slow_query_log is not None:
+        slow_query_log.attach(sessionmaker.kw['bind'].sync_engine)
+    sqlite_profile = flask_app.extensions.get('sqlite_profile')
+    if sqlite_profile is not None and sessionmaker.kw['bind'].dialect.name == 'sqlite':
+        sqlite_profile.attach(sessionmaker.kw['bind'].sync_engine)
+
+    # Same prefixes as the blueprints in create_app()
+    from src.routes.books import books_async
+    from src.routes.borrowing import borrowing_async
+    from src.routes.users import users_async
+
+    app.mount(books_async, '/api/books')
+    app.mount(borrowing_async, '/api/borrow')
+    app.mount(users_async, '/api/users')
+    return app
@@ -0,0 +1,123 @@
+import ssl
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.utils.db_pool import _as_bool
+
+# Sync driver -> asyncio driver for the same database
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite'
+}
+
+
+def async_database_url(config):
+    """The asyncio URL for the app's database, or ASYNC_DATABASE_URL when set"""
+    if config.get('ASYNC_DATABASE_URL'):
+        return make_url(config['ASYNC_DATABASE_URL'])
+
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for {backend!r} databases; set ASYNC_DATABASE_URL")
+    if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+        raise ValueError('In-memory SQLite cannot be shared with an async engine')
+
+    # asyncpg takes no libpq query options such as sslmode; async_connect_args() carries them over
+    return url.set(drivername=ASYNC_DRIVERS[backend], query={} if backend == 'postgresql' else url.query)
+
+
+def async_connect_args(config):
+    """asyncpg connect() arguments for the libpq options (sslmode etc.) of the sync database URL"""
+    if config.get('ASYNC_DATABASE_URL'):
+        return {}
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'postgresql':
+        return {}
+    return libpq_connect_args(url.query)
+
+
+def libpq_connect_args(query):
+    """Translate a postgresql:// URL's libpq query options into asyncpg connect() arguments.
+
+    Raises ValueError for an option asyncpg has no equivalent for, rather
+    than connecting without it (a dropped sslmode would silently mean no TLS).
+    """
+    options = dict(query)
+    repeated = sorted(name for name, value in options.items() if isinstance(value, tuple))
+    if repeated:
+        raise ValueError(f"Repeated database URL options: {', '.join(repeated)}")
+
+    args = {}
+    sslmode = options.pop('sslmode', None)
+    files = {name: options.pop(name) for name in ('sslrootcert', 'sslcert', 'sslkey') if name in options}
+    if sslmode or files:
+        args['ssl'] = _ssl_argument(sslmode or 'prefer', **files)
+    if 'connect_timeout' in options:
+        args['timeout'] = float(options.pop('connect_timeout'))
+    if 'target_session_attrs' in options:
+        args['target_session_attrs'] = options.pop('target_session_attrs')
+    if 'application_name' in options:
+        args['server_settings'] = {'application_name': options.pop('application_name')}
+
+    if options:
+        raise ValueError(
+            f"No asyncpg equivalent for database URL options {', '.join(sorted(options))}; set ASYNC_DATABASE_URL"
+        )
+    return args
+
+
+SSL_MODES = ('disable', 'allow', 'prefer', 'require', 'verify-ca', 'verify-full')
+
+
+def _ssl_argument(sslmode, sslrootcert=None, sslcert=None, sslkey=None):
+    """asyncpg's ssl= for a libpq sslmode and certificate files"""
+    if sslmode not in SSL_MODES:
+        raise ValueError(f'Unknown sslmode {sslmode!r}')
+    if not (sslrootcert or sslcert):
+        # asyncpg understands libpq's mode names
+        return sslmode
+    if sslmode in ('disable', 'allow', 'prefer'):
+        raise ValueError(f'sslmode={sslmode} with certificate files cannot be mapped to asyncpg; use require or stricter')
+
+    context = ssl.create_default_context(cafile=sslrootcert)
+    if sslmode != 'verify-full':
+        # require with a root certificate verifies the chain like verify-ca, as libpq does
+        context.check_hostname = False
+    if sslcert:
+        context.load_cert_chain(sslcert, sslkey)
+    return context
+
+
+def build_async_engine_options(config, url):
+    """create_async_engine() options from the same DB_* settings as the sync pool.
+
+    The async pool is separate from the sync one, so an ASGI worker can hold
+    up to twice DB_POOL_SIZE + DB_MAX_OVERFLOW connections.
+    """
+    options = {
+        'pool_pre_ping': _as_bool(config.get('DB_POOL_PRE_PING', True)),
+        'pool_size': int(config.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(config.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(config.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(config.get('DB_POOL_RECYCLE', 1800))
+    }
+
+    connect_args = async_connect_args(config) if url.get_backend_name() == 'postgresql' else {}
+    statement_timeout = int(config.get('DB_STATEMENT_TIMEOUT_MS') or 0)
+    if statement_timeout and url.get_backend_name() == 'postgresql':
+        connect_args.setdefault('server_settings', {})['statement_timeout'] = str(statement_timeout)
+    if connect_args:
+        options['connect_args'] = connect_args
+
+    return options
+
+
+def init_async_db(app):
+    """Create the app's async engine and session factory, kept in app.extensions"""
+    url = async_database_url(app.config)
+    engine = create_async_engine(url, **build_async_engine_options(app.config, url))
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    app.extensions['async_db'] = sessionmaker
+    return sessionmaker
@@ -0,0 +1,73 @@
+import math
+from urllib.parse import parse_qsl
+
+from sqlalchemy import func, select
+from werkzeug.datastructures import Headers, MultiDict
+
+from src.utils.token_auth import bearer_token, decode_access_token
+
+
+class AsyncRoutes:
+    """Async counterparts of a blueprint's read-only GET views.
+
+    Views are registered with the blueprint's own rule syntax and mounted
+    under the same prefix by src/utils/asgi.py. Each is called as
+    view(request, session, **url_values) with an AsyncRequest and an
+    AsyncSession, and returns data or (data, status) to be sent as JSON.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.views = []
+
+    def get(self, rule):
+        def decorator(view):
+            self.views.append((rule, view))
+            return view
+        return decorator
+
+
+class AsyncRequest:
+    """The parts of an HTTP request the async views use"""
+
+    def __init__(self, app, scope):
+        self.app = app
+        self.path = scope['path']
+        self.args = MultiDict(parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True))
+        self.headers = Headers([
+            (name.decode('latin-1'), value.decode('latin-1')) for name, value in scope.get('headers', [])
+        ])
+
+    def verify_token(self):
+        """Like src.routes.auth.verify_token: (claims, None) or (None, error response)"""
+        claims, error = decode_access_token(self.app.extensions['token_verifier'], bearer_token(self))
+        if error:
+            return None, ({'error': error}, 401)
+        return claims, None
+
+    def require_admin(self):
+        """Like src.routes.auth.require_admin: also reject tokens without the admin role"""
+        claims, error_response = self.verify_token()
+        if error_response:
+            return None, error_response
+
+        if claims['role'] != 'admin':
+            return None, ({'error': 'Forbidden: Admin access required'}, 403)
+
+        return claims, None
+
+
+async def paginate(session, statement, page, per_page):
+    """Async equivalent of db.paginate(..., error_out=False): (items, total, pages)"""
+    page = page if page and page > 0 else 1
+    per_page = per_page if per_page and per_page > 0 else 20
+
+    items = (await session.execute(
+        statement.limit(per_page).offset((page - 1) * per_page)
+    )).scalars().all()
+    total = (await session.execute(
+        select(func.count()).select_from(statement.order_by(None).subquery())
+    )).scalar()
+
+    pages = math.ceil(total / per_page) if total else 0
+    return items, total, pages
@@ -0,0 +1,124 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from src.utils.histogram import Histogram
+
+
+class PoolMetrics:
+    """Counters and a checkout wait-time histogram for one connection pool"""
+
+    def __init__(self):
+        self.wait_ms = Histogram()
+        self.counters = {'checkouts': 0, 'timeouts': 0, 'connects': 0, 'invalidations': 0}
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def snapshot(self, pool):
+        """Live pool occupancy together with the accumulated counters"""
+        with self._lock:
+            snapshot = dict(self.counters, pool_class=type(pool).__name__, wait_ms=self.wait_ms.snapshot())
+
+        if isinstance(pool, QueuePool):
+            snapshot.update(
+                pool_size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow
+            )
+        return snapshot
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    metrics = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            if self.metrics:
+                self.metrics.count('timeouts')
+            raise
+        finally:
+            if self.metrics:
+                self.metrics.wait_ms.observe((time.perf_counter() - start) * 1000)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def _as_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+def build_engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS from the DB_* settings for the configured database.
+
+    In-memory SQLite keeps Flask-SQLAlchemy's single shared connection, since
+    a pool of separate connections would each see an empty database.
+    """
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = {'pool_pre_ping': _as_bool(config.get('DB_POOL_PRE_PING', True))}
+
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return options
+
+    options.update(
+        poolclass=MeteredQueuePool,
+        pool_size=int(config.get('DB_POOL_SIZE', 5)),
+        max_overflow=int(config.get('DB_MAX_OVERFLOW', 10)),
+        pool_timeout=int(config.get('DB_POOL_TIMEOUT', 30)),
+        pool_recycle=int(config.get('DB_POOL_RECYCLE', 1800))
+    )
+
+    statement_timeout = int(config.get('DB_STATEMENT_TIMEOUT_MS') or 0)
+    if statement_timeout and url.get_backend_name() == 'postgresql':
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+
+    return options
+
+
+def init_pool_metrics(app, engine):
+    """Attach PoolMetrics to the app's engine pool, if it is a MeteredQueuePool"""
+    metrics = PoolMetrics()
+    app.extensions['pool_metrics'] = metrics
+
+    if isinstance(engine.pool, MeteredQueuePool):
+        engine.pool.metrics = metrics
+
+    event.listen(engine, 'checkout', lambda *args: metrics.count('checkouts'))
+    event.listen(engine, 'connect', lambda *args: metrics.count('connects'))
+    event.listen(engine, 'invalidate', lambda *args: metrics.count('invalidations'))
+    return metrics
+
+
+def dispose_after_fork(app):
+    """Give a freshly forked worker empty pools on every engine of the app.
+
+    Call in each worker right after the fork. close=False leaves the
+    connections the master may have opened (for example while preloading)
+    to the master, rather than sharing their sockets with the worker.
+    """
+    with app.app_context():
+        engines = list(app.extensions['sqlalchemy'].engines.values())
+    replicas = app.extensions.get('replicas')
+    if replicas is not None:
+        engines.extend(replica.engine for replica in replicas.replicas)
+    for engine in engines:
+        engine.dispose(close=False)
+    return len(engines)
@@ -0,0 +1,113 @@
+from flask import current_app
+from src.app_factory import db
+from src.models import Event, EventConsumer
+from datetime import datetime, timedelta
+
+# Event types written by the blueprints
+BOOK_BORROWED = 'book.borrowed'
+BOOK_RETURNED = 'book.returned'
+BOOK_CREATED = 'book.created'
+BOOK_RATED = 'book.rated'
+HOLD_PLACED = 'hold.placed'
+HOLD_READY = 'hold.ready'
+HOLD_CANCELLED = 'hold.cancelled'
+HOLD_EXPIRED = 'hold.expired'
+
+# Default for EVENT_VISIBILITY_SECONDS
+EVENT_VISIBILITY_SECONDS = 5
+
+
+def record_event(event_type, user_id=None, book_id=None, **payload):
+    """Append an event to the current transaction without committing.
+
+    The event becomes visible to consumers only if the caller's transaction
+    commits, so the log never disagrees with the tables it describes.
+    """
+    event = Event(
+        event_type=event_type,
+        user_id=user_id,
+        book_id=book_id,
+        payload=payload
+    )
+    db.session.add(event)
+    return event
+
+
+def _get_consumer(name):
+    """Load a consumer's checkpoint row, creating it at the start of the log"""
+    consumer = db.session.get(EventConsumer, name)
+    if consumer is None:
+        consumer = EventConsumer(name=name, last_event_id=0)
+        db.session.add(consumer)
+        db.session.flush()
+    return consumer
+
+
+def read_events(consumer_name, batch_size=100, event_types=None, now=None):
+    """Return the next batch of events after the consumer's checkpoint, oldest first.
+
+    Event ids are drawn when the row is inserted, not when its transaction
+    commits, so a transaction holding id N can commit after N+1 has been
+    read and acknowledged. Events are only handed out once they are older
+    than EVENT_VISIBILITY_SECONDS, by which time every transaction that drew
+    a lower id has committed or rolled back, and a checkpoint never passes
+    an event that is still on its way.
+    """
+    now = now or datetime.utcnow()
+    window = current_app.config.get('EVENT_VISIBILITY_SECONDS', EVENT_VISIBILITY_SECONDS)
+    consumer = _get_consumer(consumer_name)
+    query = Event.query.filter(
+        Event.id > consumer.last_event_id,
+        Event.created_at <= now - timedelta(seconds=window)
+    )
+
+    if event_types:
+        query = query.filter(Event.event_type.in_(event_types))
+
+    return query.order_by(Event.id).limit(batch_size).all()
+
+
+def acknowledge(consumer_name, last_event_id):
+    """Advance a consumer's checkpoint to last_event_id and commit.
+
+    Checkpoints only move forward, so replaying an old acknowledgement is
+    harmless.
+    """
+    consumer = _get_consumer(consumer_name)
+    if last_event_id > consumer.last_event_id:
+        consumer.last_event_id = last_event_id
+        consumer.updated_at = datetime.utcnow()
+    db.session.commit()
+    return consumer.last_event_id
+
+
+def consume(consumer_name, handler, batch_size=100, event_types=None):
+    """Feed every pending event to handler in ordered batches.
+
+    The checkpoint is committed after each batch the handler finishes, so a
+    crash replays at most one batch. Returns the number of events handled.
+    """
+    handled = 0
+
+    while True:
+        events = read_events(consumer_name, batch_size, event_types)
+        if not events:
+            break
+
+        handler(events)
+        acknowledge(consumer_name, events[-1].id)
+        handled += len(events)
+
+    return handled
+
+
+def serialize_event(event):
+    """Convert an event to a JSON-serializable dict"""
+    return {
+        'id': event.id,
+        'event_type': event.event_type,
+        'user_id': event.user_id,
+        'book_id': event.book_id,
+        'payload': event.payload,
+        'created_at': event.created_at.isoformat()
+    }
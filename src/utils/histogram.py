@@ -0,0 +1,34 @@
+import bisect
+import threading
+
+# Upper bounds in milliseconds, Prometheus-style (cumulative, plus +Inf)
+DEFAULT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram of observed values"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Record one observation"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self):
+        """Cumulative bucket counts keyed by upper bound, plus count and sum"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            running += count
+            cumulative[str(bound)] = running
+        return {'buckets': cumulative, 'count': running, 'sum': total}
@@ -0,0 +1,126 @@
+from src.app_factory import db
+from src.models import Book, Hold
+from src.utils.events import HOLD_EXPIRED, HOLD_READY, record_event
+from sqlalchemy import func, literal_column, update
+from datetime import datetime, timedelta
+
+# How long a copy set aside for a patron waits on the hold shelf
+HOLD_PICKUP_DAYS = 3
+
+ACTIVE_HOLD_STATUSES = ('waiting', 'ready')
+
+# Written as a literal so the planner matches it to ix_holds_waiting_book_id_queue_number
+_WAITING = Hold.status == literal_column("'waiting'")
+
+
+def queue_head(book_id):
+    """Return the oldest waiting hold for a book, locked for update"""
+    return Hold.query.filter(Hold.book_id == book_id, _WAITING)\
+        .order_by(Hold.queue_number)\
+        .with_for_update()\
+        .first()
+
+
+def next_queue_number(book_id):
+    """Number for a hold joining the back of a book's queue.
+
+    The waiting holds of a book are numbered consecutively from the head.
+    Call with the book's row locked (see place_hold), so two patrons joining
+    at once do not draw the same number.
+    """
+    tail = db.session.query(func.max(Hold.queue_number))\
+        .filter(Hold.book_id == book_id, _WAITING)\
+        .scalar()
+    return (tail or 0) + 1
+
+
+def leave_queue(hold):
+    """Move everyone behind a waiting hold up one place before it is cancelled.
+
+    Locks the book's row, like joining the queue does, and runs inside the
+    caller's transaction without committing.
+    """
+    db.session.get(Book, hold.book_id, with_for_update=True)
+    db.session.execute(
+        update(Hold)
+        .where(Hold.book_id == hold.book_id, _WAITING, Hold.queue_number > hold.queue_number)
+        .values(queue_number=Hold.queue_number - 1),
+        execution_options={'synchronize_session': False}
+    )
+
+
+def allocate_returned_copy(book, now=None):
+    """Give a copy coming back to the shelf to the head of the queue.
+
+    Runs inside the caller's transaction and does not commit. Returns the
+    hold that received the copy, or None if nobody was waiting and the copy
+    went back into stock.
+    """
+    now = now or datetime.utcnow()
+    head = queue_head(book.id)
+
+    if head is None:
+        book.stock += 1
+        return None
+
+    head.status = 'ready'
+    head.ready_at = now
+    head.expires_at = now + timedelta(days=HOLD_PICKUP_DAYS)
+    record_event(HOLD_READY, user_id=head.user_id, book_id=book.id, hold_id=head.id)
+    return head
+
+
+def claim_ready_hold(user_id, book_id, now=None):
+    """Return the user's unexpired ready hold on a book, if they have one"""
+    now = now or datetime.utcnow()
+    return Hold.query.filter(
+        Hold.user_id == user_id,
+        Hold.book_id == book_id,
+        Hold.status == 'ready',
+        Hold.expires_at > now
+    ).first()
+
+
+def queue_position(hold):
+    """Return the 1-based position of a waiting hold, or 0 once it has left the queue.
+
+    Queue numbers have no gaps, so the position is the distance from the
+    head's number: one lookup at the front of the partial index, however
+    long the queue.
+    """
+    if hold.status != 'waiting':
+        return 0
+
+    head = db.session.query(func.min(Hold.queue_number))\
+        .filter(Hold.book_id == hold.book_id, _WAITING)\
+        .scalar()
+    return hold.queue_number - head + 1
+
+
+def expire_stale_holds(now=None, batch_size=500):
+    """Expire ready holds that were not picked up and pass each copy on.
+
+    Works in batches of batch_size, committing after each, and returns the
+    number of holds expired.
+    """
+    now = now or datetime.utcnow()
+    expired = 0
+
+    while True:
+        stale = Hold.query.filter(Hold.status == 'ready', Hold.expires_at <= now)\
+            .order_by(Hold.expires_at, Hold.id)\
+            .limit(batch_size)\
+            .with_for_update()\
+            .all()
+        if not stale:
+            break
+
+        for hold in stale:
+            hold.status = 'expired'
+            record_event(HOLD_EXPIRED, user_id=hold.user_id, book_id=hold.book_id, hold_id=hold.id)
+            allocate_returned_copy(db.session.get(Book, hold.book_id), now=now)
+
+        db.session.commit()
+        expired += len(stale)
+
+    return expired
@@ -0,0 +1,401 @@
+import json
+import os
+import re
+import statistics
+import time
+import warnings
+from contextlib import contextmanager
+
+from sqlalchemy import event, inspect, text
+
+from src.utils.request_metrics import current_endpoint
+from src.utils.slow_queries import explain, fingerprint, statement_shape
+
+_NAME = r'"?([A-Za-z_]\w*)"?'
+_COLUMN = _NAME + r'\.' + _NAME
+_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+' + _NAME + r'(?:\s+(?:AS\s+)?(?!(?:ON|WHERE|JOIN|LEFT|INNER|GROUP|ORDER|LIMIT)\b)' + _NAME + r')?', re.I)
+_EQUALITY = re.compile(_COLUMN + r'\s*(?:=|\bIN\b|\bIS\b)', re.I)
+_EQUALITY_RHS = re.compile(r'=\s*' + _COLUMN, re.I)
+_RANGE = re.compile(_COLUMN + r'\s*(?:<|>|\bBETWEEN\b|\bLIKE\b)', re.I)
+_ORDER_BY = re.compile(r'\b(?:ORDER|GROUP) BY\s+(.+?)(?=\bLIMIT\b|\bOFFSET\b|\bHAVING\b|\bORDER\b|\)|$)', re.I | re.S)
+
+# Plan lines that read a whole table: SQLite's "SCAN books", Postgres' "Seq Scan on books"
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)(?! USING)(?:\s|$)')
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)(?: (\w+))?')
+
+
+class QuerySample:
+    """One statement shape of a workload, with parameters of one execution to replay"""
+
+    def __init__(self, statement, parameters, endpoint=None, calls=1, total_ms=0.0):
+        self.statement = statement
+        self.parameters = parameters
+        self.endpoint = endpoint
+        self.calls = calls
+        self.total_ms = total_ms
+        self.fingerprint = fingerprint(statement_shape(statement))
+
+    @property
+    def is_select(self):
+        return self.statement.split(None, 1)[0].lower() in ('select', 'with')
+
+    def to_dict(self):
+        return {
+            'statement': self.statement,
+            'parameters': self.parameters,
+            'endpoint': self.endpoint,
+            'calls': self.calls,
+            'total_ms': round(self.total_ms, 3)
+        }
+
+
+class Workload:
+    """Statements grouped by shape and endpoint, hottest (most total time) first"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, statement, parameters, endpoint=None, duration_ms=0.0):
+        key = (fingerprint(statement_shape(statement)), endpoint)
+        sample = self.samples.get(key)
+        if sample is None:
+            parameters = list(parameters) if isinstance(parameters, tuple) else parameters
+            self.samples[key] = QuerySample(statement, parameters, endpoint, 1, duration_ms)
+        else:
+            sample.calls += 1
+            sample.total_ms += duration_ms
+
+    def __iter__(self):
+        return iter(sorted(self.samples.values(), key=lambda sample: -sample.total_ms))
+
+    def __len__(self):
+        return len(self.samples)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'queries': [sample.to_dict() for sample in self]}, f, indent=2, default=str)
+
+    @classmethod
+    def load(cls, path):
+        """A saved workload, or the JSON of GET /api/admin/admin/slow-queries.
+
+        Parameters the slow-query log redacted are replayed as their
+        placeholder text, which is enough for plans and rough timings.
+        """
+        with open(path) as f:
+            data = json.load(f)
+
+        workload = cls()
+        for query in data['queries']:
+            if query.get('executemany'):
+                continue
+            workload.add(query['statement'], query['parameters'], query.get('endpoint'),
+                         query.get('total_ms', query.get('duration_ms', 0.0)))
+        return workload
+
+
+@contextmanager
+def record_workload(engine, workload=None):
+    """Collect every SELECT, UPDATE and DELETE run on engine inside the block"""
+    workload = workload if workload is not None else Workload()
+
+    # Start times go on the execution context, so a failing statement leaves none behind
+    def before(conn, cursor, statement, parameters, context, executemany):
+        context._advisor_start = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - context._advisor_start) * 1000
+        verb = statement.split(None, 1)[0].lower()
+        if not executemany and verb in ('select', 'with', 'update', 'delete'):
+            workload.add(statement, parameters, current_endpoint(), duration_ms)
+
+    event.listen(engine, 'before_cursor_execute', before)
+    event.listen(engine, 'after_cursor_execute', after)
+    try:
+        yield workload
+    finally:
+        event.remove(engine, 'before_cursor_execute', before)
+        event.remove(engine, 'after_cursor_execute', after)
+
+
+def table_aliases(statement):
+    """{name or alias used in statement: table}"""
+    aliases = {}
+    for table, alias in _TABLES.findall(statement):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+def full_scans(plan, dialect_name, aliases):
+    """Tables a plan reads in full"""
+    tables = set()
+    for line in plan:
+        line = line.strip().lstrip('->').strip()
+        if dialect_name == 'sqlite':
+            match = _SQLITE_SCAN.match(line)
+            names = (match.group(1),) if match else ()
+        else:
+            match = _POSTGRES_SCAN.search(line)
+            names = (match.group(1),) if match else ()
+        tables.update(aliases.get(name, name) for name in names)
+    return tables
+
+
+def candidate_columns(statement, table):
+    """Index columns for table: equality predicates first, then one range or ordering column"""
+    aliases = table_aliases(statement)
+    names = {name for name, target in aliases.items() if target == table}
+
+    def on_table(matches):
+        return [column for name, column in matches if name in names]
+
+    equality = on_table(_EQUALITY.findall(statement)) + on_table(_EQUALITY_RHS.findall(statement))
+    trailing = on_table(_RANGE.findall(statement))
+    for clause in _ORDER_BY.findall(statement):
+        trailing += on_table(re.findall(_COLUMN, clause))
+
+    columns = []
+    for column in equality:
+        if column not in columns:
+            columns.append(column)
+    for column in trailing:
+        if column not in columns:
+            columns.append(column)
+            break
+    return tuple(columns[:3])
+
+
+def index_name(table, columns):
+    return f"ix_{table}_{'_'.join(columns)}"
+
+
+def existing_indexes(engine, table):
+    """Leading column tuples of the table's primary key, unique constraints and indexes"""
+    inspector = inspect(engine)
+    with warnings.catch_warnings():
+        # Expression indexes (lower(email) etc.) reflect with a warning and no column name
+        warnings.simplefilter('ignore')
+        indexed = [tuple(inspector.get_pk_constraint(table)['constrained_columns'])]
+        indexed += [tuple(c['column_names']) for c in inspector.get_unique_constraints(table)]
+        indexed += [tuple(c for c in index['column_names'] if c) for index in inspector.get_indexes(table)]
+    return [columns for columns in indexed if columns]
+
+
+def _covered(columns, indexed):
+    return any(existing[:len(columns)] == columns for existing in indexed)
+
+
+def unindexed_foreign_keys(engine, tables=None):
+    """(table, columns, referred table) of foreign keys no index leads with"""
+    inspector = inspect(engine)
+    missing = []
+    for table in sorted(tables or inspector.get_table_names()):
+        indexed = existing_indexes(engine, table)
+        for foreign_key in inspector.get_foreign_keys(table):
+            columns = tuple(foreign_key['constrained_columns'])
+            if columns and not _covered(columns, indexed) and not any(m[:2] == (table, columns) for m in missing):
+                missing.append((table, columns, foreign_key['referred_table']))
+    return missing
+
+
+def _plan(conn, sample):
+    return explain(conn.connection.dbapi_connection, conn.dialect.name, sample.statement, sample.parameters)
+
+
+def _time_ms(conn, sample, repeats):
+    """Median time of the statement; only SELECTs are executed"""
+    if not sample.is_select:
+        return None
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        conn.exec_driver_sql(sample.statement, _driver_parameters(sample.parameters)).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def _driver_parameters(parameters):
+    return tuple(parameters) if isinstance(parameters, list) else parameters
+
+
+def _measure(conn, sample, repeats):
+    plan = _plan(conn, sample)
+    return {
+        'plan': plan,
+        'full_scans': sorted(full_scans(plan, conn.dialect.name, table_aliases(sample.statement))),
+        'ms': _time_ms(conn, sample, repeats)
+    }
+
+
+def _begin_trial(conn):
+    """A transaction that DDL stays inside until rollback"""
+    trial = conn.begin()
+    if conn.dialect.name == 'sqlite':
+        # pysqlite only opens its implicit transaction before DML, so DDL would autocommit
+        conn.exec_driver_sql('BEGIN')
+    return trial
+
+
+def table_rows(engine, tables):
+    with engine.connect() as conn:
+        return {table: conn.execute(text(f'SELECT COUNT(*) FROM {table}')).scalar() for table in tables}
+
+
+def advise(engine, workload, min_rows=1000, repeats=5, foreign_keys=True):
+    """Recommend indexes for full table scans in workload, each verified by trying it.
+
+    Every candidate is created inside a transaction that is rolled back, so
+    run this against a benchmark or staging copy: on Postgres the build
+    holds a lock on the table until the rollback. A candidate is kept when
+    it removes a full scan from at least one of the queries it came from
+    without making the timed ones slower overall. Returns recommendations,
+    most total query time saved first, followed (with foreign_keys) by
+    foreign keys no index covers: the workload may not have exercised them,
+    but cascading deletes and joins from the parent do.
+    """
+    tables = set(inspect(engine).get_table_names())
+    rows = table_rows(engine, tables)
+    candidates = {}
+
+    with engine.connect() as conn:
+        for sample in workload:
+            try:
+                before = _measure(conn, sample, repeats)
+            except Exception:
+                # Not replayable here (e.g. a table this database lacks); nothing to learn from it
+                conn.rollback()
+                continue
+            for table in before['full_scans']:
+                if rows.get(table, 0) < min_rows:
+                    continue
+                columns = candidate_columns(sample.statement, table)
+                if not columns or _covered(columns, existing_indexes(engine, table)):
+                    continue
+                candidates.setdefault((table, columns), []).append((sample, before))
+        conn.rollback()
+
+    # A candidate that is a prefix of a longer one on the same table is served by it
+    for table, columns in list(candidates):
+        for other_table, other in list(candidates):
+            if other_table == table and other != columns and other[:len(columns)] == columns:
+                candidates[(table, other)].extend(candidates.pop((table, columns)))
+                break
+
+    recommendations = []
+    with engine.connect() as conn:
+        for (table, columns), queries in candidates.items():
+            trial = _begin_trial(conn)
+            try:
+                conn.execute(text(create_index_sql(table, columns)))
+                results = []
+                for sample, before in queries:
+                    after = _measure(conn, sample, repeats)
+                    results.append({
+                        'endpoint': sample.endpoint,
+                        'fingerprint': sample.fingerprint,
+                        'calls': sample.calls,
+                        'statement': statement_shape(sample.statement),
+                        'before': before,
+                        'after': after
+                    })
+            finally:
+                trial.rollback()
+
+            timed = [r for r in results if r['before']['ms'] is not None]
+            saved_ms = round(sum((r['before']['ms'] - r['after']['ms']) * r['calls'] for r in timed), 3)
+            # Scanning the index instead of the table (LIKE '%x%') removes the scan but not the work
+            if any(table not in r['after']['full_scans'] for r in results) and (saved_ms > 0 or not timed):
+                recommendations.append({
+                    'table': table,
+                    'columns': list(columns),
+                    'name': index_name(table, columns),
+                    'rows': rows[table],
+                    'saved_ms': saved_ms,
+                    'queries': results
+                })
+
+    recommendations.sort(key=lambda r: -r['saved_ms'])
+    if foreign_keys:
+        for table, columns, referred in unindexed_foreign_keys(engine):
+            if not _covered(columns, [tuple(r['columns']) for r in recommendations if r['table'] == table]):
+                recommendations.append({
+                    'table': table,
+                    'columns': list(columns),
+                    'name': index_name(table, columns),
+                    'rows': rows.get(table, 0),
+                    'saved_ms': 0.0,
+                    'queries': [],
+                    'reason': f'foreign key to {referred}'
+                })
+    return recommendations
+
+
+def create_index_sql(table, columns, concurrently=False):
+    keyword = 'CREATE INDEX CONCURRENTLY' if concurrently else 'CREATE INDEX'
+    return f"{keyword} IF NOT EXISTS {index_name(table, columns)} ON {table} ({', '.join(columns)})"
+
+
+def next_migration_number(directory):
+    numbers = [int(name[:3]) for name in os.listdir(directory) if name[:3].isdigit()]
+    return max(numbers, default=0) + 1
+
+
+def write_migration(recommendations, directory, name='add_advised_indexes'):
+    """Write the recommended indexes as the next numbered SQL migration; returns its path"""
+    path = os.path.join(directory, f'{next_migration_number(directory):03d}_{name}.sql')
+    lines = [
+        '-- Migration script to add indexes recommended by scripts/advise_indexes.py',
+        '-- (built CONCURRENTLY on PostgreSQL, so circulation keeps writing meanwhile)',
+        ''
+    ]
+    for recommendation in recommendations:
+        endpoints = sorted({q['endpoint'] or 'unknown' for q in recommendation['queries']})
+        lines.append(f"-- {', '.join(endpoints) or recommendation.get('reason', '')}")
+        lines.append(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {recommendation['name']}")
+        lines.append(f"    ON {recommendation['table']} ({', '.join(recommendation['columns'])});")
+        lines.append('')
+    with open(path, 'w', newline='\r\n') as f:
+        f.write('\n'.join(lines).rstrip('\n') + '\n')
+    return path
+
+
+def _limited(statement, plan):
+    sorts = any('TEMP B-TREE' in line or line.strip().lstrip('->').strip().startswith('Sort') for line in plan)
+    return re.search(r'\bLIMIT\b', statement, re.I) is not None and not sorts
+
+
+def verify(engine, workload, min_rows=1000, repeats=3):
+    """Plans and timings of the workload's endpoint queries, flagging full scans of large tables.
+
+    A scan that a LIMIT cuts short (no sort in the plan) stops after a page
+    of rows and is not flagged.
+    """
+    rows = table_rows(engine, set(inspect(engine).get_table_names()))
+    results = []
+    with engine.connect() as conn:
+        for sample in workload:
+            if sample.endpoint is None:
+                continue
+            try:
+                measured = _measure(conn, sample, repeats)
+            except Exception as e:
+                conn.rollback()
+                results.append({'endpoint': sample.endpoint, 'fingerprint': sample.fingerprint,
+                                'statement': statement_shape(sample.statement), 'error': str(e)})
+                continue
+            scans = [table for table in measured['full_scans'] if rows.get(table, 0) >= min_rows]
+            if scans and _limited(sample.statement, measured['plan']):
+                scans = []
+            results.append({
+                'endpoint': sample.endpoint,
+                'fingerprint': sample.fingerprint,
+                'statement': statement_shape(sample.statement),
+                'uses_index': not scans,
+                'full_scans': scans,
+                'plan': measured['plan'],
+                'ms': measured['ms']
+            })
+        conn.rollback()
+    return results
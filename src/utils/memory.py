@@ -0,0 +1,62 @@
+import os
+
+# Memory accounting for pre-forked workers, from Linux's /proc.
+#   rss  - resident pages, counting shared ones in every process that maps them
+#   pss  - each shared page divided between the processes sharing it; sums to real usage
+#   uss  - private pages: what the process costs on its own and frees when it exits
+# RSS of a worker forked from a preloaded master looks as large as the master's;
+# USS shows how much of the inherited heap the worker has actually copied. Pages
+# of a memory-mapped file that only one process has touched count as private
+# (clean) too, although they are page cache the next process maps for free.
+
+_SMAPS_FIELDS = {
+    'Rss': 'rss', 'Pss': 'pss',
+    'Shared_Clean': 'shared_clean', 'Shared_Dirty': 'shared_dirty',
+    'Private_Clean': 'private_clean', 'Private_Dirty': 'private_dirty'
+}
+
+
+def process_memory(pid='self'):
+    """rss/pss/uss/shared of pid in KiB, or None where /proc/<pid>/smaps_rollup is unavailable"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    usage = dict.fromkeys(_SMAPS_FIELDS.values(), 0)
+    for line in lines:
+        name, _, rest = line.partition(':')
+        if name in _SMAPS_FIELDS:
+            usage[_SMAPS_FIELDS[name]] = int(rest.split()[0])
+    usage['uss'] = usage['private_clean'] + usage['private_dirty']
+    usage['shared'] = usage['shared_clean'] + usage['shared_dirty']
+    return usage
+
+
+def child_pids(pid):
+    """Direct children of pid (e.g. the workers of a gunicorn master)"""
+    children = []
+    try:
+        tasks = os.listdir(f'/proc/{pid}/task')
+    except OSError:
+        return children
+    for task in tasks:
+        try:
+            with open(f'/proc/{pid}/task/{task}/children') as f:
+                children.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    return sorted(set(children))
+
+
+def worker_memory(master_pid):
+    """process_memory of the master and each of its workers, plus their totals"""
+    processes = [('master', master_pid)] + [('worker', pid) for pid in child_pids(master_pid)]
+    report = []
+    for role, pid in processes:
+        usage = process_memory(pid)
+        if usage is not None:
+            report.append(dict(usage, role=role, pid=pid))
+    totals = {key: sum(entry[key] for entry in report) for key in ('rss', 'pss', 'uss')}
+    return {'processes': report, 'totals': totals}
@@ -0,0 +1,503 @@
+import hashlib
+import os
+import re
+import time
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Float, Integer, MetaData, String, Table, select, text
+from sqlalchemy.exc import OperationalError
+
+MIGRATIONS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'migrations'))
+
+# Defaults for "-- migrate: backfill" statements; each batch commits on its own
+BACKFILL_BATCH_SIZE = 5000
+BACKFILL_PAUSE_MS = 100
+
+# Held by whichever process is migrating, so two deploys never run at once (Postgres)
+ADVISORY_LOCK_ID = 7_240_115
+
+_FILENAME = re.compile(r'^(\d+)_(\w+)\.sql$')
+_DIRECTIVE = re.compile(r'^--\s*migrate:\s*(\w[\w-]*)(.*)$')
+_CONCURRENTLY = re.compile(r'\bCONCURRENTLY\s+', re.I)
+_CREATE_INDEX = re.compile(
+    r'^\s*CREATE\s+(UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?"?(\w+)"?\s+'
+    r'ON\s+(?:ONLY\s+)?"?(\w+)"?\s*(.*)$',
+    re.I | re.S
+)
+_DOLLAR_QUOTE = re.compile(r'\$(\w*)\$')
+_ADD_COLUMN_IF_NOT_EXISTS = re.compile(
+    r'^\s*ALTER\s+TABLE\s+"?(\w+)"?\s+ADD\s+COLUMN\s+(IF\s+NOT\s+EXISTS\s+)"?(\w+)"?',
+    re.I
+)
+
+# Postgres spellings in migrations/ and what SQLite takes instead
+_SQLITE_REWRITES = (
+    # Only an INTEGER PRIMARY KEY is assigned automatically (the rowid)
+    (re.compile(r'\b(?:BIG)?SERIAL(\s+PRIMARY\s+KEY)\b', re.I), r'INTEGER\1'),
+    # Operator classes only steer Postgres' planner; the plain index is the equivalent
+    (re.compile(r'\s+(?:text|varchar)_pattern_ops\b', re.I), ''),
+)
+
+schema_migrations = Table(
+    'schema_migrations', MetaData(),
+    Column('version', Integer, primary_key=True, autoincrement=False),
+    Column('name', String(255), nullable=False),
+    Column('checksum', String(64), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+    Column('duration_ms', Float),
+    # Recorded by baseline() for a schema that was already in place
+    Column('baseline', Boolean, nullable=False, default=False)
+)
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Statement:
+    """One SQL statement of a migration, with its backfill options if it has any"""
+
+    def __init__(self, sql, backfill=None):
+        self.sql = sql
+        self.backfill = backfill
+
+    @property
+    def concurrent(self):
+        return _CONCURRENTLY.search(self.sql) is not None
+
+
+class Migration:
+    """A numbered file in migrations/.
+
+    A migration runs in one transaction, recorded in schema_migrations in
+    that same transaction, unless it builds indexes CONCURRENTLY, has a
+    backfill, or says "-- migrate: no-transaction". Those run statement by
+    statement in autocommit mode, so every statement must be safe to run
+    again if the migration is interrupted (IF NOT EXISTS, a backfill's WHERE
+    skipping rows already done). "-- migrate: dialect postgresql" limits a
+    migration to one database. Files are written for Postgres; expand()
+    translates the few constructs SQLite spells differently.
+    """
+
+    def __init__(self, version, name, path, sql):
+        self.version = version
+        self.name = name
+        self.path = path
+        self.sql = sql
+        self.checksum = hashlib.sha256(sql.replace('\r\n', '\n').encode('utf-8')).hexdigest()
+        self.statements, self.options = split_statements(sql)
+
+    @property
+    def filename(self):
+        return os.path.basename(self.path)
+
+    @property
+    def transactional(self):
+        return not (
+            'no-transaction' in self.options
+            or any(statement.concurrent or statement.backfill is not None for statement in self.statements)
+        )
+
+    def applies_to(self, dialect_name):
+        dialects = self.options.get('dialect')
+        return not dialects or dialect_name in dialects.split()
+
+
+def _parse_options(text_):
+    """{'batch_size': 1000, 'pause_ms': 50} from 'batch_size=1000 pause_ms=50'"""
+    options = {}
+    for pair in text_.split():
+        key, _, value = pair.partition('=')
+        options[key] = int(value)
+    return options
+
+
+def split_statements(sql):
+    """Statements of a SQL script, and its file-level "-- migrate:" options.
+
+    Semicolons inside quotes, comments and dollar-quoted bodies ($$ ... $$)
+    do not end a statement. "-- migrate: backfill [batch_size=N] [pause_ms=N]"
+    applies to the statement that follows it.
+    """
+    statements = []
+    options = {}
+    backfill = None
+    current = []
+    has_code = False
+    i = 0
+
+    def finish():
+        nonlocal backfill, current, has_code
+        if has_code:
+            statements.append(Statement(''.join(current).strip(), backfill))
+            backfill = None
+        current = []
+        has_code = False
+
+    while i < len(sql):
+        char = sql[i]
+        if sql.startswith('--', i):
+            end = sql.find('\n', i)
+            end = len(sql) if end == -1 else end
+            comment = sql[i:end].strip()
+            directive = _DIRECTIVE.match(comment)
+            if directive:
+                keyword, rest = directive.group(1), directive.group(2).strip()
+                if keyword == 'backfill':
+                    backfill = _parse_options(rest)
+                else:
+                    options[keyword] = rest
+            elif has_code:
+                current.append(sql[i:end])
+            i = end
+            continue
+        if sql.startswith('/*', i):
+            end = sql.find('*/', i)
+            end = len(sql) if end == -1 else end + 2
+            current.append(sql[i:end])
+            i = end
+            continue
+        if char in ("'", '"'):
+            end = i + 1
+            while end < len(sql):
+                if sql[end] == char:
+                    # A doubled quote is an escaped quote
+                    if sql.startswith(char * 2, end):
+                        end += 2
+                        continue
+                    break
+                end += 1
+            current.append(sql[i:end + 1])
+            has_code = True
+            i = end + 1
+            continue
+        dollar = _DOLLAR_QUOTE.match(sql, i) if char == '$' else None
+        if dollar:
+            end = sql.find(dollar.group(0), dollar.end())
+            end = len(sql) if end == -1 else end + len(dollar.group(0))
+            current.append(sql[i:end])
+            has_code = True
+            i = end
+            continue
+        if char == ';':
+            finish()
+        else:
+            current.append(char)
+            has_code = has_code or not char.isspace()
+        i += 1
+    finish()
+    return statements, options
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Every migration in directory, in version order"""
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = _FILENAME.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(f'{filename} and {migrations[version].filename} share version {version}')
+        path = os.path.join(directory, filename)
+        with open(path, newline='') as f:
+            migrations[version] = Migration(version, match.group(2), path, f.read())
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def applied_migrations(engine):
+    """{version: schema_migrations row}; creates the table on first use"""
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        return {row.version: row for row in conn.execute(select(schema_migrations))}
+
+
+def pending_migrations(engine, directory=MIGRATIONS_DIR, target=None):
+    """Migrations not yet applied that apply to engine's database, up to target"""
+    applied = applied_migrations(engine)
+    return [
+        migration for migration in load_migrations(directory)
+        if migration.version not in applied
+        and migration.applies_to(engine.dialect.name)
+        and (target is None or migration.version <= target)
+    ]
+
+
+def migration_status(engine, directory=MIGRATIONS_DIR):
+    """One entry per migration file or recorded version: applied, pending, modified, skipped or missing"""
+    applied = applied_migrations(engine)
+    migrations = {migration.version: migration for migration in load_migrations(directory)}
+    status = []
+    for version in sorted(set(applied) | set(migrations)):
+        migration, row = migrations.get(version), applied.get(version)
+        if migration is None:
+            state = 'missing'
+        elif row is None:
+            state = 'pending' if migration.applies_to(engine.dialect.name) else 'skipped'
+        elif row.checksum != migration.checksum and not row.baseline:
+            state = 'modified'
+        else:
+            state = 'applied'
+        status.append({
+            'version': version,
+            'name': migration.name if migration else row.name,
+            'state': state,
+            'applied_at': row.applied_at if row else None,
+            'baseline': bool(row and row.baseline)
+        })
+    return status
+
+
+def baseline(engine, directory=MIGRATIONS_DIR, version=None):
+    """Record migrations up to version (default: all) as applied without running them.
+
+    For databases whose schema already matches, such as one built by
+    create_tables.py (db.create_all) or one migrated by hand before the
+    version table existed. Returns the versions recorded.
+    """
+    applied = applied_migrations(engine)
+    now = datetime.utcnow()
+    rows = [
+        {'version': m.version, 'name': m.name, 'checksum': m.checksum, 'applied_at': now,
+         'duration_ms': None, 'baseline': True}
+        for m in load_migrations(directory)
+        if m.version not in applied and (version is None or m.version <= version)
+    ]
+    if rows:
+        with engine.begin() as conn:
+            conn.execute(schema_migrations.insert(), rows)
+    return [row['version'] for row in rows]
+
+
+def _index_children(conn, table, name, rest, unique):
+    """Steps building an index on a partitioned Postgres table without locking it.
+
+    CREATE INDEX CONCURRENTLY is not supported on a partitioned table. The
+    documented equivalent: an invalid index on the parent only, a concurrent
+    build on each partition, each attached to the parent, which becomes valid
+    once every partition has one.
+    """
+    unique = 'UNIQUE ' if unique else ''
+    partitions = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table ORDER BY c.relname"
+    ), {'table': table}).scalars().all()
+
+    steps = [f'CREATE {unique}INDEX IF NOT EXISTS {name} ON ONLY {table} {rest}']
+    for partition in partitions:
+        suffix = partition[len(table):] if partition.startswith(table) else f'_{partition}'
+        child = f'{name}{suffix}'[:63]
+        steps.append(f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {child} ON {partition} {rest}')
+        steps.append(('attach', name, child))
+    return steps
+
+
+def _is_partitioned(conn, table):
+    return bool(conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table"
+    ), {'table': table}).scalar())
+
+
+def _drop_invalid_index(conn, name):
+    """An interrupted CONCURRENTLY build leaves an invalid index that IF NOT EXISTS would keep"""
+    invalid = conn.execute(text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {'name': name}).scalar()
+    if invalid:
+        conn.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+def _for_sqlite(conn, sql):
+    """sql as SQLite takes it, or None when it has nothing left to do"""
+    for pattern, replacement in _SQLITE_REWRITES:
+        sql = pattern.sub(replacement, sql)
+
+    match = _ADD_COLUMN_IF_NOT_EXISTS.match(sql)
+    if match:
+        # SQLite has no ADD COLUMN IF NOT EXISTS, so look the column up first
+        columns = {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{match.group(1)}")')}
+        if match.group(3) in columns:
+            return None
+        sql = sql[:match.start(2)] + sql[match.end(2):]
+    return sql
+
+
+def expand(conn, statement):
+    """What running statement on conn's database takes: SQL strings and ('attach', index, child) steps"""
+    sql = statement.sql
+    if conn.dialect.name == 'sqlite':
+        sql = _for_sqlite(conn, sql)
+        if sql is None:
+            return []
+
+    if not statement.concurrent:
+        return [sql]
+    if conn.dialect.name != 'postgresql':
+        # Only Postgres builds indexes online; elsewhere the keyword is a syntax error
+        return [_CONCURRENTLY.sub('', sql, count=1)]
+
+    match = _CREATE_INDEX.match(sql)
+    if match and _is_partitioned(conn, match.group(3)):
+        return _index_children(conn, match.group(3), match.group(2), match.group(4).strip(), match.group(1))
+    return [sql]
+
+
+def _run_step(conn, step):
+    if isinstance(step, tuple):
+        _, parent, child = step
+        attached = conn.execute(text(
+            "SELECT 1 FROM pg_inherits WHERE inhrelid = CAST(:child AS regclass)"
+        ), {'child': child}).scalar()
+        if not attached:
+            conn.exec_driver_sql(f'ALTER INDEX {parent} ATTACH PARTITION {child}')
+        return
+
+    match = _CREATE_INDEX.match(step) if conn.dialect.name == 'postgresql' else None
+    if match:
+        _drop_invalid_index(conn, match.group(2))
+    conn.exec_driver_sql(step)
+
+
+def _backfill(engine, statement, batch_size, pause_ms, log):
+    """Repeat statement, one committed batch at a time, until a batch comes back short.
+
+    The statement limits itself with :batch_size (UPDATE ... WHERE id IN
+    (SELECT id ... WHERE <not yet done> LIMIT :batch_size)), so each batch
+    holds row locks briefly and circulation writes interleave with it.
+    """
+    batch_size = statement.backfill.get('batch_size', batch_size or BACKFILL_BATCH_SIZE)
+    pause_ms = statement.backfill.get('pause_ms', BACKFILL_PAUSE_MS if pause_ms is None else pause_ms)
+    sql = statement.sql.replace(':batch_size', str(int(batch_size)))
+    total = batches = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.exec_driver_sql(sql).rowcount
+        total += rows
+        batches += 1
+        log(f'    backfilled {total} rows in {batches} batches')
+        if rows < batch_size:
+            return total
+        time.sleep(pause_ms / 1000)
+
+
+def _set_lock_timeout(conn, lock_timeout, local):
+    if lock_timeout and conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql(f"SET {'LOCAL ' if local else ''}lock_timeout = '{lock_timeout}'")
+
+
+def _lock_not_available(error):
+    return getattr(error.orig, 'pgcode', None) == '55P03'
+
+
+def _record(conn, migration, duration_ms):
+    conn.execute(schema_migrations.insert().values(
+        version=migration.version, name=migration.name, checksum=migration.checksum,
+        applied_at=datetime.utcnow(), duration_ms=round(duration_ms, 3), baseline=False
+    ))
+
+
+def _apply_in_transaction(engine, migration, lock_timeout, retries, log):
+    """All statements and the version row commit together; retried when DDL cannot get its lock in time"""
+    for attempt in range(retries + 1):
+        started = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                if conn.dialect.name == 'sqlite':
+                    # pysqlite only opens its implicit transaction before DML, so DDL would autocommit
+                    conn.exec_driver_sql('BEGIN')
+                # Waiting behind a long transaction would queue every query on the table behind us
+                _set_lock_timeout(conn, lock_timeout, local=True)
+                for statement in migration.statements:
+                    for step in expand(conn, statement):
+                        _run_step(conn, step)
+                _record(conn, migration, (time.perf_counter() - started) * 1000)
+            return
+        except OperationalError as e:
+            if not _lock_not_available(e) or attempt == retries:
+                raise
+            log(f'    lock not available, retrying ({attempt + 1}/{retries})')
+            time.sleep(2 ** attempt)
+
+
+def _apply_online(engine, migration, batch_size, pause_ms, lock_timeout, log):
+    """Statement by statement in autocommit mode; the version is recorded once all have run"""
+    started = time.perf_counter()
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        _set_lock_timeout(conn, lock_timeout, local=False)
+        for statement in migration.statements:
+            if statement.backfill is not None:
+                _backfill(engine, statement, batch_size, pause_ms, log)
+                continue
+            for step in expand(conn, statement):
+                _run_step(conn, step)
+    with engine.begin() as conn:
+        _record(conn, migration, (time.perf_counter() - started) * 1000)
+
+
+def describe(engine, migration, batch_size=None, pause_ms=None):
+    """Lines saying how migration would run, for --dry-run"""
+    lines = [f"{migration.filename} ({'transaction' if migration.transactional else 'online, statement by statement'})"]
+    with engine.connect() as conn:
+        for statement in migration.statements:
+            if statement.backfill is not None:
+                size = statement.backfill.get('batch_size', batch_size or BACKFILL_BATCH_SIZE)
+                pause = statement.backfill.get('pause_ms', BACKFILL_PAUSE_MS if pause_ms is None else pause_ms)
+                lines.append(f'  -- backfill in batches of {size}, {pause} ms apart')
+                lines.append('  ' + statement.sql.replace(':batch_size', str(size)) + ';')
+                continue
+            for step in expand(conn, statement):
+                if isinstance(step, tuple):
+                    lines.append(f'  ALTER INDEX {step[1]} ATTACH PARTITION {step[2]};')
+                else:
+                    lines.append(f'  {step};')
+        conn.rollback()
+    return lines
+
+
+def migrate(engine, directory=MIGRATIONS_DIR, target=None, dry_run=False, batch_size=None,
+            pause_ms=None, lock_timeout='5s', retries=3, log=None):
+    """Apply pending migrations in version order; returns the versions applied (or that would be).
+
+    Stops at the first failure with MigrationError. A transactional
+    migration leaves nothing behind; an online one keeps the statements that
+    completed, and running migrate() again picks it up from the start.
+    """
+    log = log or (lambda message: None)
+    pending = pending_migrations(engine, directory, target)
+    if dry_run:
+        for migration in pending:
+            for line in describe(engine, migration, batch_size, pause_ms):
+                log(line)
+        return [migration.version for migration in pending]
+
+    lock = None
+    if engine.dialect.name == 'postgresql':
+        # Autocommit: an idle open transaction would hold a snapshot that CONCURRENTLY builds wait on
+        lock = engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        lock.exec_driver_sql(f'SELECT pg_advisory_lock({ADVISORY_LOCK_ID})')
+        # Another process may have applied some while we waited for the lock
+        pending = pending_migrations(engine, directory, target)
+
+    applied = []
+    try:
+        for migration in pending:
+            log(f'Applying {migration.filename}')
+            started = time.perf_counter()
+            try:
+                if migration.transactional:
+                    _apply_in_transaction(engine, migration, lock_timeout, retries, log)
+                else:
+                    _apply_online(engine, migration, batch_size, pause_ms, lock_timeout, log)
+            except Exception as e:
+                raise MigrationError(f'{migration.filename} failed: {e}') from e
+            log(f'  done in {time.perf_counter() - started:.1f}s')
+            applied.append(migration.version)
+    finally:
+        if lock is not None:
+            lock.exec_driver_sql(f'SELECT pg_advisory_unlock({ADVISORY_LOCK_ID})')
+            lock.close()
+    return applied
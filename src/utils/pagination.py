@@ -0,0 +1,36 @@
+import base64
+import json
+from datetime import date, datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page into an opaque cursor"""
+    serializable = [
+        value.isoformat() if isinstance(value, (date, datetime)) else value
+        for value in values
+    ]
+    raw = json.dumps(serializable, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, raising ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii'))
+        values = json.loads(raw)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+
+    return values
+
+
+def get_page_size(args, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Read the `limit` query argument, clamped to [1, maximum]"""
+    limit = args.get('limit', default, type=int)
+    return max(1, min(limit, maximum))
@@ -0,0 +1,105 @@
+from src.app_factory import db
+from src.models import BorrowRecord, BorrowRecordArchive
+from sqlalchemy import delete, insert, literal, select, text, union_all
+from datetime import date, datetime
+
+# Columns shared by borrow_records and borrow_records_archive
+ARCHIVED_COLUMNS = (
+    'id', 'user_id', 'book_id', 'borrow_date', 'due_date',
+    'return_date', 'fine', 'status', 'created_at'
+)
+
+
+def _months_before(today, months):
+    """Return the first day of the month `months` months before today"""
+    month_index = today.year * 12 + (today.month - 1) - months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def is_partitioned():
+    """True when borrow_records is a declaratively partitioned Postgres table"""
+    if db.engine.dialect.name != 'postgresql':
+        return False
+
+    return bool(db.session.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'borrow_records'"
+    )).scalar())
+
+
+def ensure_borrow_record_partitions(years_ahead=1, today=None):
+    """Create yearly borrow_records partitions up to years_ahead past this year.
+
+    A no-op unless borrow_records has been converted by migration 009. Run it
+    from the same scheduled job as the archival so inserts never fall into
+    the default partition.
+    """
+    if not is_partitioned():
+        return []
+
+    today = today or date.today()
+    created = []
+    for year in range(today.year, today.year + years_ahead + 1):
+        name = f'borrow_records_{year}'
+        db.session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF borrow_records "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        ))
+        created.append(name)
+
+    db.session.commit()
+    return created
+
+
+def archive_closed_loans(older_than_months=24, batch_size=1000, today=None):
+    """Move returned loans borrowed before the cutoff into borrow_records_archive.
+
+    Each batch is copied and deleted in one transaction, so a loan is always
+    in exactly one of the two tables. Open loans are never archived however
+    old they are. Returns the number of loans moved.
+    """
+    cutoff = _months_before(today or date.today(), older_than_months)
+    record_columns = [getattr(BorrowRecord, name) for name in ARCHIVED_COLUMNS]
+    archive_columns = [getattr(BorrowRecordArchive, name) for name in ARCHIVED_COLUMNS]
+    moved = 0
+
+    while True:
+        batch_ids = db.session.execute(
+            select(BorrowRecord.id)
+            .where(
+                BorrowRecord.borrow_date < cutoff,
+                BorrowRecord.return_date.isnot(None)
+            )
+            .order_by(BorrowRecord.borrow_date, BorrowRecord.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not batch_ids:
+            break
+
+        db.session.execute(
+            insert(BorrowRecordArchive).from_select(
+                archive_columns + [BorrowRecordArchive.archived_at],
+                select(*record_columns, literal(datetime.utcnow()))
+                .where(BorrowRecord.id.in_(batch_ids))
+            )
+        )
+        db.session.execute(
+            delete(BorrowRecord).where(BorrowRecord.id.in_(batch_ids))
+        )
+        db.session.commit()
+        moved += len(batch_ids)
+
+    return moved
+
+
+def all_borrow_records():
+    """Selectable over live and archived loans, for analytics queries.
+
+    Filter on borrow_date where possible: on Postgres the live side then
+    prunes to the matching partitions.
+    """
+    return union_all(
+        select(*[getattr(BorrowRecord, name) for name in ARCHIVED_COLUMNS]),
+        select(*[getattr(BorrowRecordArchive, name) for name in ARCHIVED_COLUMNS])
+    ).subquery('all_borrow_records')
@@ -0,0 +1,150 @@
+import hashlib
+import hmac
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from flask import current_app, has_app_context, jsonify
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+)
+
+DEFAULT_HASH_METHOD = 'pbkdf2:sha256:600000'
+DEFAULT_SALT_LENGTH = 16
+
+# Unsalted sha256 hex digests written by the old insert_test_data*.py seeders
+LEGACY_SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing executor already has its full queue of work,
+    or a hash waited longer than the hasher's timeout"""
+
+
+def normalize_method(method):
+    """Spell out the defaults Werkzeug fills in, so stored hashes compare equal"""
+    parts = method.split(':')
+    if parts[0] == 'pbkdf2':
+        hash_name = parts[1] if len(parts) > 1 else 'sha256'
+        iterations = parts[2] if len(parts) > 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    if parts[0] == 'scrypt':
+        defaults = ['32768', '8', '1']
+        n, r, p = parts[1:] + defaults[len(parts) - 1:]
+        return f'scrypt:{n}:{r}:{p}'
+    return method
+
+
+def needs_rehash(stored_hash, method=DEFAULT_HASH_METHOD, salt_length=DEFAULT_SALT_LENGTH):
+    """True if stored_hash was written with other parameters than the configured ones"""
+    if LEGACY_SHA256_PATTERN.match(stored_hash):
+        return True
+
+    try:
+        stored_method, salt, _ = stored_hash.split('$', 2)
+    except ValueError:
+        return True
+
+    return normalize_method(stored_method) != normalize_method(method) or len(salt) != salt_length
+
+
+def _check(stored_hash, password):
+    """Compare a password against a Werkzeug hash or a legacy sha256 digest"""
+    if LEGACY_SHA256_PATTERN.match(stored_hash):
+        legacy = hashlib.sha256(password.encode('utf-8')).hexdigest()
+        return hmac.compare_digest(legacy, stored_hash)
+    return check_password_hash(stored_hash, password)
+
+
+class PasswordHasher:
+    """Runs password hashing on a small dedicated thread pool.
+
+    PBKDF2 and scrypt release the GIL, so a few threads keep the CPU busy
+    while request threads stay free for cheap reads. At most
+    workers + queue_depth hashes are admitted at once; beyond that callers
+    get PasswordHasherBusy immediately instead of queueing behind a burst.
+    """
+
+    def __init__(self, method=DEFAULT_HASH_METHOD, salt_length=DEFAULT_SALT_LENGTH,
+                 workers=2, queue_depth=32, timeout=30):
+        self.method = method
+        self.salt_length = salt_length
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+
+    def submit(self, fn, *args):
+        """Run fn on the executor and wait for it, or raise PasswordHasherBusy.
+
+        A hash still queued when the timeout passes is cancelled; one already
+        running finishes in the background and then frees its slot.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError as e:
+            future.cancel()
+            raise PasswordHasherBusy() from e
+
+    def hash(self, password):
+        """Hash a password with the configured method and salt length"""
+        return self.submit(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, stored_hash, password):
+        """Return (matches, needs_rehash) for a password against a stored hash"""
+        matches = self.submit(_check, stored_hash, password)
+        return matches, matches and needs_rehash(stored_hash, self.method, self.salt_length)
+
+    def shutdown(self):
+        """Stop accepting work; in-flight hashes finish in the background"""
+        self._executor.shutdown(wait=False)
+
+
+def init_password_hasher(app):
+    """Create the app's PasswordHasher from config and map saturation to 503"""
+    app.extensions['password_hasher'] = PasswordHasher(
+        method=app.config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD),
+        salt_length=app.config.get('PASSWORD_SALT_LENGTH', DEFAULT_SALT_LENGTH),
+        workers=app.config.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)),
+        queue_depth=app.config.get('PASSWORD_HASH_QUEUE_DEPTH', 32),
+        timeout=app.config.get('PASSWORD_HASH_TIMEOUT', 30)
+    )
+
+    @app.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy(_):
+        response = jsonify({'error': 'Server busy, please retry shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+
+_fallback_hasher = None
+
+
+def get_password_hasher():
+    """Return the current app's hasher, or a default one outside an app context"""
+    if has_app_context() and 'password_hasher' in current_app.extensions:
+        return current_app.extensions['password_hasher']
+
+    global _fallback_hasher
+    if _fallback_hasher is None:
+        _fallback_hasher = PasswordHasher(workers=1, queue_depth=1000)
+    return _fallback_hasher
+
+
+def hash_password(password):
+    """Hash a password on the bounded executor"""
+    return get_password_hasher().hash(password)
+
+
+def verify_password(stored_hash, password):
+    """Return (matches, needs_rehash) using the bounded executor"""
+    return get_password_hasher().verify(stored_hash, password)
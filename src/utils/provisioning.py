@@ -0,0 +1,204 @@
+import csv
+import io
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app
+from sqlalchemy import func, insert, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+
+from src.app_factory import db
+from src.models import ProvisioningJob, User
+from src.utils.passwords import DEFAULT_HASH_METHOD
+
+REQUIRED_COLUMNS = ('fullname', 'email', 'username', 'password')
+
+# Keeps IN (...) lists well inside every backend's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+
+def _hash(args):
+    """Process-pool entry point: hash one password"""
+    password, method = args
+    return generate_password_hash(password, method)
+
+
+def read_roster(stream):
+    """Parse a CSV roster into (row_number, row) pairs and per-row errors"""
+    if isinstance(stream, bytes):
+        stream = io.StringIO(stream.decode('utf-8-sig'))
+
+    reader = csv.DictReader(stream)
+    missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Roster is missing columns: {', '.join(missing)}")
+
+    rows, errors = [], []
+    for row_number, row in enumerate(reader, start=2):
+        row = {key: (row.get(key) or '').strip() for key in REQUIRED_COLUMNS}
+        empty = [key for key in REQUIRED_COLUMNS if not row[key]]
+        if empty:
+            errors.append({'row': row_number, 'username': row['username'],
+                           'error': f"Missing {', '.join(empty)}"})
+            continue
+        row['email'] = row['email'].lower()
+        rows.append((row_number, row))
+
+    return rows, errors
+
+
+def _existing(column, values):
+    """Return which of values already exist in a users column, chunk by chunk"""
+    found = set()
+    values = list(values)
+    for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        chunk = values[start:start + LOOKUP_CHUNK_SIZE]
+        found.update(v for (v,) in db.session.query(column).filter(column.in_(chunk)))
+    return found
+
+
+def _student(row, password_hash):
+    return {
+        'fullname': row['fullname'],
+        'email': row['email'],
+        'username': row['username'],
+        'password_hash': password_hash,
+        'role': 'student'
+    }
+
+
+def _insert_one_by_one(batch, hashes, errors):
+    """Insert a batch that clashed with accounts created meanwhile, row by row.
+
+    Each row gets its own savepoint, so a clash is reported as that row's
+    error and the rest of the batch is still created. Returns the number
+    created.
+    """
+    created = 0
+    for (row_number, row), password_hash in zip(batch, hashes):
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(User), [_student(row, password_hash)])
+            created += 1
+        except IntegrityError:
+            errors.append({'row': row_number, 'username': row['username'],
+                           'error': 'Username or email already exists'})
+    db.session.commit()
+    return created
+
+
+def provision_students(rows, errors=None, batch_size=1000, processes=None,
+                       method=None, progress=None):
+    """Create student accounts for roster rows in bulk.
+
+    Usernames and emails are checked against one preloaded set of existing
+    values instead of two queries per row, passwords are hashed across a
+    process pool, and users are inserted in multi-row batches committed one
+    batch at a time. progress(done, total) is called after each batch.
+    A batch that clashes with accounts created while the import runs is
+    retried row by row, and the rows that clash are reported as errors.
+    Returns a report with the number created and per-row errors.
+    """
+    errors = list(errors or [])
+    method = method or current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+    # More hashing processes than CPUs only adds start-up time and memory
+    cpus = os.cpu_count() or 1
+    processes = max(1, min(processes or cpus, cpus))
+
+    taken_usernames = _existing(User.username, {row['username'] for _, row in rows})
+    taken_emails = _existing(func.lower(User.email), {row['email'] for _, row in rows})
+
+    accepted = []
+    for row_number, row in rows:
+        if row['username'] in taken_usernames:
+            errors.append({'row': row_number, 'username': row['username'], 'error': 'Username already exists'})
+        elif row['email'] in taken_emails:
+            errors.append({'row': row_number, 'username': row['username'], 'error': 'Email already exists'})
+        else:
+            # Later duplicates within the same roster are rejected too
+            taken_usernames.add(row['username'])
+            taken_emails.add(row['email'])
+            accepted.append((row_number, row))
+
+    created = done = 0
+    total = len(accepted)
+    context = multiprocessing.get_context('spawn')
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+        for start in range(0, total, batch_size):
+            batch = accepted[start:start + batch_size]
+            hashes = list(pool.map(_hash, [(row['password'], method) for _, row in batch], chunksize=32))
+
+            try:
+                db.session.execute(insert(User), [
+                    _student(row, password_hash) for (_, row), password_hash in zip(batch, hashes)
+                ])
+                db.session.commit()
+                created += len(batch)
+            except IntegrityError:
+                db.session.rollback()
+                created += _insert_one_by_one(batch, hashes, errors)
+
+            done += len(batch)
+            if progress:
+                progress(done, total)
+
+    errors.sort(key=lambda error: error['row'])
+    return {'created': created, 'errors': errors}
+
+
+class ProvisioningJobs:
+    """Runs roster imports on background threads, keeping their progress in provisioning_jobs.
+
+    The import runs in the worker that received the upload, but its status
+    row can be read from any worker.
+    """
+
+    def start(self, app, roster, **options):
+        """Start importing roster bytes in the background and return the job id"""
+        job_id = uuid.uuid4().hex
+        rows, errors = read_roster(roster)
+        db.session.add(ProvisioningJob(id=job_id, status='running', total=len(rows), errors=errors))
+        db.session.commit()
+
+        def run():
+            with app.app_context():
+                try:
+                    report = provision_students(
+                        rows, errors,
+                        progress=lambda done, total: self._update(job_id, done=done, total=total),
+                        **options
+                    )
+                    self._update(job_id, status='finished', **report)
+                except Exception as e:
+                    db.session.rollback()
+                    self._update(job_id, status='failed', error=str(e))
+
+        threading.Thread(target=run, name=f'provision-{job_id}', daemon=True).start()
+        return job_id
+
+    def _update(self, job_id, **fields):
+        db.session.execute(update(ProvisioningJob).where(ProvisioningJob.id == job_id).values(**fields))
+        db.session.commit()
+
+    def get(self, job_id):
+        """Return a snapshot of a job's state, or None if unknown"""
+        job = db.session.get(ProvisioningJob, job_id)
+        if job is None:
+            return None
+        return {
+            'id': job.id,
+            'status': job.status,
+            'total': job.total,
+            'done': job.done,
+            'created': job.created,
+            'errors': job.errors,
+            'error': job.error
+        }
+
+
+provisioning_jobs = ProvisioningJobs()
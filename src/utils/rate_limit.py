@@ -0,0 +1,206 @@
+import io
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from werkzeug.exceptions import HTTPException
+from werkzeug.wrappers import Request, Response
+
+# Endpoints that do expensive work (password hashing, unique lookups)
+# before they can reject anything
+LIMITED_ENDPOINTS = ('auth.login', 'auth.register')
+
+# Larger bodies on a limited endpoint are not parsed for a username; the IP bucket still applies
+MAX_LIMITED_BODY = 16 * 1024
+
+UNITS = {'second': 1, 'minute': 60, 'hour': 3600}
+
+
+def parse_rate(rate):
+    """Parse '5/minute' into (capacity, tokens refilled per second)"""
+    count, unit = rate.split('/')
+    count = float(count)
+    return count, count / UNITS[unit.strip()]
+
+
+class MemoryBucketStore:
+    """Token buckets for this process, bounded to max_keys most recent keys"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate, now):
+        """Take one token from key's bucket; return seconds to wait, 0 if allowed"""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+
+            if tokens >= 1:
+                wait = 0
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / refill_rate
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class SqliteBucketStore:
+    """Token buckets shared by every worker on a host through a SQLite file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS rate_limit_buckets ('
+            'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, capacity, refill_rate, now):
+        """Take one token from key's bucket; return seconds to wait, 0 if allowed"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?', (key,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+
+            if tokens >= 1:
+                wait = 0
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / refill_rate
+
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+
+class RateLimiter:
+    """Token-bucket limits per client IP and per submitted username.
+
+    Checked by RateLimitMiddleware from nothing but the request line and
+    body, so an over-limit request costs no database query and no password
+    hash.
+    """
+
+    def __init__(self, store=None, ip_rate='20/minute', username_rate='5/minute'):
+        self.store = store or MemoryBucketStore()
+        self.ip_limit = parse_rate(ip_rate)
+        self.username_limit = parse_rate(username_rate)
+        self.counters = defaultdict(lambda: {'allowed': 0, 'rejected': 0})
+        self._lock = threading.Lock()
+
+    def _count(self, endpoint, outcome):
+        with self._lock:
+            self.counters[endpoint][outcome] += 1
+
+    def check(self, endpoint, ip, username=None, now=None):
+        """Return seconds until the request may proceed, 0 if it may proceed now.
+
+        The username bucket is only charged for requests the IP bucket lets
+        through, so one client cannot drain another user's bucket and lock
+        them out.
+        """
+        now = time.time() if now is None else now
+        wait = self.store.take(f'{endpoint}:ip:{ip}', *self.ip_limit, now)
+
+        if username and not wait:
+            key = f'{endpoint}:user:{username.strip().lower()}'
+            wait = max(wait, self.store.take(key, *self.username_limit, now))
+
+        self._count(endpoint, 'rejected' if wait else 'allowed')
+        return wait
+
+    def snapshot(self):
+        """Copy of the allowed/rejected counters per endpoint"""
+        with self._lock:
+            return {endpoint: dict(counts) for endpoint, counts in self.counters.items()}
+
+
+class RateLimitMiddleware:
+    """WSGI middleware that applies a RateLimiter before Flask handles the request.
+
+    Flask opens the session (a web_sessions read with SESSION_BACKEND=sql)
+    while it pushes the request context, before any before_request hook, so
+    the limiter sits in front of the Flask app instead.
+    """
+
+    def __init__(self, app, wsgi_app, limiter):
+        self.app = app
+        self.wsgi_app = wsgi_app
+        self.limiter = limiter
+
+    def _endpoint(self, request):
+        try:
+            endpoint, _ = self.app.create_url_adapter(request).match()
+        except HTTPException:
+            return None
+        return endpoint
+
+    def _username(self, request, environ):
+        """The submitted username, leaving the body readable for the app"""
+        if not request.is_json or (request.content_length or 0) > MAX_LIMITED_BODY:
+            return None
+        body = request.get_data()
+        environ['wsgi.input'] = io.BytesIO(body)
+        environ['CONTENT_LENGTH'] = str(len(body))
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return None
+        username = data.get('username') if isinstance(data, dict) else None
+        return username if isinstance(username, str) else None
+
+    def __call__(self, environ, start_response):
+        if self.app.config.get('RATE_LIMIT_ENABLED', True):
+            request = Request(environ)
+            endpoint = self._endpoint(request)
+            if endpoint in LIMITED_ENDPOINTS:
+                username = self._username(request, environ)
+                wait = self.limiter.check(endpoint, request.remote_addr, username)
+                if wait:
+                    response = Response(
+                        json.dumps({'error': 'Too many attempts, please retry later'}),
+                        status=429,
+                        mimetype='application/json',
+                        headers={'Retry-After': str(int(wait) + 1)}
+                    )
+                    return response(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+
+def init_rate_limiting(app):
+    """Attach a RateLimiter and check it ahead of the app for the limited endpoints"""
+    store_path = app.config.get('RATE_LIMIT_DB')
+    limiter = RateLimiter(
+        store=SqliteBucketStore(store_path) if store_path else MemoryBucketStore(),
+        ip_rate=app.config.get('RATE_LIMIT_IP', '20/minute'),
+        username_rate=app.config.get('RATE_LIMIT_USERNAME', '5/minute')
+    )
+    app.extensions['rate_limiter'] = limiter
+    app.wsgi_app = RateLimitMiddleware(app, app.wsgi_app, limiter)
@@ -0,0 +1,199 @@
+import itertools
+import math
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.sql.dml import UpdateBase
+
+from src.utils.db_pool import build_engine_options
+
+# GET endpoints that only read and tolerate data a few seconds old
+REPLICA_BLUEPRINTS = ('books',)
+REPLICA_ENDPOINTS = (
+    'admin.get_admin_stats',
+    'admin.get_admin_forecast',
+    'admin.get_all_books',
+    'users.get_users'
+)
+
+# Until this Unix time the client's reads stay on the primary
+READ_PRIMARY_COOKIE = 'read_primary_until'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingSession(Session):
+    """db.session that sends a replica-routed request's reads to its replica.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary,
+    so a view that unexpectedly writes still writes to the right place.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context():
+            replica = g.get('_replica')
+            if replica is not None and not isinstance(clause, UpdateBase):
+                return replica.engine
+        return super().get_bind(mapper, clause, bind=bind, **kwargs)
+
+
+class Replica:
+    """One read replica and the result of its last health check"""
+
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.healthy = False
+        self.lag_seconds = None
+        self.error = None
+        self.checked_at = None
+
+    def mark_down(self, error):
+        self.healthy = False
+        self.error = error
+
+    def snapshot(self):
+        return {
+            'name': self.name,
+            'url': self.engine.url.render_as_string(hide_password=True),
+            'healthy': self.healthy,
+            'lag_seconds': self.lag_seconds,
+            'error': self.error,
+            'checked_at': self.checked_at.isoformat() if self.checked_at else None
+        }
+
+
+class ReplicaSet:
+    """Health-checked replicas, handed out round-robin to read-only requests.
+
+    Lag is measured on the events log, which every circulation and catalog
+    change appends to: a replica is as far behind as the oldest event the
+    primary has and it does not. That works the same for Postgres streaming
+    replicas and for SQLite copies used locally. A replica that fails its
+    check, drops a connection or lags more than max_lag_seconds gets no
+    reads until a later check passes; with none left, reads use the primary.
+    """
+
+    def __init__(self, replicas, max_lag_seconds=5, check_interval=5):
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.last_check = None
+        self._check_lock = threading.Lock()
+        self._next = itertools.count()
+
+        for replica in replicas:
+            event.listen(replica.engine, 'handle_error', self._on_error(replica))
+
+    @staticmethod
+    def _on_error(replica):
+        def handle_error(context):
+            if context.is_disconnect:
+                replica.mark_down(str(context.original_exception))
+        return handle_error
+
+    def check(self, primary_engine, now=None):
+        """Measure every replica's health and lag against the primary"""
+        from src.models import Event
+
+        now = now or datetime.utcnow()
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    replica_last = conn.execute(select(func.max(Event.id))).scalar() or 0
+                with primary_engine.connect() as conn:
+                    oldest_missing = conn.execute(
+                        select(func.min(Event.created_at)).where(Event.id > replica_last)
+                    ).scalar()
+            except Exception as e:
+                replica.mark_down(str(e))
+                replica.lag_seconds = None
+            else:
+                replica.lag_seconds = max((now - oldest_missing).total_seconds(), 0) if oldest_missing else 0.0
+                replica.healthy = replica.lag_seconds <= self.max_lag_seconds
+                replica.error = None if replica.healthy else 'Replication lag too high'
+            replica.checked_at = now
+
+        self.last_check = time.monotonic()
+
+    def choose(self, primary_engine):
+        """A healthy replica for the next read-only request, or None for the primary"""
+        due = self.last_check is None or time.monotonic() - self.last_check >= self.check_interval
+        # One thread re-checks; the others keep using the last results meanwhile
+        if due and self._check_lock.acquire(blocking=self.last_check is None):
+            try:
+                self.check(primary_engine)
+            finally:
+                self._check_lock.release()
+
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+    def snapshot(self):
+        return [replica.snapshot() for replica in self.replicas]
+
+
+def create_replica_engines(config):
+    """One engine per REPLICA_DATABASE_URLS entry, with the primary's pool settings"""
+    urls = [url.strip() for url in (config.get('REPLICA_DATABASE_URLS') or '').split(',') if url.strip()]
+    return [
+        create_engine(url, **build_engine_options(dict(config, SQLALCHEMY_DATABASE_URI=url)))
+        for url in urls
+    ]
+
+
+def _is_replica_endpoint(endpoint):
+    if endpoint in REPLICA_ENDPOINTS:
+        return True
+    return endpoint is not None and endpoint.split('.', 1)[0] in REPLICA_BLUEPRINTS
+
+
+def route_request():
+    """Send read-only requests to a replica unless the client wrote recently"""
+    g._replica = None
+    if request.method not in ('GET', 'HEAD') or not _is_replica_endpoint(request.endpoint):
+        return
+
+    # Read-your-writes: the client's own changes may not have replicated yet
+    try:
+        if float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time():
+            return
+    except ValueError:
+        pass
+
+    primary_engine = current_app.extensions['sqlalchemy'].engine
+    g._replica = current_app.extensions['replicas'].choose(primary_engine)
+
+
+def pin_to_primary(response):
+    """After a write, keep the client's reads on the primary for READ_YOUR_WRITES_SECONDS"""
+    if request.method not in SAFE_METHODS:
+        window = current_app.config.get('READ_YOUR_WRITES_SECONDS', 10)
+        response.set_cookie(
+            READ_PRIMARY_COOKIE, str(math.ceil(time.time() + window)),
+            max_age=window, httponly=True, samesite='Lax'
+        )
+    return response
+
+
+def init_replicas(app):
+    """Route read-only requests to the REPLICA_DATABASE_URLS replicas, if any are set"""
+    engines = create_replica_engines(app.config)
+    if not engines:
+        return None
+
+    replicas = ReplicaSet(
+        [Replica(f'replica_{i}', engine) for i, engine in enumerate(engines)],
+        max_lag_seconds=app.config.get('REPLICA_MAX_LAG_SECONDS', 5),
+        check_interval=app.config.get('REPLICA_CHECK_SECONDS', 5)
+    )
+    app.extensions['replicas'] = replicas
+    app.before_request(route_request)
+    app.after_request(pin_to_primary)
+    return replicas
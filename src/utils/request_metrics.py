@@ -0,0 +1,231 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.utils.histogram import Histogram
+
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+RESPONSE_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# SQL statement count and DB time of the request running in this thread or task
+_current_tally = contextvars.ContextVar('request_sql_tally', default=None)
+
+
+class SqlTally:
+    """Statements issued and time spent in the database by one request"""
+
+    __slots__ = ('endpoint', 'statements', 'db_ms')
+
+    def __init__(self, endpoint=None):
+        self.endpoint = endpoint
+        self.statements = 0
+        self.db_ms = 0.0
+
+
+def start_tally(endpoint=None):
+    """Begin counting SQL for the current request; returns the tally"""
+    tally = SqlTally(endpoint)
+    _current_tally.set(tally)
+    return tally
+
+
+def current_endpoint():
+    """Endpoint of the request running in this thread or task, if any"""
+    tally = _current_tally.get()
+    return tally.endpoint if tally else None
+
+
+def stop_tally():
+    _current_tally.set(None)
+
+
+# The start time lives on the statement's execution context, which is dropped
+# with it when the statement raises; nothing is left behind on the connection
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._request_metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = context._request_metrics_start
+    tally = _current_tally.get()
+    if tally is not None:
+        tally.statements += 1
+        tally.db_ms += (time.perf_counter() - started) * 1000
+
+
+def instrument_engines():
+    """Count statements and DB time on every engine, including replicas and async engines"""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+class EndpointMetrics:
+    """Latency, SQL and response size histograms for one endpoint"""
+
+    def __init__(self):
+        self.latency_ms = Histogram()
+        self.sql_statements = Histogram(SQL_COUNT_BUCKETS)
+        self.db_time_ms = Histogram()
+        self.response_bytes = Histogram(RESPONSE_SIZE_BUCKETS)
+
+
+class RequestMetrics:
+    """Per-endpoint request metrics for this worker, rendered for Prometheus.
+
+    Requests issuing more than query_budget SQL statements are logged as a
+    warning and counted, which is how N+1 query patterns show up.
+    """
+
+    def __init__(self, query_budget=None, logger=None):
+        self.query_budget = query_budget
+        self.logger = logger
+        self.endpoints = defaultdict(EndpointMetrics)
+        self.requests = defaultdict(int)
+        self.over_budget = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, method, status, latency_ms, tally, response_bytes=None):
+        with self._lock:
+            metrics = self.endpoints[endpoint]
+            self.requests[(endpoint, method, status)] += 1
+            over_budget = self.query_budget is not None and tally.statements > self.query_budget
+            if over_budget:
+                self.over_budget[endpoint] += 1
+
+        metrics.latency_ms.observe(latency_ms)
+        metrics.sql_statements.observe(tally.statements)
+        metrics.db_time_ms.observe(tally.db_ms)
+        if response_bytes is not None:
+            metrics.response_bytes.observe(response_bytes)
+
+        if over_budget and self.logger:
+            self.logger.warning(
+                '%s %s issued %d SQL statements (budget %d, %.1f ms in the database)',
+                method, endpoint, tally.statements, self.query_budget, tally.db_ms
+            )
+
+    def render(self, extra=()):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            endpoints = dict(self.endpoints)
+            requests = dict(self.requests)
+            over_budget = dict(self.over_budget)
+
+        lines = _counter(
+            'http_requests_total', 'Requests handled, by endpoint, method and status',
+            [({'endpoint': e, 'method': m, 'status': str(s)}, n) for (e, m, s), n in sorted(requests.items())]
+        )
+        for name, attribute, help_text in (
+            ('http_request_duration_milliseconds', 'latency_ms', 'Request latency'),
+            ('http_request_sql_statements', 'sql_statements', 'SQL statements issued per request'),
+            ('http_request_db_time_milliseconds', 'db_time_ms', 'Time spent executing SQL per request'),
+            ('http_response_size_bytes', 'response_bytes', 'Response body size'),
+        ):
+            lines += _histogram(name, help_text, [
+                ({'endpoint': endpoint}, getattr(metrics, attribute).snapshot())
+                for endpoint, metrics in sorted(endpoints.items())
+            ])
+        lines += _counter(
+            'http_requests_over_query_budget_total', 'Requests that exceeded QUERY_BUDGET SQL statements',
+            [({'endpoint': endpoint}, n) for endpoint, n in sorted(over_budget.items())]
+        )
+        for name, help_text, metric_type, samples in extra:
+            lines += _metric(name, help_text, metric_type, samples)
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _metric(name, help_text, metric_type, samples):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+    lines += [f'{name}{_labels(labels)} {value}' for labels, value in samples]
+    return lines
+
+
+def _counter(name, help_text, samples):
+    return _metric(name, help_text, 'counter', samples)
+
+
+def _histogram(name, help_text, series):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for labels, snapshot in series:
+        for bound, count in snapshot['buckets'].items():
+            lines.append(f'{name}_bucket{_labels(dict(labels, le=bound))} {count}')
+        lines.append(f'{name}_sum{_labels(labels)} {snapshot["sum"]}')
+        lines.append(f'{name}_count{_labels(labels)} {snapshot["count"]}')
+    return lines
+
+
+def _pool_samples(app):
+    """Connection pool gauges and counters from src/utils/db_pool.py, if attached"""
+    metrics = app.extensions.get('pool_metrics')
+    if metrics is None:
+        return []
+
+    snapshot = metrics.snapshot(app.extensions['sqlalchemy'].engine.pool)
+    gauges = [
+        (f'db_pool_{key}', f'Connection pool {key.replace("_", " ")}', 'gauge', [({}, snapshot[key])])
+        for key in ('pool_size', 'checked_out', 'overflow') if key in snapshot
+    ]
+    counters = [
+        (f'db_pool_{key}_total', f'Connection pool {key}', 'counter', [({}, snapshot[key])])
+        for key in ('checkouts', 'timeouts', 'connects', 'invalidations')
+    ]
+    return gauges + counters
+
+
+def render_metrics():
+    """GET /metrics: this worker's request and pool metrics for Prometheus"""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+
+    body = current_app.extensions['request_metrics'].render(extra=_pool_samples(current_app))
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
+def init_request_metrics(app):
+    """Record metrics for every request and serve them at /metrics"""
+    metrics = RequestMetrics(query_budget=app.config.get('QUERY_BUDGET') or None, logger=app.logger)
+    app.extensions['request_metrics'] = metrics
+
+    instrument_engines()
+
+    @app.before_request
+    def start_request_metrics():
+        g._request_started = time.perf_counter()
+        g._sql_tally = start_tally(request.endpoint)
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('_request_started', None)
+        if started is None:
+            return response
+
+        metrics.observe(
+            request.endpoint or 'unmatched',
+            request.method,
+            response.status_code,
+            (time.perf_counter() - started) * 1000,
+            g.pop('_sql_tally'),
+            response.calculate_content_length()
+        )
+        stop_tally()
+        return response
+
+    app.add_url_rule('/metrics', 'metrics', render_metrics, methods=['GET'])
+    return metrics
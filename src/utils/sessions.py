@@ -0,0 +1,266 @@
+import hashlib
+import os
+import struct
+import time
+from datetime import datetime
+
+from cachelib import FileSystemCache
+from flask import g
+from flask_session import Session
+from flask_session.base import ServerSideSessionInterface
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.app_factory import db
+from src.models import WebSession
+from src.utils.cache import TTLCache
+
+SESSION_BACKENDS = ('sql', 'memory', 'filesystem')
+
+# The custom backends below subclass Flask-Session's ServerSideSessionInterface
+# and read cachelib's file format, neither of which is a stable API; both are
+# pinned in requirements.txt to the versions these were written against.
+
+# Flask-Session's own defaults, for settings the app config leaves out
+SESSION_DEFAULTS = {
+    'SESSION_KEY_PREFIX': 'session:',
+    'SESSION_PERMANENT': True,
+    'SESSION_ID_LENGTH': 32,
+    'SESSION_SERIALIZATION_FORMAT': 'msgpack'
+}
+
+# cachelib names each file after the SHA-256 of its key (its default, which
+# Flask-Session keeps); its file counter and half-written files hold no session
+_CACHELIB_HASH = hashlib.sha256
+_CACHELIB_COUNT_FILE = _CACHELIB_HASH(b'__wz_cache_count').hexdigest()
+_CACHELIB_TEMP_SUFFIX = '.__wz_cache'
+
+
+class LegacyFilesystemSessions:
+    """Read-once access to sessions left in the old Flask-Session directory.
+
+    cachelib names each file after a hash of the session key, so old
+    sessions cannot be listed by id. Instead a backend looks up each cookie
+    it does not know here, copies the session over and deletes the file.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.cache = FileSystemCache(directory, hash_method=_CACHELIB_HASH)
+
+    def pop(self, store_id):
+        """Return and delete the legacy session stored under store_id, if any"""
+        data = self.cache.get(store_id)
+        if data is not None:
+            self.cache.delete(store_id)
+        return data
+
+    def _session_files(self):
+        for name in os.listdir(self.directory):
+            if name != _CACHELIB_COUNT_FILE and not name.endswith(_CACHELIB_TEMP_SUFFIX):
+                yield os.path.join(self.directory, name)
+
+    def remove_expired(self, now=None):
+        """Delete expired legacy session files; return (removed, remaining)"""
+        now = time.time() if now is None else now
+        removed = remaining = 0
+
+        for filename in self._session_files():
+            try:
+                with open(filename, 'rb') as f:
+                    expires = struct.unpack('I', f.read(4))[0]
+            except (OSError, struct.error):
+                continue
+
+            if expires != 0 and expires < now:
+                try:
+                    os.remove(filename)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+            else:
+                remaining += 1
+
+        return removed, remaining
+
+
+class _DrainingSessionInterface(ServerSideSessionInterface):
+    """Shared behaviour: fall back to the legacy directory on a miss"""
+
+    legacy = None
+
+    def _decode(self, data):
+        # Older Flask-Session versions pickled the dict itself
+        return data if isinstance(data, dict) else self.serializer.decode(data)
+
+    def _retrieve_session_data(self, store_id):
+        data = self._load(store_id)
+        if data is not None or self.legacy is None:
+            return data
+
+        legacy_data = self.legacy.pop(store_id)
+        if legacy_data is None:
+            return None
+
+        session = self._decode(legacy_data)
+        self._store(store_id, self.serializer.encode(session), datetime.utcnow() + self.app.permanent_session_lifetime)
+        return session
+
+    def _upsert_session(self, session_lifetime, session, store_id):
+        self._store(store_id, self.serializer.encode(session), datetime.utcnow() + session_lifetime)
+
+
+class SqlSessionInterface(_DrainingSessionInterface):
+    """Sessions in the web_sessions table, shared by every worker and container.
+
+    Reads are a single primary-key lookup that ignores expired rows; expired
+    rows are removed in batches by sweep_expired() rather than on the request
+    path. An unmodified session is only rewritten once less than half of its
+    lifetime remains, so most requests do no session write at all.
+    """
+
+    ttl = False
+
+    def __init__(self, app, sweep_batch_size=1000, **options):
+        self.sweep_batch_size = sweep_batch_size
+        super().__init__(app, **options)
+
+    def _load(self, store_id):
+        row = db.session.execute(
+            select(WebSession.data, WebSession.expiry)
+            .where(WebSession.session_id == store_id, WebSession.expiry > datetime.utcnow())
+        ).first()
+        if row is None:
+            return None
+
+        g._session_expiry = row.expiry
+        return self.serializer.decode(row.data)
+
+    def _store(self, store_id, data, expiry):
+        # Separate transaction, so saving the session never commits the view's work
+        with db.engine.begin() as conn:
+            updated = conn.execute(
+                update(WebSession).where(WebSession.session_id == store_id)
+                .values(data=data, expiry=expiry)
+            ).rowcount
+            if updated:
+                return
+
+            try:
+                with conn.begin_nested():
+                    conn.execute(insert(WebSession).values(session_id=store_id, data=data, expiry=expiry))
+            except IntegrityError:
+                conn.execute(
+                    update(WebSession).where(WebSession.session_id == store_id)
+                    .values(data=data, expiry=expiry)
+                )
+
+    def _delete_session(self, store_id):
+        with db.engine.begin() as conn:
+            conn.execute(delete(WebSession).where(WebSession.session_id == store_id))
+
+    def should_set_storage(self, app, session):
+        if session.modified:
+            return True
+        if not app.config['SESSION_REFRESH_EACH_REQUEST']:
+            return False
+
+        expiry = g.get('_session_expiry')
+        if expiry is None:
+            return True
+        return expiry - datetime.utcnow() < app.permanent_session_lifetime / 2
+
+    def sweep_expired(self, now=None, max_batches=None):
+        """Delete expired sessions batch by batch through the expiry index.
+
+        Each batch is its own short transaction so sweeping never holds long
+        locks. Returns the number of sessions deleted.
+        """
+        now = now or datetime.utcnow()
+        deleted = batches = 0
+
+        while max_batches is None or batches < max_batches:
+            with db.engine.begin() as conn:
+                ids = conn.execute(
+                    select(WebSession.session_id)
+                    .where(WebSession.expiry <= now)
+                    .order_by(WebSession.expiry)
+                    .limit(self.sweep_batch_size)
+                ).scalars().all()
+                if ids:
+                    conn.execute(delete(WebSession).where(WebSession.session_id.in_(ids)))
+
+            deleted += len(ids)
+            batches += 1
+            if len(ids) < self.sweep_batch_size:
+                break
+
+        return deleted
+
+    def _delete_expired_sessions(self):
+        # Opportunistic cleanup (SESSION_CLEANUP_N_REQUESTS) sweeps one batch
+        self.sweep_expired(max_batches=1)
+
+    def _register_cleanup_app_command(self):
+        @self.app.cli.command('session_cleanup')
+        def session_cleanup():
+            """Delete every expired session"""
+            print(f"Deleted {self.sweep_expired()} expired sessions")
+
+
+class MemorySessionInterface(_DrainingSessionInterface):
+    """Sessions in a bounded in-process TTL cache, for single-node deployments"""
+
+    def __init__(self, app, max_entries=100000, **options):
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        self.store = TTLCache(maxsize=max_entries, ttl=lifetime)
+        super().__init__(app, **options)
+
+    def _load(self, store_id):
+        data = self.store.get(store_id)
+        return None if data is None else self.serializer.decode(data)
+
+    def _store(self, store_id, data, expiry):
+        self.store.set(store_id, data, ttl=(expiry - datetime.utcnow()).total_seconds())
+
+    def _delete_session(self, store_id):
+        self.store.invalidate(store_id)
+
+
+def init_sessions(app):
+    """Install the session backend selected by SESSION_BACKEND"""
+    backend = app.config.get('SESSION_BACKEND', 'sql')
+    if backend not in SESSION_BACKENDS:
+        raise ValueError(f"Unknown SESSION_BACKEND {backend!r}, expected one of {', '.join(SESSION_BACKENDS)}")
+
+    if backend == 'filesystem':
+        app.config['SESSION_TYPE'] = 'filesystem'
+        Session(app)
+        return app.session_interface
+
+    options = {
+        'key_prefix': app.config.get('SESSION_KEY_PREFIX', SESSION_DEFAULTS['SESSION_KEY_PREFIX']),
+        'permanent': app.config.get('SESSION_PERMANENT', SESSION_DEFAULTS['SESSION_PERMANENT']),
+        'sid_length': app.config.get('SESSION_ID_LENGTH', SESSION_DEFAULTS['SESSION_ID_LENGTH']),
+        'serialization_format': app.config.get(
+            'SESSION_SERIALIZATION_FORMAT', SESSION_DEFAULTS['SESSION_SERIALIZATION_FORMAT']
+        )
+    }
+    if backend == 'sql':
+        interface = SqlSessionInterface(
+            app,
+            sweep_batch_size=app.config.get('SESSION_SWEEP_BATCH_SIZE', 1000),
+            cleanup_n_requests=app.config.get('SESSION_CLEANUP_N_REQUESTS'),
+            **options
+        )
+    else:
+        interface = MemorySessionInterface(
+            app, max_entries=app.config.get('SESSION_MEMORY_MAX_ENTRIES', 100000), **options
+        )
+
+    legacy_dir = app.config.get('SESSION_LEGACY_DIR')
+    if legacy_dir:
+        interface.legacy = LegacyFilesystemSessions(legacy_dir)
+
+    app.session_interface = interface
+    return interface
@@ -0,0 +1,202 @@
+import hashlib
+import itertools
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import date, datetime, time as time_of_day
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from src.utils.request_metrics import current_endpoint
+
+# Values that cannot carry personal data are kept; strings and bytes are not
+SAFE_PARAMETER_TYPES = (bool, int, float, Decimal, date, datetime, time_of_day, type(None))
+
+EXPLAINABLE = ('select', 'with', 'insert', 'update', 'delete')
+
+_WHITESPACE = re.compile(r'\s+')
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r'\(\s*(\?|%s|%\(\w+\)s|\$\d+|:\w+)(\s*,\s*(\?|%s|%\(\w+\)s|\$\d+|:\w+))+\s*\)')
+
+
+def redact_value(value):
+    if isinstance(value, SAFE_PARAMETER_TYPES):
+        return value
+    if isinstance(value, (str, bytes, bytearray, memoryview)):
+        return f'<{type(value).__name__}:{len(value)}>'
+    return f'<{type(value).__name__}>'
+
+
+def redact_parameters(parameters):
+    """Parameters with every string, byte string and unknown object replaced by its type"""
+    if isinstance(parameters, dict):
+        return {key: redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return [redact_parameters(row) for row in parameters]
+        return [redact_value(value) for value in parameters]
+    return redact_value(parameters)
+
+
+def statement_shape(statement):
+    """Statement text with literals removed and IN lists collapsed, for grouping"""
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    shape = _LITERALS.sub('?', shape)
+    return _PLACEHOLDER_LISTS.sub(r'(\1)', shape)
+
+
+def fingerprint(shape):
+    return hashlib.sha1(shape.encode('utf-8')).hexdigest()[:16]
+
+
+class SlowQueryLog:
+    """Ring buffer of statements slower than threshold_ms, with their query plans.
+
+    The first time a statement shape is seen slow, its plan is captured with
+    EXPLAIN (EXPLAIN QUERY PLAN on SQLite) and kept per shape. On server
+    databases the plan is captured by a background thread on a separate
+    connection, so the request never waits for it and a failing EXPLAIN
+    cannot abort the request's transaction. SQLite plans are read inline on
+    the same connection, which is cheap and also works for :memory:.
+    """
+
+    def __init__(self, threshold_ms=200, capacity=500, explain=True, max_plans=500):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.max_plans = max_plans
+        self.entries = deque(maxlen=capacity)
+        self.plans = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._jobs = queue.Queue(maxsize=100)
+        self._worker = None
+
+    def attach(self, engine):
+        """Time every statement on engine (a sync Engine or AsyncEngine.sync_engine)"""
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Kept on the execution context, which a failing statement takes with it
+        context._slow_query_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - context._slow_query_start) * 1000
+        if duration_ms >= self.threshold_ms:
+            self.record(conn, statement, parameters, duration_ms, executemany)
+
+    def record(self, conn, statement, parameters, duration_ms, executemany=False):
+        shape = statement_shape(statement)
+        key = fingerprint(shape)
+        entry = {
+            'id': next(self._ids),
+            'recorded_at': datetime.utcnow().isoformat(),
+            'duration_ms': round(duration_ms, 3),
+            'endpoint': current_endpoint(),
+            'fingerprint': key,
+            'statement': statement,
+            'parameters': redact_parameters(parameters),
+            'executemany': executemany
+        }
+
+        with self._lock:
+            self.entries.append(entry)
+            first_seen = key not in self.plans
+            if first_seen:
+                self.plans[key] = {'shape': shape, 'plan': None, 'error': None, 'captured_at': None}
+                while len(self.plans) > self.max_plans:
+                    self.plans.popitem(last=False)
+
+        if first_seen and self.explain and not executemany:
+            self._explain(conn, key, statement, parameters)
+
+    def _explain(self, conn, key, statement, parameters):
+        if statement.split(None, 1)[0].lower() not in EXPLAINABLE:
+            self._store_plan(key, None, 'Statement type cannot be explained')
+            return
+
+        if conn.dialect.name == 'sqlite':
+            try:
+                self._store_plan(key, explain(conn.connection.dbapi_connection, 'sqlite', statement, parameters), None)
+            except Exception as e:
+                self._store_plan(key, None, str(e))
+            return
+
+        try:
+            self._jobs.put_nowait((conn.engine, key, statement, parameters))
+        except queue.Full:
+            self._store_plan(key, None, 'Explain queue full')
+            return
+
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._explain_worker, name='slow-query-explain', daemon=True)
+                self._worker.start()
+
+    def _explain_worker(self):
+        while True:
+            engine, key, statement, parameters = self._jobs.get()
+            try:
+                connection = engine.raw_connection()
+                try:
+                    plan = explain(connection, engine.dialect.name, statement, parameters)
+                finally:
+                    connection.close()
+                self._store_plan(key, plan, None)
+            except Exception as e:
+                self._store_plan(key, None, str(e))
+            finally:
+                self._jobs.task_done()
+
+    def _store_plan(self, key, plan, error):
+        with self._lock:
+            if key in self.plans:
+                self.plans[key].update(plan=plan, error=error, captured_at=datetime.utcnow().isoformat())
+
+    def wait_for_plans(self):
+        """Block until every queued EXPLAIN has run"""
+        self._jobs.join()
+
+    def snapshot(self, limit=100):
+        """The newest slow queries first, each with its shape's captured plan"""
+        with self._lock:
+            entries = list(self.entries)[-limit:][::-1]
+            plans = {key: dict(plan) for key, plan in self.plans.items()}
+
+        return [dict(entry, plan=plans.get(entry['fingerprint'])) for entry in entries]
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.plans.clear()
+
+
+def explain(dbapi_connection, dialect_name, statement, parameters):
+    """Plan of statement as a list of lines; plans only, the statement never runs"""
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect_name == 'sqlite' else 'EXPLAIN '
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return [str(row[-1]) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def init_slow_query_log(app, engines):
+    """Attach a SlowQueryLog to engines when SLOW_QUERY_MS is set"""
+    threshold_ms = app.config.get('SLOW_QUERY_MS')
+    if not threshold_ms:
+        return None
+
+    log = SlowQueryLog(
+        threshold_ms=threshold_ms,
+        capacity=app.config.get('SLOW_QUERY_LOG_SIZE', 500),
+        explain=app.config.get('SLOW_QUERY_EXPLAIN', True)
+    )
+    for engine in engines:
+        log.attach(engine)
+    app.extensions['slow_query_log'] = log
+    return log
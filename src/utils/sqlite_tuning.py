@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import event
+
+
+def is_sqlite_file(engine):
+    """True for an engine on an SQLite database file (not :memory:)"""
+    return engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:')
+
+
+def sqlite_pragmas(config):
+    """(pragma, value) pairs from the SQLITE_* settings, in the order they are applied"""
+    return [
+        # First, so the statements below wait for a lock instead of failing
+        ('busy_timeout', int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))),
+        # WAL: readers no longer block on a writer, nor the writer on readers
+        ('journal_mode', config.get('SQLITE_JOURNAL_MODE', 'wal')),
+        # NORMAL is durable across crashes of the app in WAL mode; only an OS
+        # crash or power loss can drop the last transactions before a checkpoint
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'normal')),
+        ('mmap_size', int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))),
+        # Negative values are KiB rather than pages
+        ('cache_size', -int(config.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))),
+        ('temp_store', config.get('SQLITE_TEMP_STORE', 'memory')),
+        # The -wal file is truncated back to this size after a checkpoint
+        ('journal_size_limit', int(config.get('SQLITE_JOURNAL_SIZE_LIMIT', 64 * 1024 * 1024)))
+    ]
+
+
+class SQLiteProfile:
+    """Applies pragmas to every new DBAPI connection of the engines it is attached to"""
+
+    def __init__(self, pragmas):
+        self.pragmas = pragmas
+        self.connections = 0
+        self.journal_mode = None
+
+    def attach(self, engine):
+        """Tune engine's connections (a sync Engine or AsyncEngine.sync_engine)"""
+        event.listen(engine, 'connect', self._on_connect)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in self.pragmas:
+                cursor.execute(f'PRAGMA {name} = {value}')
+                if name == 'journal_mode':
+                    # SQLite answers with the mode it actually switched to
+                    self.journal_mode = cursor.fetchone()[0]
+        finally:
+            cursor.close()
+        self.connections += 1
+
+    def snapshot(self, engine):
+        """The configured pragmas and the values a pooled connection reports"""
+        with engine.connect() as conn:
+            current = {name: conn.exec_driver_sql(f'PRAGMA {name}').scalar() for name, _ in self.pragmas}
+        return {
+            'configured': dict(self.pragmas),
+            'current': current,
+            'connections_tuned': self.connections
+        }
+
+
+class SQLiteMaintenance:
+    """Background WAL checkpoint and PRAGMA optimize for one SQLite database.
+
+    The checkpoint is PASSIVE: it copies what it can from the WAL into the
+    database without waiting for readers or blocking writers, so it never
+    stalls a request. Without it the WAL only shrinks when a checkpoint
+    happens to run at a quiet moment. PRAGMA optimize re-runs ANALYZE on
+    tables whose statistics have drifted, keeping the planner's choice of
+    index current as the catalog and loan history grow.
+
+    The thread is started on the first request of each process (see
+    ensure_started), so a pre-forking server gets one per worker rather than
+    one that only existed in the master.
+    """
+
+    def __init__(self, engine, interval=300):
+        self.engine = engine
+        self.interval = interval
+        self.runs = 0
+        self.last_run = None
+        self.last_checkpoint = None
+        self.last_duration_ms = None
+        self.last_error = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def run_once(self):
+        started = time.perf_counter()
+        try:
+            with self.engine.connect() as conn:
+                busy, log_frames, checkpointed = conn.exec_driver_sql('PRAGMA wal_checkpoint(PASSIVE)').one()
+                conn.exec_driver_sql('PRAGMA optimize')
+        except Exception as e:
+            self.last_error = str(e)
+        else:
+            self.last_checkpoint = {'busy': bool(busy), 'wal_frames': log_frames, 'checkpointed_frames': checkpointed}
+            self.last_error = None
+        self.runs += 1
+        self.last_run = datetime.utcnow()
+        self.last_duration_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def ensure_started(self):
+        """Start the maintenance thread in this process if it is not running yet"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._stop = threading.Event()
+                threading.Thread(target=self._loop, name='sqlite-maintenance', daemon=True).start()
+                self._pid = os.getpid()
+
+    def stop(self):
+        self._stop.set()
+        self._pid = None
+
+    def snapshot(self):
+        return {
+            'interval_seconds': self.interval,
+            'running': self._pid == os.getpid() and not self._stop.is_set(),
+            'runs': self.runs,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+            'last_duration_ms': self.last_duration_ms,
+            'last_checkpoint': self.last_checkpoint,
+            'last_error': self.last_error
+        }
+
+
+def init_sqlite_tuning(app, engines):
+    """Apply the SQLite profile to the file-backed SQLite engines, when SQLITE_TUNING is on.
+
+    Maintenance runs against the first of them, the primary.
+    """
+    engines = [engine for engine in engines if is_sqlite_file(engine)]
+    if not engines or not app.config.get('SQLITE_TUNING', True):
+        return None
+
+    profile = SQLiteProfile(sqlite_pragmas(app.config))
+    for engine in engines:
+        profile.attach(engine)
+    app.extensions['sqlite_profile'] = profile
+
+    interval = app.config.get('SQLITE_MAINTENANCE_SECONDS', 300)
+    if interval:
+        maintenance = SQLiteMaintenance(engines[0], interval)
+        app.extensions['sqlite_maintenance'] = maintenance
+        app.before_request(maintenance.ensure_started)
+    return profile
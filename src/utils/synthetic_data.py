@@ -0,0 +1,329 @@
+import csv
+import io
+from datetime import date
+
+import numpy as np
+from sqlalchemy import case, func, insert, select, text
+
+from src.models import Book, BookRating, BorrowRecord, User
+
+# Row counts at scale 1.0; scripts/generate_data.py and the benchmark suite pass a fraction of this
+FULL_SIZES = {
+    'users': 200_000,
+    'books': 1_000_000,
+    'borrow_records': 10_000_000,
+    'ratings': 5_000_000
+}
+
+GENRES = (
+    'Fiction', 'Mystery', 'Science Fiction', 'Fantasy', 'Romance', 'History',
+    'Biography', 'Science', 'Poetry', 'Philosophy', 'Children', 'Self-Help'
+)
+GENRE_WEIGHTS = (20, 12, 9, 10, 11, 8, 6, 7, 2, 3, 8, 4)
+LANGUAGES = ('English', 'Spanish', 'French', 'German', 'Italian')
+LANGUAGE_WEIGHTS = (80, 8, 6, 4, 2)
+WORDS = (
+    'Silent', 'River', 'Empire', 'Garden', 'Shadow', 'Winter', 'Glass', 'Code',
+    'Iron', 'Ocean', 'Letters', 'Night', 'Machine', 'Forest', 'Crown', 'Light'
+)
+FIRST_NAMES = ('Ana', 'Ben', 'Chloe', 'David', 'Elif', 'Farah', 'Gabriel', 'Hana', 'Ivan', 'Jun', 'Kofi', 'Lena')
+LAST_NAMES = ('Adams', 'Baker', 'Chen', 'Diaz', 'Evans', 'Fischer', 'Garcia', 'Haddad', 'Ito', 'Jones', 'Khan', 'Lopez')
+
+# The library as of this day, so a seed always produces the same data
+TODAY = date(2026, 1, 1)
+HISTORY_DAYS = 730
+
+LOAN_DAYS = 14
+FINE_PER_DAY = 0.5
+
+# The k-th most popular book is borrowed and rated in proportion to 1 / k**ZIPF_EXPONENT
+ZIPF_EXPONENT = 1.07
+# Share of loans brought back (or still out) after the due date
+OVERDUE_RATE = 0.12
+# Borrowing per month relative to term time (summer and the winter break are quiet)
+MONTH_ACTIVITY = (1.0, 1.0, 1.0, 0.9, 0.9, 0.5, 0.4, 0.5, 1.1, 1.1, 1.0, 0.6)
+WEEKEND_ACTIVITY = 0.5
+
+
+def dataset_sizes(scale):
+    """FULL_SIZES multiplied by scale, at least one row per table"""
+    return {table: max(1, int(count * scale)) for table, count in FULL_SIZES.items()}
+
+
+class _Sampler:
+    """Draws indexes 0..n-1 in proportion to weights, by inverse CDF"""
+
+    def __init__(self, weights):
+        cdf = np.cumsum(weights, dtype=np.float64)
+        self.cdf = cdf / cdf[-1]
+
+    def __call__(self, rng, size):
+        return np.minimum(np.searchsorted(self.cdf, rng.random(size), side='right'), len(self.cdf) - 1)
+
+
+def _zipf_weights(rng, n):
+    """Zipfian popularity of n items, with the popular ones spread over random ids"""
+    ranks = rng.permutation(n) + 1
+    return 1.0 / ranks ** ZIPF_EXPONENT
+
+
+def _day_weights():
+    """Relative borrowing on each of the HISTORY_DAYS days before TODAY (index 0 = yesterday)"""
+    days = np.datetime64(TODAY) - np.arange(1, HISTORY_DAYS + 1)
+    months = days.astype('datetime64[M]').astype(int) % 12
+    weekdays = (days.astype(int) + 3) % 7  # 1970-01-01 was a Thursday
+    return np.asarray(MONTH_ACTIVITY)[months] * np.where(weekdays >= 5, WEEKEND_ACTIVITY, 1.0)
+
+
+def _dates(days_ago):
+    """'YYYY-MM-DD' strings for day offsets before TODAY"""
+    return np.datetime_as_string(np.datetime64(TODAY) - days_ago.astype('timedelta64[D]'), unit='D')
+
+
+def _timestamps(seconds_ago):
+    """'YYYY-MM-DD HH:MM:SS' strings, the format both SQLite and Postgres accept"""
+    moments = np.datetime64(TODAY, 's') - seconds_ago.astype('timedelta64[s]')
+    return np.char.replace(np.datetime_as_string(moments, unit='s'), 'T', ' ')
+
+
+def _pick(rng, values, size, weights=None):
+    values = np.asarray(values)
+    if weights is None:
+        return values[rng.integers(len(values), size=size)]
+    return values[_Sampler(weights)(rng, size)]
+
+
+def _user_batches(rng, first_id, count, password_hash, chunk_size):
+    for start in range(0, count, chunk_size):
+        ids = np.arange(first_id + start, first_id + min(start + chunk_size, count))
+        size = len(ids)
+        roles = np.where(ids == first_id, 'admin', 'student')
+        usernames = np.char.add(roles, ids.astype(str))
+        yield {
+            'id': ids,
+            'fullname': np.char.add(np.char.add(_pick(rng, FIRST_NAMES, size), ' '), _pick(rng, LAST_NAMES, size)),
+            'email': np.char.add(usernames, '@example.edu'),
+            'username': usernames,
+            'password_hash': np.full(size, password_hash, dtype=object),
+            'role': roles,
+            'permissions_version': np.ones(size, dtype=np.int64),
+            'created_at': _timestamps(rng.integers(0, 1500 * 86400, size))
+        }
+
+
+def _book_batches(rng, first_id, count, popularity, ratings_count, ratings_sum, chunk_size):
+    # Popular titles are stocked with more copies
+    copies = 1 + np.clip(np.log10(popularity / popularity.min()) * 1.5, 0, 9).astype(np.int64)
+    authors = max(1, count // 8)
+    for start in range(0, count, chunk_size):
+        stop = min(start + chunk_size, count)
+        ids = np.arange(first_id + start, first_id + stop)
+        size = len(ids)
+        rated = ratings_count[start:stop]
+        titles = np.char.add(np.char.add(_pick(rng, WORDS, size), ' '), _pick(rng, WORDS, size))
+        yield {
+            'id': ids,
+            'title': np.char.add(np.char.add(titles, ' '), ids.astype(str)),
+            'author': np.char.add('Author ', ((rng.pareto(1.2, size) * authors / 20).astype(np.int64) % authors).astype(str)),
+            'isbn': np.char.add('979', np.char.zfill(ids.astype(str), 10)),
+            'genre': _pick(rng, GENRES, size, GENRE_WEIGHTS),
+            'published_year': TODAY.year - np.minimum(rng.exponential(18, size), 125).astype(np.int64),
+            'publisher': np.char.add('Publisher ', rng.integers(0, 200, size).astype(str)),
+            'pages': np.clip(rng.normal(320, 120, size), 40, 1500).astype(np.int64),
+            'language': _pick(rng, LANGUAGES, size, LANGUAGE_WEIGHTS),
+            'average_rating': np.where(rated > 0, np.round(ratings_sum[start:stop] / np.maximum(rated, 1), 2), np.nan),
+            'ratings_count': rated,
+            'total_copies': copies[start:stop],
+            'available_copies': copies[start:stop],
+            'created_at': _timestamps(rng.integers(0, 3000 * 86400, size))
+        }
+
+
+def _loan_batches(rng, first_id, count, users, books, pick_user, pick_book, chunk_size):
+    pick_day = _Sampler(_day_weights())
+    for start in range(0, count, chunk_size):
+        ids = np.arange(first_id + start, first_id + min(start + chunk_size, count))
+        size = len(ids)
+        days_ago = pick_day(rng, size) + 1
+
+        late = rng.random(size) < OVERDUE_RATE
+        kept_days = np.where(
+            late,
+            LOAN_DAYS + 1 + rng.geometric(0.15, size),
+            rng.integers(1, LOAN_DAYS + 1, size)
+        )
+        returned_ago = days_ago - kept_days
+        is_open = returned_ago <= 0
+        late_days = np.where(is_open, 0, np.maximum(kept_days - LOAN_DAYS, 0))
+
+        yield {
+            'id': ids,
+            'user_id': users[0] + pick_user(rng, size),
+            'book_id': books[0] + pick_book(rng, size),
+            'borrow_date': _dates(days_ago),
+            'due_date': _dates(days_ago - LOAN_DAYS),
+            'return_date': np.where(is_open, None, _dates(np.maximum(returned_ago, 0)).astype(object)),
+            'fine': late_days * FINE_PER_DAY,
+            'status': np.where(is_open, 'borrowed', 'returned'),
+            'created_at': _timestamps(days_ago * 86400)
+        }
+
+
+def _rating_pairs(rng, count, users, books, pick_user, pick_book):
+    """count distinct (user, book) index pairs, drawn by activity and popularity"""
+    count = min(count, users * books)
+    keys = np.empty(0, dtype=np.int64)
+    for attempt in range(50):
+        missing = count - len(keys)
+        if missing <= 0:
+            break
+        draw = int(missing * 1.2) + 16
+        if attempt < 40:
+            new = pick_user(rng, draw).astype(np.int64) * books + pick_book(rng, draw)
+        else:
+            # Popular pairs are exhausted on tiny libraries; fill the rest uniformly
+            new = rng.integers(0, users * books, draw, dtype=np.int64)
+        keys = np.unique(np.concatenate([keys, new]))
+    keys = rng.permutation(keys)[:count]
+    keys.sort()
+    return keys // books, keys % books
+
+
+def _rating_batches(rng, first_id, user_index, book_index, scores, users, books, chunk_size):
+    for start in range(0, len(scores), chunk_size):
+        stop = min(start + chunk_size, len(scores))
+        size = stop - start
+        yield {
+            'id': np.arange(first_id + start, first_id + stop),
+            'user_id': users[0] + user_index[start:stop],
+            'book_id': books[0] + book_index[start:stop],
+            'rating': scores[start:stop],
+            'created_at': _timestamps(rng.integers(0, HISTORY_DAYS * 86400, size))
+        }
+
+
+def _python_values(column):
+    """A column as a list of plain Python values, NaN as None"""
+    if column.dtype.kind == 'f':
+        return np.where(np.isnan(column), None, column.astype(object)).tolist()
+    return column.tolist()
+
+
+def _load(conn, model, batches):
+    """Bulk-load column batches: COPY on Postgres (psycopg2), executemany elsewhere"""
+    table = model.__tablename__
+    loaded = 0
+    for batch in batches:
+        columns = list(batch)
+        rows = list(zip(*(_python_values(batch[column]) for column in columns)))
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            if hasattr(cursor, 'copy_expert'):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                buffer.seek(0)
+                cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+            elif conn.dialect.paramstyle in ('qmark', 'format', 'pyformat'):
+                marker = '?' if conn.dialect.paramstyle == 'qmark' else '%s'
+                cursor.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join([marker] * len(columns))})",
+                    rows
+                )
+            else:
+                conn.execute(insert(model), [dict(zip(columns, row)) for row in rows])
+        finally:
+            cursor.close()
+        loaded += len(rows)
+    return loaded
+
+
+def _next_id(conn, model):
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _update_available_copies(conn, first_loan_id):
+    """Take the generated open loans off the shelf counts in one statement"""
+    open_loans = select(func.count()).where(
+        BorrowRecord.book_id == Book.id,
+        BorrowRecord.return_date.is_(None),
+        BorrowRecord.id >= first_loan_id
+    ).scalar_subquery()
+    books_with_open_loans = select(BorrowRecord.book_id).where(
+        BorrowRecord.return_date.is_(None),
+        BorrowRecord.id >= first_loan_id
+    )
+    remaining = Book.available_copies - open_loans
+    conn.execute(
+        Book.__table__.update()
+        .where(Book.id.in_(books_with_open_loans))
+        .values(available_copies=case((remaining < 0, 0), else_=remaining))
+    )
+
+
+def _reset_sequences(conn):
+    """Move Postgres id sequences past the explicitly inserted ids"""
+    if conn.dialect.name != 'postgresql':
+        return
+    for model in (User, Book, BorrowRecord, BookRating):
+        table = model.__tablename__
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+        ))
+
+
+def generate_library(engine, sizes, password_hash, seed=0, chunk_size=50_000, progress=None):
+    """Append a reproducible synthetic library to the database behind engine.
+
+    sizes maps users, books, borrow_records and ratings to row counts (see
+    dataset_sizes). Columns are built with NumPy a chunk_size batch at a time
+    and bulk-loaded with COPY on Postgres or one executemany per batch
+    elsewhere; each table is committed on its own. Book popularity is
+    Zipfian, reader activity is skewed, borrowing follows the academic year
+    and about OVERDUE_RATE of loans run late. Every user gets password_hash,
+    so callers hash one password once; the first generated user is an admin.
+    The same seed and chunk_size always give the same rows.
+
+    progress(table, rows) is called after each table. Returns the id ranges
+    as {table: (first_id, count)}.
+    """
+    rng = np.random.default_rng(seed)
+    ranges = {}
+
+    with engine.connect() as conn:
+        for table, model in (('users', User), ('books', Book), ('borrow_records', BorrowRecord),
+                             ('ratings', BookRating)):
+            ranges[table] = (_next_id(conn, model), sizes[table])
+    users, books = ranges['users'], ranges['books']
+
+    pick_user = _Sampler(rng.lognormal(0, 1, users[1]))
+    popularity = _zipf_weights(rng, books[1])
+    pick_book = _Sampler(popularity)
+
+    # Ratings come first so each book row can carry its average and count
+    user_index, book_index = _rating_pairs(rng, sizes['ratings'], users[1], books[1], pick_user, pick_book)
+    quality = rng.normal(0, 0.6, books[1])
+    scores = np.clip(np.round(rng.normal(3.7, 0.9, len(book_index)) + quality[book_index]), 1, 5)
+    ratings_count = np.bincount(book_index, minlength=books[1])
+    ratings_sum = np.bincount(book_index, weights=scores, minlength=books[1])
+
+    loads = (
+        ('users', User, lambda: _user_batches(rng, *users, password_hash, chunk_size)),
+        ('books', Book, lambda: _book_batches(rng, *books, popularity, ratings_count, ratings_sum, chunk_size)),
+        ('borrow_records', BorrowRecord, lambda: _loan_batches(
+            rng, *ranges['borrow_records'], users, books, pick_user, pick_book, chunk_size)),
+        ('ratings', BookRating, lambda: _rating_batches(
+            rng, ranges['ratings'][0], user_index, book_index, scores, users, books, chunk_size)),
+    )
+    for table, model, batches in loads:
+        with engine.begin() as conn:
+            loaded = _load(conn, model, batches())
+            if table == 'borrow_records':
+                _update_available_copies(conn, ranges['borrow_records'][0])
+            if table == 'ratings':
+                _reset_sequences(conn)
+        ranges[table] = (ranges[table][0], loaded)
+        if progress:
+            progress(table, loaded)
+
+    return ranges
@@ -0,0 +1,343 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import jwt
+from flask import current_app, g, request
+
+from src.utils.cache import TTLCache
+
+
+def token_hash(token):
+    """Stable key for a token that does not keep the bearer secret in memory"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+# How often each worker drops revocations whose token has expired anyway
+PRUNE_INTERVAL_SECONDS = 60
+
+
+class TokenRevoked(jwt.InvalidTokenError):
+    """A token that was valid, but has been revoked (logout or refresh rotation)"""
+
+
+class MemoryRevocationStore:
+    """Revocations visible to this process only (single-worker deployments)"""
+
+    def __init__(self):
+        self._revoked = {}
+        self._lock = threading.Lock()
+        self._next_prune = 0
+
+    def add(self, key, expires_at):
+        """Record a revocation; False if key was already revoked"""
+        now = time.time()
+        with self._lock:
+            if self._revoked.get(key, 0) > now:
+                return False
+            self._revoked[key] = expires_at
+            if now >= self._next_prune:
+                self._revoked = {k: exp for k, exp in self._revoked.items() if exp > now}
+                self._next_prune = now + PRUNE_INTERVAL_SECONDS
+        return True
+
+    def changes(self):
+        """Return revocations written by other workers since the last call"""
+        return []
+
+
+class SqliteRevocationStore:
+    """Revocations shared by every worker on a host through a small SQLite file.
+
+    The file is the durable record: a revocation stays in it until the token
+    it revokes has expired. On the request path a worker only asks SQLite
+    whether the file has changed (PRAGMA data_version on a connection it
+    keeps open, which moves on every commit by any other connection), and
+    reads the rows appended since its last sync when it has. File mtime and
+    size are not enough: mtime can be coarser than two commits apart, and
+    one more row rarely changes the size.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._last_seq = 0
+        self._last_version = None
+        self._watch = None
+        self._watch_pid = None
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS revoked_tokens ('
+                'seq INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'token_hash TEXT NOT NULL, '
+                'expires_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_revoked_tokens_token_hash ON revoked_tokens (token_hash)')
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute('PRAGMA journal_mode=DELETE')
+        return conn
+
+    def _watch_connection(self):
+        # Opened lazily per process: a connection must not cross a fork
+        if self._watch is None or self._watch_pid != os.getpid():
+            self._watch = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._watch_pid = os.getpid()
+        return self._watch
+
+    def add(self, key, expires_at):
+        """Record a revocation; False if any worker had already revoked key.
+
+        The check and the insert share one write transaction, so of two
+        workers revoking the same token at once exactly one gets True.
+        """
+        conn = self._connect()
+        try:
+            conn.isolation_level = None
+            conn.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            revoked = conn.execute(
+                'SELECT 1 FROM revoked_tokens WHERE token_hash = ? AND expires_at > ?', (key, now)
+            ).fetchone()
+            if not revoked:
+                conn.execute(
+                    'INSERT INTO revoked_tokens (token_hash, expires_at) VALUES (?, ?)',
+                    (key, expires_at)
+                )
+            # Expired revocations can never match a valid token again
+            conn.execute('DELETE FROM revoked_tokens WHERE expires_at < ?', (now,))
+            conn.execute('COMMIT')
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+        return not revoked
+
+    def changes(self):
+        """Return revocations written by any worker since the last call"""
+        with self._lock:
+            conn = self._watch_connection()
+            # Read before the rows, so a commit landing in between is picked up next time
+            version = conn.execute('PRAGMA data_version').fetchone()[0]
+            if version == self._last_version:
+                return []
+
+            rows = conn.execute(
+                'SELECT seq, token_hash, expires_at FROM revoked_tokens '
+                'WHERE seq > ? ORDER BY seq',
+                (self._last_seq,)
+            ).fetchall()
+            self._last_version = version
+            if rows:
+                self._last_seq = rows[-1][0]
+            return [(key, expires_at) for _, key, expires_at in rows]
+
+
+class TokenVerifier:
+    """Verifies bearer tokens with a bounded cache of decoded claims.
+
+    Claims are cached by token hash until the token's own `exp`, so a token
+    is HMAC-verified once per worker rather than once per request. Every
+    revocation in the shared store is mirrored in memory until the revoked
+    token expires, so authorization never touches the database. The mirror
+    is never trimmed by size: dropping an entry early would make a revoked
+    token valid again.
+
+    Permission-version bumps travel through the same store: tokens carrying
+    an older `pv` claim than the latest bump for their user are rejected.
+    """
+
+    def __init__(self, secret, store=None, cache_size=10000, max_cache_ttl=3600):
+        self.secret = secret
+        self.store = store or MemoryRevocationStore()
+        self.max_cache_ttl = max_cache_ttl
+        self.claims_cache = TTLCache(maxsize=cache_size, ttl=max_cache_ttl)
+        # token hash -> exp of the revoked token
+        self.revoked = {}
+        # user id -> (permissions version, when the last token it applies to expires)
+        self.permissions_versions = {}
+        self._lock = threading.Lock()
+        self._next_prune = 0
+
+    def _apply_permissions_version(self, user_id, version, expires_at):
+        with self._lock:
+            current, current_expires_at = self.permissions_versions.get(user_id, (0, 0))
+            if version > current or current_expires_at <= time.time():
+                self.permissions_versions[user_id] = (version, expires_at)
+            elif version == current:
+                self.permissions_versions[user_id] = (version, max(expires_at, current_expires_at))
+
+    def _mark_revoked(self, key, expires_at):
+        with self._lock:
+            self.revoked[key] = max(expires_at, self.revoked.get(key, 0))
+        self.claims_cache.invalidate(key)
+
+    def _prune(self, now):
+        with self._lock:
+            self.revoked = {key: exp for key, exp in self.revoked.items() if exp > now}
+            self.permissions_versions = {
+                user_id: entry for user_id, entry in self.permissions_versions.items() if entry[1] > now
+            }
+            self._next_prune = now + PRUNE_INTERVAL_SECONDS
+
+    def _sync_revocations(self):
+        now = time.time()
+        for key, expires_at in self.store.changes():
+            if expires_at <= now:
+                continue
+            if key.startswith('pv:'):
+                _, user_id, version = key.split(':')
+                self._apply_permissions_version(int(user_id), int(version), expires_at)
+            else:
+                self._mark_revoked(key, expires_at)
+        if now >= self._next_prune:
+            self._prune(now)
+        return now
+
+    def decode(self, token):
+        """Return the claims of a valid token, raising jwt.InvalidTokenError otherwise"""
+        key = token_hash(token)
+        now = self._sync_revocations()
+
+        if self.revoked.get(key, 0) > now:
+            raise TokenRevoked('Token revoked')
+
+        claims = self.claims_cache.get(key)
+        if claims is None:
+            claims = jwt.decode(token, self.secret, algorithms=['HS256'])
+            ttl = min(claims.get('exp', now + self.max_cache_ttl) - now, self.max_cache_ttl)
+            if ttl > 0:
+                self.claims_cache.set(key, claims, ttl=ttl)
+
+        version, expires_at = self.permissions_versions.get(claims.get('user_id'), (0, 0))
+        if expires_at > now and claims.get('pv', 0) < version:
+            raise jwt.InvalidTokenError('Token permissions outdated')
+        return claims
+
+    def revoke(self, token, expires_at=None):
+        """Revoke a token on this worker immediately and publish it to the others.
+
+        Returns False if the token had already been revoked, on any worker
+        sharing the store (refresh rotation uses this to detect reuse).
+        """
+        key = token_hash(token)
+        if expires_at is None:
+            try:
+                expires_at = jwt.decode(token, self.secret, algorithms=['HS256'])['exp']
+            except (jwt.InvalidTokenError, KeyError):
+                expires_at = time.time() + self.max_cache_ttl
+
+        if expires_at <= time.time():
+            return True
+
+        self._mark_revoked(key, expires_at)
+        return self.store.add(key, expires_at)
+
+    def bump_permissions_version(self, user_id, version, ttl):
+        """Reject this user's tokens issued before `version`, on every worker"""
+        expires_at = time.time() + ttl
+        self._apply_permissions_version(user_id, version, expires_at)
+        self.store.add(f'pv:{user_id}:{version}', expires_at)
+
+    def issue(self, claims, token_type, lifetime):
+        """Sign a token of token_type carrying claims, valid for lifetime seconds"""
+        now = int(time.time())
+        payload = dict(claims, type=token_type, iat=now, exp=now + int(lifetime), jti=uuid.uuid4().hex)
+        return jwt.encode(payload, self.secret, algorithm='HS256')
+
+
+def access_token_lifetime(app=None):
+    """Seconds an access token stays valid"""
+    return (app or current_app).config.get('ACCESS_TOKEN_MINUTES', 15) * 60
+
+
+def refresh_token_lifetime(app=None):
+    """Seconds a refresh token stays valid"""
+    return (app or current_app).config.get('REFRESH_TOKEN_DAYS', 14) * 86400
+
+
+def issue_token_pair(user):
+    """Issue a short-lived access token and a refresh token for a user.
+
+    The access token carries everything protected routes need (id, role,
+    display name, permissions version), so they never have to load the user.
+    """
+    verifier = get_token_verifier()
+    access_lifetime = access_token_lifetime()
+    access_claims = {
+        'user_id': user.id,
+        'username': user.username,
+        'name': user.fullname,
+        'role': user.role,
+        'pv': user.permissions_version or 0
+    }
+    refresh_claims = {'user_id': user.id, 'pv': user.permissions_version or 0}
+
+    return {
+        'access_token': verifier.issue(access_claims, 'access', access_lifetime),
+        'refresh_token': verifier.issue(refresh_claims, 'refresh', refresh_token_lifetime()),
+        'token_type': 'Bearer',
+        'expires_in': access_lifetime
+    }
+
+
+def init_token_auth(app):
+    """Attach a TokenVerifier to the app and authenticate every request up front"""
+    store_path = app.config.get('TOKEN_REVOCATION_DB')
+    if store_path:
+        store = SqliteRevocationStore(store_path)
+    else:
+        store = MemoryRevocationStore()
+        if not app.config.get('TESTING'):
+            app.logger.warning(
+                'TOKEN_REVOCATION_DB is not set: logouts and refresh rotation only apply to the '
+                'worker that served them. Set it whenever more than one worker process serves the app.'
+            )
+
+    app.extensions['token_verifier'] = TokenVerifier(
+        app.config['SECRET_KEY'],
+        store=store,
+        cache_size=app.config.get('TOKEN_CACHE_SIZE', 10000)
+    )
+    app.before_request(authenticate_request)
+
+
+def get_token_verifier():
+    """Return the current app's TokenVerifier"""
+    return current_app.extensions['token_verifier']
+
+
+def bearer_token(req):
+    """Return the raw token from the Authorization header, if any"""
+    token = req.headers.get('Authorization')
+    if not token:
+        return None
+    return token.replace('Bearer ', '', 1)
+
+
+def decode_access_token(verifier, token):
+    """Return (claims, None) for a valid access token, else (None, error message)"""
+    if not token:
+        return None, 'Missing token'
+
+    try:
+        claims = verifier.decode(token)
+    except jwt.ExpiredSignatureError:
+        return None, 'Token expired'
+    except jwt.InvalidTokenError:
+        return None, 'Invalid token'
+
+    if claims.get('type', 'access') != 'access':
+        return None, 'Invalid token'
+    return claims, None
+
+
+def authenticate_request():
+    """Decode the request's bearer token once and keep the result on `g`"""
+    g.current_user, g.auth_error = decode_access_token(get_token_verifier(), bearer_token(request))
@@ -0,0 +1,160 @@
+from src.app_factory import db
+from src.models import BookRating, BorrowRecord, Fees, User, UserStats
+from src.utils.partitioning import all_borrow_records
+from sqlalchemy import and_, case, delete, exists, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime
+
+STAT_COLUMNS = ('total_loans', 'open_loans', 'overdue_loans', 'unpaid_fines', 'ratings_count')
+
+
+def _compute_stats(first_id, last_id, today):
+    """Aggregate user_stats rows for users with ids in [first_id, last_id] from source tables"""
+    user_ids = db.session.query(User.id).filter(User.id.between(first_id, last_id))
+    stats = {
+        user_id: dict(user_id=user_id, total_loans=0, open_loans=0, overdue_loans=0,
+                      unpaid_fines=0.0, ratings_count=0)
+        for (user_id,) in user_ids
+    }
+
+    # Archived loans are all closed, but still part of the patron's history
+    history = all_borrow_records()
+    is_open = history.c.return_date.is_(None)
+    loans = db.session.query(
+        history.c.user_id,
+        func.count(),
+        func.sum(case((is_open, 1), else_=0)),
+        func.sum(case((and_(is_open, history.c.due_date < today), 1), else_=0))
+    ).filter(history.c.user_id.between(first_id, last_id))\
+     .group_by(history.c.user_id)
+    for user_id, total, open_loans, overdue in loans:
+        if user_id in stats:
+            stats[user_id].update(total_loans=total, open_loans=int(open_loans), overdue_loans=int(overdue))
+
+    fines = db.session.query(Fees.user_id, func.sum(Fees.amount)).filter(
+        Fees.user_id.between(first_id, last_id),
+        Fees.paid == False  # noqa: E712
+    ).group_by(Fees.user_id)
+    for user_id, amount in fines:
+        if user_id in stats:
+            stats[user_id]['unpaid_fines'] = float(amount or 0)
+
+    ratings = db.session.query(BookRating.user_id, func.count(BookRating.id))\
+        .filter(BookRating.user_id.between(first_id, last_id))\
+        .group_by(BookRating.user_id)
+    for user_id, count in ratings:
+        if user_id in stats:
+            stats[user_id]['ratings_count'] = count
+
+    now = datetime.utcnow()
+    for row in stats.values():
+        row['updated_at'] = now
+    return stats
+
+
+def _build_row(user_id, today=None):
+    """Insert a missing user_stats row computed from the source tables"""
+    row = _compute_stats(user_id, user_id, today or date.today()).get(user_id)
+    if row is None:
+        return None
+
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(UserStats), [row])
+    except IntegrityError:
+        # Another request built it first; its counts already include ours
+        pass
+    return row
+
+
+def _overdue_count(today):
+    """Correlated count of a user_stats row's overdue loans"""
+    overdue = and_(
+        BorrowRecord.user_id == UserStats.user_id,
+        BorrowRecord.return_date.is_(None),
+        BorrowRecord.due_date < today
+    )
+    return overdue, select(func.count(BorrowRecord.id)).where(overdue).scalar_subquery()
+
+
+def apply_user_stats(user_id, recount_overdue=False, **deltas):
+    """Add deltas (e.g. open_loans=-1) to a user's stats in the current transaction.
+
+    Call after the change itself has been flushed: when the user has no
+    stats row yet, one is computed from the source tables instead, and that
+    computation already reflects the change. recount_overdue recounts the
+    user's overdue loans in the same statement.
+    """
+    values = {name: getattr(UserStats, name) + delta for name, delta in deltas.items()}
+    values['updated_at'] = datetime.utcnow()
+    if recount_overdue:
+        values['overdue_loans'] = _overdue_count(date.today())[1]
+
+    result = db.session.execute(
+        update(UserStats).where(UserStats.user_id == user_id).values(**values),
+        execution_options={'synchronize_session': False}
+    )
+    if result.rowcount == 0:
+        db.session.flush()
+        _build_row(user_id)
+
+
+def get_user_stats(user_id):
+    """Return a user's summary with one primary-key read, building the row on first use"""
+    stats = db.session.get(UserStats, user_id)
+    if stats is not None:
+        return {name: getattr(stats, name) for name in ('user_id', *STAT_COLUMNS, 'updated_at')}
+
+    row = _build_row(user_id)
+    if row is not None:
+        db.session.commit()
+    return row
+
+
+def rebuild_user_stats(batch_size=1000, today=None):
+    """Recompute every user's stats from the source tables, batch by batch.
+
+    Each batch of users is recomputed with grouped aggregates and replaced in
+    one transaction. Use it to backfill the table and to reconcile drift from
+    writes that bypass the application (seeders, manual SQL). Returns the
+    number of users rebuilt.
+    """
+    today = today or date.today()
+    rebuilt = 0
+    last_id = 0
+
+    while True:
+        ids = db.session.execute(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+
+        stats = _compute_stats(ids[0], ids[-1], today)
+        db.session.execute(delete(UserStats).where(UserStats.user_id.between(ids[0], ids[-1])))
+        db.session.execute(insert(UserStats), list(stats.values()))
+        db.session.commit()
+
+        rebuilt += len(stats)
+        last_id = ids[-1]
+
+    return rebuilt
+
+
+def refresh_overdue_counts(today=None):
+    """Recount overdue loans for users whose count may have changed since yesterday.
+
+    Loans turn overdue with the calendar rather than with an event, so run
+    this daily. Only users with an overdue loan or a non-zero count are
+    touched. Returns the number of rows updated.
+    """
+    overdue, count = _overdue_count(today or date.today())
+
+    result = db.session.execute(
+        update(UserStats)
+        .where((UserStats.overdue_loans > 0) | exists().where(overdue))
+        .values(overdue_loans=count, updated_at=datetime.utcnow()),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+    return result.rowcount
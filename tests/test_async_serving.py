@@ -0,0 +1,220 @@
+import sys
+import os
+import asyncio
+import threading
+import json
+import pytest
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import Book, BookRecommendation, BorrowRecord, User
+from src.utils.async_db import async_database_url, build_async_engine_options
+from src.utils.asgi import PooledWsgiToAsgi
+from src.utils.asgi import create_asgi_app
+
+@pytest.fixture
+def apps(tmp_path):
+    # The async engine needs a database it can open separately, so no :memory:
+    flask_app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'library.db'}",
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'RATE_LIMIT_ENABLED': False,
+        'ASGI_WSGI_THREADS': 2
+    })
+    with flask_app.app_context():
+        db.create_all()
+        admin = User(fullname='Admin', email='admin@example.com', username='admin', role='admin')
+        admin.set_password('secret')
+        student = User(fullname='Sam Student', email='sam@uni.edu', username='sam', role='student')
+        student.set_password('secret')
+        db.session.add_all([admin, student])
+        db.session.add_all([
+            Book(title='Dune', author='Frank Herbert', isbn='1', genre='Fiction',
+                 average_rating=4.5, ratings_count=2, available_copies=2),
+            Book(title='Emma', author='Jane Austen', isbn='2', genre='Fiction',
+                 average_rating=4.0, ratings_count=1),
+            Book(title='Cosmos', author='Carl Sagan', isbn='3', genre='Science')
+        ])
+        db.session.flush()
+        db.session.add_all([
+            BookRecommendation(book_id=1, recommended_book_id=2, score=0.9),
+            BookRecommendation(book_id=1, recommended_book_id=3, score=0.4)
+        ])
+        today = date.today()
+        db.session.add_all([
+            BorrowRecord(user_id=student.id, book_id=book_id, borrow_date=today - timedelta(days=days),
+                         due_date=today - timedelta(days=days - 14))
+            for book_id, days in ((1, 20), (2, 5), (3, 1))
+        ])
+        db.session.commit()
+
+    asgi_app = create_asgi_app(flask_app)
+    yield flask_app, asgi_app
+    with flask_app.app_context():
+        db.drop_all()
+
+def _token(flask_app, username):
+    with flask_app.test_client() as client:
+        return client.post('/api/auth/login', json={'username': username, 'password': 'secret'})\
+            .get_json()['access_token']
+
+def _call(asgi_app, path, method='GET', token=None, body=None):
+    """Send one request through the ASGI app, returning (status, parsed JSON body)"""
+    path, _, query = path.partition('?')
+    payload = json.dumps(body).encode() if body is not None else b''
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())]
+    if token:
+        headers.append((b'authorization', f'Bearer {token}'.encode()))
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'root_path': '', 'query_string': query.encode(), 'headers': headers,
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 1234)
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': payload, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        await asgi_app(scope, receive, send)
+        await asgi_app.sessionmaker.kw['bind'].dispose()
+
+    asyncio.run(run())
+    status = messages[0]['status']
+    content = b''.join(m.get('body', b'') for m in messages[1:])
+    return status, json.loads(content) if content.strip().startswith((b'{', b'[')) else None
+
+@pytest.mark.parametrize('path', [
+    '/api/books/?genre=Fiction&per_page=1&page=2',
+    '/api/books/?search=o',
+    '/api/books/1',
+    '/api/books/genres',
+    '/api/books/top-rated?limit=1',
+    '/api/books/1/recommendations',
+    '/api/borrow/?limit=2',
+    '/api/borrow/history?limit=2',
+    '/api/users/?q=s'
+])
+def test_async_views_match_sync_views(apps, path):
+    flask_app, asgi_app = apps
+    token = _token(flask_app, 'admin')
+    view, _ = asgi_app._match({'type': 'http', 'method': 'GET', 'path': path.partition('?')[0]})
+    assert view is not None and view.__name__.endswith('_async')
+
+    with flask_app.test_client() as client:
+        expected = client.get(path, headers={'Authorization': f'Bearer {token}'})
+
+    status, body = _call(asgi_app, path, token=token)
+    assert status == expected.status_code == 200
+    assert body == expected.get_json()
+
+def test_cursor_pages_continue_across_modes(apps):
+    flask_app, asgi_app = apps
+    with flask_app.test_client() as client:
+        cursor = client.get('/api/borrow/?limit=1').get_json()['next_cursor']
+
+    status, body = _call(asgi_app, f'/api/borrow/?limit=1&cursor={cursor}')
+    assert status == 200
+    assert [r['book']['title'] for r in body['records']] == ['Emma']
+
+def test_async_errors(apps):
+    flask_app, asgi_app = apps
+    assert _call(asgi_app, '/api/books/99')[0] == 404
+    assert _call(asgi_app, '/api/borrow/?cursor=bogus') == (400, {'error': 'Invalid cursor'})
+    assert _call(asgi_app, '/api/borrow/history') == (401, {'error': 'Missing token'})
+    status, body = _call(asgi_app, '/api/users/', token=_token(flask_app, 'sam'))
+    assert status == 403
+
+def test_student_history_is_their_own(apps):
+    flask_app, asgi_app = apps
+    status, body = _call(asgi_app, '/api/borrow/history?user_id=1', token=_token(flask_app, 'sam'))
+    assert status == 200
+    assert body['user_id'] == 2
+    assert body['summary']['open_loans'] == 3
+
+def test_other_requests_fall_through_to_flask(apps):
+    flask_app, asgi_app = apps
+    status, body = _call(asgi_app, '/api/borrow/', method='POST', body={'user_id': 1, 'book_id': 1})
+    assert status == 201
+
+    # The sync write is visible to the next async read
+    status, body = _call(asgi_app, '/api/books/1')
+    assert body['stock'] == 1
+
+    # Routes without an async version, and Flask's own slash redirect
+    assert _call(asgi_app, '/api/users/me', token=_token(flask_app, 'sam'))[1]['username'] == 'sam'
+    assert _call(asgi_app, '/api/books')[0] == 308
+
+def test_async_requests_are_recorded_in_request_metrics(apps):
+    flask_app, asgi_app = apps
+    _call(asgi_app, '/api/books/1')
+
+    metrics = flask_app.extensions['request_metrics'].endpoints['books.get_book_async']
+    assert metrics.latency_ms.snapshot()['count'] == 1
+    assert metrics.sql_statements.snapshot()['sum'] == 1
+
+def test_async_database_url():
+    url = async_database_url({'SQLALCHEMY_DATABASE_URI': 'postgresql://u:p@db/library?sslmode=require'})
+    assert url.drivername == 'postgresql+asyncpg' and not url.query
+    assert async_database_url({'SQLALCHEMY_DATABASE_URI': 'sqlite:////tmp/x.db'}).drivername == 'sqlite+aiosqlite'
+    with pytest.raises(ValueError):
+        async_database_url({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+def test_libpq_options_reach_asyncpg():
+    config = {
+        'SQLALCHEMY_DATABASE_URI': 'postgresql://u:p@db/library?sslmode=verify-full&application_name=lms&connect_timeout=3',
+        'DB_STATEMENT_TIMEOUT_MS': 5000
+    }
+    connect_args = build_async_engine_options(config, async_database_url(config))['connect_args']
+    assert connect_args == {
+        'ssl': 'verify-full', 'timeout': 3.0,
+        'server_settings': {'application_name': 'lms', 'statement_timeout': '5000'}
+    }
+
+    for query in ('sslmode=sometimes', 'sslmode=prefer&sslcert=/etc/client.crt', 'gssencmode=require'):
+        config = {'SQLALCHEMY_DATABASE_URI': f'postgresql://u:p@db/library?{query}'}
+        with pytest.raises(ValueError):
+            build_async_engine_options(config, async_database_url(config))
+
+def test_wsgi_requests_run_concurrently_on_the_pool():
+    barrier = threading.Barrier(2, timeout=5)
+    threads = []
+
+    def wsgi_app(environ, start_response):
+        threads.append(threading.current_thread().name)
+        # Both requests have to be inside the app at once to pass
+        barrier.wait()
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [environ['PATH_INFO'].encode(), b'!']
+
+    adapter = PooledWsgiToAsgi(wsgi_app, threads=2)
+
+    async def call(path):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'headers': []}
+        await adapter(scope, receive, send)
+        return messages
+
+    async def both():
+        return await asyncio.gather(call('/a'), call('/b'))
+
+    first, second = asyncio.run(both())
+    adapter.executor.shutdown()
+    assert all(name.startswith('wsgi') for name in threads) and len(set(threads)) == 2
+    assert first[0]['status'] == 200
+    assert b''.join(m.get('body', b'') for m in first[1:]) == b'/a!'
+    assert b''.join(m.get('body', b'') for m in second[1:]) == b'/b!'
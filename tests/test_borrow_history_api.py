@@ -0,0 +1,112 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import Book, BorrowRecord, Fees, User
+from src.routes.borrowing import history_summary_cache
+from src.utils.user_stats import apply_user_stats
+from datetime import date, timedelta
+
+@pytest.fixture
+def client():
+    history_summary_cache.clear()
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'
+    })
+    with app.app_context():
+        db.create_all()
+        reader = User(fullname='Reader', email='reader@example.com', username='reader')
+        reader.set_password('secret')
+        other = User(fullname='Other', email='other@example.com', username='other')
+        other.set_password('secret')
+        fantasy = Book(title='Dragons', author='A', isbn='2222222222', genre='Fantasy', available_copies=2)
+        history = Book(title='Empires', author='B', isbn='3333333333', genre='History', available_copies=1)
+        db.session.add_all([reader, other, fantasy, history])
+        db.session.commit()
+
+        start = date(2024, 3, 1)
+        for i, book in enumerate([fantasy, fantasy, history]):
+            db.session.add(BorrowRecord(
+                user_id=reader.id,
+                book_id=book.id,
+                borrow_date=start + timedelta(days=i),
+                due_date=start + timedelta(days=i + 14),
+                return_date=start + timedelta(days=i + 2) if i == 0 else None,
+                status='returned' if i == 0 else 'borrowed'
+            ))
+        db.session.add(BorrowRecord(
+            user_id=other.id,
+            book_id=history.id,
+            borrow_date=start,
+            due_date=start + timedelta(days=14)
+        ))
+        db.session.add(Fees(user_id=reader.id, date=start, amount=2.5, reason='Late return'))
+        db.session.add(Fees(user_id=reader.id, date=start, amount=4.0, reason='Paid fee', paid=True))
+        db.session.commit()
+    with app.test_client() as client:
+        yield client
+    with app.app_context():
+        db.drop_all()
+
+def _auth_header(client, username='reader'):
+    response = client.post('/api/auth/login', json={'username': username, 'password': 'secret'})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+def test_history_requires_token(client):
+    assert client.get('/api/borrow/history').status_code == 401
+
+def test_history_returns_own_loans_with_summary(client):
+    response = client.get('/api/borrow/history', headers=_auth_header(client))
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [r['book']['title'] for r in data['records']] == ['Empires', 'Dragons', 'Dragons']
+    assert data['summary'] == {
+        'total_loans': 3,
+        'open_loans': 2,
+        'archived_loans': 0,
+        'outstanding_fines': 2.5,
+        'favourite_genres': ['Fantasy', 'History']
+    }
+
+def test_history_pages_with_cursor(client):
+    headers = _auth_header(client)
+    first = client.get('/api/borrow/history?limit=2', headers=headers).get_json()
+    assert len(first['records']) == 2
+    second = client.get(f"/api/borrow/history?limit=2&cursor={first['next_cursor']}", headers=headers).get_json()
+    assert len(second['records']) == 1
+    assert second['next_cursor'] is None
+
+def test_summary_invalidated_on_borrow_and_return(client):
+    headers = _auth_header(client)
+    client.get('/api/borrow/history', headers=headers)
+    assert history_summary_cache.get(1) is not None
+
+    response = client.post('/api/borrow/', json={'user_id': 1, 'book_id': 1})
+    assert response.status_code == 201
+    summary = client.get('/api/borrow/history', headers=headers).get_json()['summary']
+    assert summary['total_loans'] == 4
+    assert summary['open_loans'] == 3
+
+    client.put(f"/api/borrow/{response.get_json()['id']}/return")
+    summary = client.get('/api/borrow/history', headers=headers).get_json()['summary']
+    assert summary['open_loans'] == 2
+
+def test_summary_refreshed_after_another_worker_borrows(client):
+    headers = _auth_header(client)
+    assert client.get('/api/borrow/history', headers=headers).get_json()['summary']['total_loans'] == 3
+
+    # Written the way another worker's borrow would be, without touching this worker's cache
+    with client.application.app_context():
+        today = date.today()
+        db.session.add(BorrowRecord(user_id=1, book_id=2, borrow_date=today, due_date=today + timedelta(days=14)))
+        db.session.flush()
+        apply_user_stats(1, total_loans=1, open_loans=1)
+        db.session.commit()
+
+    summary = client.get('/api/borrow/history', headers=headers).get_json()['summary']
+    assert summary['total_loans'] == 4
+    assert summary['open_loans'] == 3
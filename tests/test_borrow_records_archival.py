@@ -0,0 +1,108 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import Book, BorrowRecord, BorrowRecordArchive, User
+from src.utils.user_stats import get_user_stats, rebuild_user_stats
+from src.utils.partitioning import (
+    all_borrow_records, archive_closed_loans, ensure_borrow_record_partitions
+)
+from sqlalchemy import func, select
+from datetime import date
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(fullname='Archivist', email='arch@example.com', username='arch', password_hash='x'))
+        db.session.add(Book(title='Old Book', author='Author O', isbn='6666666666'))
+        db.session.commit()
+
+        loans = [
+            # (borrow_date, return_date)
+            (date(2020, 1, 10), date(2020, 1, 20)),
+            (date(2020, 6, 1), date(2020, 6, 9)),
+            (date(2020, 7, 1), None),
+            (date(2024, 5, 1), date(2024, 5, 5)),
+        ]
+        for borrow_date, return_date in loans:
+            db.session.add(BorrowRecord(
+                user_id=1,
+                book_id=1,
+                borrow_date=borrow_date,
+                due_date=borrow_date,
+                return_date=return_date,
+                status='returned' if return_date else 'borrowed'
+            ))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+def test_archives_only_old_closed_loans(app):
+    with app.app_context():
+        moved = archive_closed_loans(older_than_months=24, batch_size=1, today=date(2024, 6, 1))
+        assert moved == 2
+        assert sorted(r.borrow_date for r in BorrowRecord.query) == [date(2020, 7, 1), date(2024, 5, 1)]
+        assert BorrowRecordArchive.query.count() == 2
+
+        # Running again is a no-op
+        assert archive_closed_loans(older_than_months=24, today=date(2024, 6, 1)) == 0
+
+def test_archived_loans_stay_queryable(app):
+    with app.app_context():
+        archive_closed_loans(older_than_months=24, today=date(2024, 6, 1))
+        history = all_borrow_records()
+        total = db.session.execute(select(func.count()).select_from(history)).scalar()
+        in_2020 = db.session.execute(
+            select(func.count()).select_from(history)
+            .where(history.c.borrow_date < date(2021, 1, 1))
+        ).scalar()
+        assert (total, in_2020) == (4, 3)
+
+def test_analytics_still_count_archived_loans(app):
+    with app.app_context():
+        admin = User(fullname='Admin', email='admin@example.com', username='admin', role='admin')
+        admin.set_password('secret')
+        db.session.add(admin)
+        db.session.commit()
+        archive_closed_loans(older_than_months=24, today=date(2024, 6, 1))
+        assert BorrowRecord.query.filter_by(status='returned').count() == 1
+
+        rebuild_user_stats()
+        assert get_user_stats(1)['total_loans'] == 4
+
+    with app.test_client() as client:
+        token = client.post('/api/auth/login', json={'username': 'admin', 'password': 'secret'})\
+            .get_json()['access_token']
+        stats = client.get('/api/admin/admin/stats', headers={'Authorization': f'Bearer {token}'}).get_json()
+    assert (stats['total_borrowed'], stats['total_returned']) == (1, 3)
+
+def test_history_pages_through_archived_loans(app):
+    with app.app_context():
+        db.session.get(User, 1).set_password('secret')
+        db.session.commit()
+        archive_closed_loans(older_than_months=24, today=date(2024, 6, 1))
+
+    with app.test_client() as client:
+        token = client.post('/api/auth/login', json={'username': 'arch', 'password': 'secret'})\
+            .get_json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        dates, url = [], '/api/borrow/history?limit=1'
+        while url:
+            body = client.get(url, headers=headers).get_json()
+            dates += [record['borrow_date'] for record in body['records']]
+            url = body['next_cursor'] and f"/api/borrow/history?limit=1&cursor={body['next_cursor']}"
+    assert dates == ['2024-05-01', '2020-07-01', '2020-06-01', '2020-01-10']
+    assert body['summary']['total_loans'] == len(dates)
+
+def test_partition_maintenance_is_noop_on_sqlite(app):
+    with app.app_context():
+        assert ensure_borrow_record_partitions() == []
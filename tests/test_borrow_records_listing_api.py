@@ -0,0 +1,101 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import Book, BorrowRecord, User
+from src.utils.pagination import encode_cursor
+from datetime import date, timedelta
+
+@pytest.fixture
+def client():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'
+    })
+    with app.app_context():
+        db.create_all()
+        alice = User(fullname='Alice', email='alice@example.com', username='alice', password_hash='x')
+        bob = User(fullname='Bob', email='bob@example.com', username='bob', password_hash='x')
+        book = Book(title='Listing Book', author='Author L', isbn='1111111111')
+        db.session.add_all([alice, bob, book])
+        db.session.commit()
+
+        start = date(2024, 1, 1)
+        for i in range(5):
+            db.session.add(BorrowRecord(
+                user_id=alice.id,
+                book_id=book.id,
+                borrow_date=start + timedelta(days=i),
+                due_date=start + timedelta(days=i + 14),
+                return_date=start + timedelta(days=i + 3) if i < 2 else None,
+                status='returned' if i < 2 else 'borrowed'
+            ))
+        db.session.add(BorrowRecord(
+            user_id=bob.id,
+            book_id=book.id,
+            borrow_date=start,
+            due_date=start + timedelta(days=14),
+            status='borrowed'
+        ))
+        db.session.commit()
+    with app.test_client() as client:
+        yield client
+    with app.app_context():
+        db.drop_all()
+
+def test_list_filters_by_user_and_status(client):
+    response = client.get('/api/borrow/?user_id=1&status=borrowed')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert len(data['records']) == 3
+    assert all(r['user']['username'] == 'alice' for r in data['records'])
+    assert all(r['status'] == 'borrowed' for r in data['records'])
+    assert data['next_cursor'] is None
+
+def test_list_filters_by_date_range(client):
+    response = client.get('/api/borrow/?from=2024-01-02&to=2024-01-03')
+    data = response.get_json()
+    assert [r['borrow_date'] for r in data['records']] == ['2024-01-03', '2024-01-02']
+
+def test_keyset_pagination_walks_all_records_once(client):
+    seen = []
+    cursor = None
+    while True:
+        url = '/api/borrow/?limit=2'
+        if cursor:
+            url += f'&cursor={cursor}'
+        data = client.get(url).get_json()
+        seen.extend(r['id'] for r in data['records'])
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+    assert sorted(seen) == [1, 2, 3, 4, 5, 6]
+    assert len(seen) == len(set(seen))
+
+def test_list_rejects_bad_arguments(client):
+    assert client.get('/api/borrow/?from=yesterday').status_code == 400
+    assert client.get('/api/borrow/?cursor=not-a-cursor').status_code == 400
+    for values in ([None, 3], ['2024-01-01', '3'], ['2024-01-01', None], ['not-a-date', 3], [20240101, 3]):
+        response = client.get(f'/api/borrow/?cursor={encode_cursor(values)}')
+        assert response.status_code == 400, values
+        assert response.get_json()['error'] == 'Invalid cursor'
+
+def test_list_issues_a_single_query(client):
+    from sqlalchemy import event
+
+    statements = []
+    with client.application.app_context():
+        engine = db.engine
+
+        def count(*args):
+            statements.append(args)
+
+        event.listen(engine, 'before_cursor_execute', count)
+        try:
+            client.get('/api/borrow/')
+        finally:
+            event.remove(engine, 'before_cursor_execute', count)
+    assert len(statements) == 1
@@ -0,0 +1,121 @@
+import sys
+import os
+import threading
+import multiprocessing
+import pytest
+from sqlalchemy import exc, text
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import User
+from src.utils.db_pool import MeteredQueuePool, build_engine_options, dispose_after_fork
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'library.db'}",
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'RATE_LIMIT_ENABLED': False,
+        'DB_POOL_SIZE': 2,
+        'DB_MAX_OVERFLOW': 1,
+        'DB_POOL_TIMEOUT': 1
+    })
+    with app.app_context():
+        db.create_all()
+        admin = User(fullname='Admin', email='admin@example.com', username='admin', role='admin')
+        admin.set_password('secret')
+        db.session.add(admin)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+        db.engine.dispose()
+
+def test_engine_options_come_from_config():
+    options = build_engine_options({
+        'SQLALCHEMY_DATABASE_URI': 'postgresql://u:p@db/library',
+        'DB_POOL_SIZE': 8,
+        'DB_MAX_OVERFLOW': 2,
+        'DB_POOL_PRE_PING': 'false',
+        'DB_STATEMENT_TIMEOUT_MS': 5000
+    })
+    assert options['poolclass'] is MeteredQueuePool
+    assert (options['pool_size'], options['max_overflow']) == (8, 2)
+    assert options['pool_pre_ping'] is False
+    assert options['connect_args'] == {'options': '-c statement_timeout=5000'}
+
+    # In-memory SQLite keeps its single shared connection
+    assert build_engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'}) == {'pool_pre_ping': True}
+
+def test_pool_exhaustion_is_counted_and_timed(app):
+    with app.app_context():
+        engine = db.engine
+        assert isinstance(engine.pool, MeteredQueuePool)
+
+        held = [engine.connect() for _ in range(3)]
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+        snapshot = app.extensions['pool_metrics'].snapshot(engine.pool)
+        assert snapshot['checked_out'] == 3
+        assert snapshot['overflow'] == 1
+        assert snapshot['timeouts'] == 1
+        # The timed-out checkout waited for the full pool timeout
+        assert snapshot['wait_ms']['count'] >= 4
+        assert snapshot['wait_ms']['sum'] >= 900
+        assert snapshot['wait_ms']['buckets']['500'] < snapshot['wait_ms']['count']
+
+        for conn in held:
+            conn.close()
+
+def test_waiting_checkout_gets_released_connection(app):
+    with app.app_context():
+        engine = db.engine
+        held = [engine.connect() for _ in range(3)]
+        threading.Timer(0.05, held[0].close).start()
+
+        with engine.connect() as conn:
+            assert conn.execute(text('SELECT 1')).scalar() == 1
+        for conn in held[1:]:
+            conn.close()
+
+def _worker_after_fork(app, results):
+    dispose_after_fork(app)
+    with app.app_context():
+        inherited = db.engine.pool.checkedin()
+        count = db.session.execute(text('SELECT COUNT(*) FROM users')).scalar()
+        db.session.remove()
+    results.put((inherited, count))
+
+def test_forked_worker_starts_with_empty_pools(app):
+    with app.app_context():
+        db.session.execute(text('SELECT 1'))
+        db.session.remove()
+        assert db.engine.pool.checkedin() == 1
+
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    child = context.Process(target=_worker_after_fork, args=(app, results))
+    child.start()
+    assert results.get(timeout=30) == (0, 1)
+    child.join(timeout=30)
+
+    # The master's own pooled connection is untouched
+    with app.app_context():
+        assert db.engine.pool.checkedin() == 1
+        assert db.session.execute(text('SELECT COUNT(*) FROM users')).scalar() == 1
+
+def test_pool_endpoint_requires_admin(app):
+    client = app.test_client()
+    assert client.get('/api/admin/admin/db-pool').status_code == 401
+
+    token = client.post('/api/auth/login', json={'username': 'admin', 'password': 'secret'}).get_json()['access_token']
+    response = client.get('/api/admin/admin/db-pool', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['pool_class'] == 'MeteredQueuePool'
+    assert body['pool_size'] == 2
+    assert body['checkouts'] >= 1
+    assert '+Inf' in body['wait_ms']['buckets']
@@ -0,0 +1,115 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import Book, Event, User
+from src.utils.events import BOOK_BORROWED, acknowledge, consume, read_events
+from datetime import datetime, timedelta
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'EVENT_VISIBILITY_SECONDS': 0
+    })
+    with app.app_context():
+        db.create_all()
+        admin = User(fullname='Admin', email='admin@example.com', username='admin', role='admin')
+        admin.set_password('secret')
+        db.session.add(admin)
+        db.session.add(Book(title='Logged Book', author='Author E', isbn='5555555555', available_copies=1))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def _admin_headers(client):
+    response = client.post('/api/auth/login', json={'username': 'admin', 'password': 'secret'})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+def test_mutations_append_events_in_order(client, app):
+    loan = client.post('/api/borrow/', json={'user_id': 1, 'book_id': 1}).get_json()
+    client.put(f"/api/borrow/{loan['id']}/return")
+    client.post('/api/books/1/ratings', json={'rating': 4}, headers=_admin_headers(client))
+    created = client.post('/api/admin/admin/books', json={'title': 'New', 'author': 'Someone'})
+    assert created.status_code == 201
+
+    with app.app_context():
+        types = [e.event_type for e in Event.query.order_by(Event.id)]
+        assert types == ['book.borrowed', 'book.returned', 'book.rated', 'book.created']
+
+def test_failed_mutation_writes_no_event(client, app):
+    response = client.post('/api/borrow/', json={'user_id': 1, 'book_id': 99})
+    assert response.status_code == 404
+    with app.app_context():
+        assert Event.query.count() == 0
+
+def test_consumer_reads_batches_and_checkpoints(client):
+    headers = _admin_headers(client)
+    for _ in range(3):
+        loan = client.post('/api/borrow/', json={'user_id': 1, 'book_id': 1}).get_json()
+        client.put(f"/api/borrow/{loan['id']}/return")
+
+    batch = client.get('/api/admin/admin/events?consumer=rollups&limit=4', headers=headers).get_json()
+    assert [e['id'] for e in batch['events']] == [1, 2, 3, 4]
+
+    ack = client.post('/api/admin/admin/events/ack', json={'consumer': 'rollups', 'last_event_id': 4}, headers=headers)
+    assert ack.get_json()['last_event_id'] == 4
+
+    batch = client.get('/api/admin/admin/events?consumer=rollups', headers=headers).get_json()
+    assert [e['id'] for e in batch['events']] == [5, 6]
+
+    # Other consumers keep their own checkpoint
+    batch = client.get('/api/admin/admin/events?consumer=mailer&types=book.returned', headers=headers).get_json()
+    assert [e['event_type'] for e in batch['events']] == ['book.returned'] * 3
+
+@pytest.mark.parametrize('body', [
+    {'consumer': 'rollups'},
+    {'consumer': 'rollups', 'last_event_id': 'four'},
+    {'consumer': 'rollups', 'last_event_id': [4]},
+    {'consumer': 'rollups', 'last_event_id': True},
+    {'consumer': 'rollups', 'last_event_id': -1},
+    {'consumer': ['rollups'], 'last_event_id': 4},
+    ['rollups', 4]
+])
+def test_ack_rejects_malformed_bodies(client, body):
+    response = client.post('/api/admin/admin/events/ack', json=body, headers=_admin_headers(client))
+    assert response.status_code == 400
+
+def test_events_require_admin(client):
+    assert client.get('/api/admin/admin/events?consumer=x').status_code == 401
+
+def test_consume_helper_advances_checkpoint(client, app):
+    for _ in range(2):
+        client.post('/api/borrow/', json={'user_id': 1, 'book_id': 1})
+        loan_id = client.get('/api/borrow/').get_json()['records'][0]['id']
+        client.put(f"/api/borrow/{loan_id}/return")
+
+    seen = []
+    with app.app_context():
+        assert consume('recs', lambda events: seen.extend(e.id for e in events), batch_size=3) == 4
+        assert consume('recs', lambda events: seen.extend(e.id for e in events)) == 0
+    assert seen == [1, 2, 3, 4]
+
+def test_event_committed_out_of_id_order_is_not_skipped(app):
+    app.config['EVENT_VISIBILITY_SECONDS'] = 5
+    started = datetime.utcnow()
+    with app.app_context():
+        # Id 2 commits first while the transaction that drew id 1 is still open
+        db.session.add(Event(id=2, event_type=BOOK_BORROWED, payload={}, created_at=started))
+        db.session.commit()
+        assert read_events('rollups', now=started + timedelta(seconds=1)) == []
+
+        db.session.add(Event(id=1, event_type=BOOK_BORROWED, payload={}, created_at=started))
+        db.session.commit()
+        events = read_events('rollups', now=started + timedelta(seconds=6))
+        assert [e.id for e in events] == [1, 2]
+        assert acknowledge('rollups', events[-1].id) == 2
@@ -0,0 +1,94 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import Book, Hold, User
+from src.utils.holds import expire_stale_holds
+from datetime import datetime, timedelta
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'
+    })
+    with app.app_context():
+        db.create_all()
+        for name in ('first', 'second', 'third'):
+            db.session.add(User(fullname=name, email=f'{name}@example.com', username=name, password_hash='x'))
+        db.session.add(Book(title='Popular Book', author='Author H', isbn='4444444444', available_copies=1))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def test_hold_rejected_while_copies_available(client):
+    response = client.post('/api/borrow/holds', json={'user_id': 2, 'book_id': 1})
+    assert response.status_code == 400
+
+def test_queue_positions_and_allocation_on_return(client, app):
+    loan = client.post('/api/borrow/', json={'user_id': 1, 'book_id': 1}).get_json()
+    assert client.post('/api/borrow/', json={'user_id': 2, 'book_id': 1}).status_code == 400
+
+    second = client.post('/api/borrow/holds', json={'user_id': 2, 'book_id': 1}).get_json()
+    third = client.post('/api/borrow/holds', json={'user_id': 3, 'book_id': 1}).get_json()
+    assert (second['position'], third['position']) == (1, 2)
+    assert client.post('/api/borrow/holds', json={'user_id': 2, 'book_id': 1}).status_code == 409
+
+    returned = client.put(f"/api/borrow/{loan['id']}/return").get_json()
+    assert returned['allocated_hold_id'] == second['id']
+    assert client.get(f"/api/borrow/holds/{third['id']}/position").get_json()['position'] == 1
+
+    with app.app_context():
+        assert db.session.get(Book, 1).stock == 0
+
+    # The copy is reserved: only the hold owner can borrow it
+    assert client.post('/api/borrow/', json={'user_id': 3, 'book_id': 1}).status_code == 400
+    assert client.post('/api/borrow/', json={'user_id': 2, 'book_id': 1}).status_code == 201
+    with app.app_context():
+        assert db.session.get(Hold, second['id']).status == 'fulfilled'
+
+def test_expired_hold_passes_copy_to_next_in_queue(client, app):
+    loan = client.post('/api/borrow/', json={'user_id': 1, 'book_id': 1}).get_json()
+    second = client.post('/api/borrow/holds', json={'user_id': 2, 'book_id': 1}).get_json()
+    third = client.post('/api/borrow/holds', json={'user_id': 3, 'book_id': 1}).get_json()
+    client.put(f"/api/borrow/{loan['id']}/return")
+
+    with app.app_context():
+        assert expire_stale_holds(now=datetime.utcnow() + timedelta(days=10)) == 1
+        assert db.session.get(Hold, second['id']).status == 'expired'
+        assert db.session.get(Hold, third['id']).status == 'ready'
+
+def test_cancel_ready_hold_returns_copy_to_stock(client, app):
+    loan = client.post('/api/borrow/', json={'user_id': 1, 'book_id': 1}).get_json()
+    hold = client.post('/api/borrow/holds', json={'user_id': 2, 'book_id': 1}).get_json()
+    client.put(f"/api/borrow/{loan['id']}/return")
+
+    assert client.delete(f"/api/borrow/holds/{hold['id']}").get_json()['status'] == 'cancelled'
+    with app.app_context():
+        assert db.session.get(Book, 1).stock == 1
+
+def test_cancelling_a_waiting_hold_moves_the_queue_up(client, app):
+    with app.app_context():
+        db.session.add(User(fullname='fourth', email='fourth@example.com', username='fourth', password_hash='x'))
+        db.session.commit()
+    loan = client.post('/api/borrow/', json={'user_id': 1, 'book_id': 1}).get_json()
+    holds = [client.post('/api/borrow/holds', json={'user_id': user_id, 'book_id': 1}).get_json()
+             for user_id in (2, 3, 4)]
+    assert [hold['position'] for hold in holds] == [1, 2, 3]
+
+    assert client.delete(f"/api/borrow/holds/{holds[1]['id']}").status_code == 200
+    positions = [client.get(f"/api/borrow/holds/{hold['id']}/position").get_json()['position'] for hold in holds]
+    assert positions == [1, 0, 2]
+
+    # The head leaves for the shelf; the patron behind it is next, and a new hold joins behind them
+    client.put(f"/api/borrow/{loan['id']}/return")
+    assert client.get(f"/api/borrow/holds/{holds[2]['id']}/position").get_json()['position'] == 1
+    assert client.post('/api/borrow/holds', json={'user_id': 3, 'book_id': 1}).get_json()['position'] == 2
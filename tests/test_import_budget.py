@@ -0,0 +1,45 @@
+import sys
+import os
+import json
+import subprocess
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app
+from src.utils.api_only import HEAVY_MODULES
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Wall-clock seconds an API worker may spend importing and building the app.
+# Cold start is ~0.5s here; override on slow CI machines.
+IMPORT_BUDGET_SECONDS = float(os.environ.get('API_IMPORT_BUDGET_SECONDS', 3.0))
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from src.app_factory import create_app
+create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+elapsed = time.perf_counter() - start
+import src.ml.recommendation_engine, src.ml.book_analyzer, src.ml.simple_recommender
+heavy = sorted({name.split('.')[0] for name in sys.modules} & set(sys.argv[1:]))
+print(json.dumps({'elapsed': elapsed, 'heavy': heavy}))
+"""
+
+def _start_worker():
+    result = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT, *HEAVY_MODULES],
+        cwd=ROOT, env=dict(os.environ, API_ONLY='1'),
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_api_worker_starts_within_budget_without_ml_imports():
+    startup = _start_worker()
+    assert startup['heavy'] == []
+    assert startup['elapsed'] < IMPORT_BUDGET_SECONDS
+
+def test_api_only_mode_disables_dataset_import():
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'API_ONLY': True})
+    response = app.test_client().post('/api/books/import-dataset')
+    assert response.status_code == 404
+    assert 'src.utils.dataset_importer' not in sys.modules
@@ -0,0 +1,125 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, inspect, text
+from src.utils.index_advisor import (
+    Workload, advise, candidate_columns, full_scans, record_workload, table_aliases,
+    unindexed_foreign_keys, verify, write_migration
+)
+
+def _library(path):
+    engine = create_engine(f'sqlite:///{path}')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)'))
+        conn.execute(text(
+            'CREATE TABLE loans (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users(id), '
+            'status TEXT, borrow_date TEXT)'
+        ))
+        conn.execute(text('INSERT INTO users (id, name) VALUES (:id, :name)'),
+                     [{'id': i, 'name': f'user{i}'} for i in range(1, 201)])
+        conn.execute(text('INSERT INTO loans (user_id, status, borrow_date) VALUES (:u, :s, :d)'), [
+            {'u': i % 200 + 1, 's': 'borrowed' if i % 10 else 'overdue', 'd': f'2025-{i % 12 + 1:02d}-01'}
+            for i in range(5000)
+        ])
+    return engine
+
+def _workload(engine):
+    with record_workload(engine) as workload, engine.connect() as conn:
+        for user_id in (1, 2, 3):
+            conn.execute(text('SELECT * FROM loans WHERE loans.user_id = :u ORDER BY loans.borrow_date'),
+                         {'u': user_id})
+        conn.execute(text('SELECT * FROM users WHERE users.id = :id'), {'id': 1})
+    return workload
+
+def test_candidate_columns_put_equality_before_range():
+    statement = ('SELECT l.id FROM loans AS l JOIN users u ON u.id = l.user_id '
+                 'WHERE l.status = ? AND l.borrow_date >= ? ORDER BY l.borrow_date')
+    assert table_aliases(statement) == {'loans': 'loans', 'l': 'loans', 'users': 'users', 'u': 'users'}
+    assert candidate_columns(statement, 'loans') == ('status', 'user_id', 'borrow_date')
+    assert candidate_columns(statement, 'users') == ('id',)
+
+def test_full_scans_from_plans():
+    aliases = {'loans': 'loans', 'l': 'loans'}
+    assert full_scans(['SCAN l', 'SEARCH users USING INTEGER PRIMARY KEY (rowid=?)'], 'sqlite', aliases) == {'loans'}
+    assert full_scans(['SCAN loans USING INDEX ix_loans_status'], 'sqlite', aliases) == set()
+    assert full_scans(['Limit  (cost=0.00..1.00)', '  ->  Seq Scan on loans l  (cost=0.00..90.00)'],
+                      'postgresql', aliases) == {'loans'}
+
+def test_workload_groups_statements_by_shape(tmp_path):
+    engine = _library(tmp_path / 'library.db')
+    workload = _workload(engine)
+    assert len(workload) == 2
+    hottest = max(workload, key=lambda sample: sample.calls)
+    assert hottest.calls == 3 and hottest.is_select
+
+    path = tmp_path / 'workload.json'
+    workload.save(path)
+    assert len(Workload.load(path)) == 2
+
+def test_failed_statements_leave_no_timing_state(tmp_path):
+    engine = _library(tmp_path / 'library.db')
+    with record_workload(engine) as workload, engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(Exception):
+                conn.execute(text('SELECT * FROM no_such_table'))
+        conn.execute(text('SELECT * FROM users WHERE users.id = :id'), {'id': 1})
+        assert not conn.info.get('advisor_start')
+    assert [sample.calls for sample in workload] == [1]
+
+def test_advise_tries_candidates_and_rolls_them_back(tmp_path):
+    engine = _library(tmp_path / 'library.db')
+    recommendations = advise(engine, _workload(engine), min_rows=1000, repeats=1)
+
+    advised = recommendations[0]
+    assert (advised['table'], advised['columns']) == ('loans', ['user_id', 'borrow_date'])
+    assert advised['name'] == 'ix_loans_user_id_borrow_date'
+    query = advised['queries'][0]
+    assert query['before']['full_scans'] == ['loans'] and query['after']['full_scans'] == []
+    assert any('ix_loans_user_id_borrow_date' in line for line in query['after']['plan'])
+    # users is below min_rows and already searched by primary key
+    assert all(r['table'] == 'loans' for r in recommendations)
+    assert inspect(engine).get_indexes('loans') == []
+
+def test_foreign_keys_without_an_index(tmp_path):
+    engine = _library(tmp_path / 'library.db')
+    assert unindexed_foreign_keys(engine) == [('loans', ('user_id',), 'users')]
+
+    # Covered by the workload's (user_id, borrow_date) recommendation, so not repeated
+    recommendations = advise(engine, _workload(engine), repeats=1)
+    assert [r['name'] for r in recommendations] == ['ix_loans_user_id_borrow_date']
+
+    with engine.begin() as conn:
+        conn.execute(text('CREATE INDEX ix_loans_user_id_status ON loans (user_id, status)'))
+    assert unindexed_foreign_keys(engine) == []
+
+def test_write_migration_takes_the_next_number(tmp_path):
+    (tmp_path / '001_create_loans.sql').write_text('')
+    (tmp_path / '014_create_sessions.sql').write_text('')
+    recommendation = {'table': 'loans', 'columns': ['user_id', 'borrow_date'], 'name': 'ix_loans_user_id_borrow_date',
+                      'queries': [{'endpoint': 'borrowing.get_borrow_history'}]}
+
+    path = write_migration([recommendation], tmp_path)
+    assert os.path.basename(path) == '015_add_advised_indexes.sql'
+    with open(path, newline='') as f:
+        sql = f.read()
+    assert '-- borrowing.get_borrow_history\r\n' in sql
+    assert 'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_loans_user_id_borrow_date\r\n    ON loans (user_id, borrow_date);' in sql
+
+def test_verify_flags_scans_until_the_index_exists(tmp_path):
+    engine = _library(tmp_path / 'library.db')
+    workload = Workload()
+    workload.add('SELECT * FROM loans WHERE loans.user_id = ? ORDER BY loans.borrow_date', [1],
+                 'borrowing.get_borrow_history')
+    workload.add('SELECT * FROM loans LIMIT ? OFFSET ?', [20, 0], 'borrowing.get_borrow_records')
+
+    results = {r['endpoint']: r for r in verify(engine, workload, repeats=1)}
+    assert results['borrowing.get_borrow_history']['full_scans'] == ['loans']
+    # A page of an unsorted scan stops early
+    assert results['borrowing.get_borrow_records']['uses_index']
+
+    with engine.begin() as conn:
+        conn.execute(text('CREATE INDEX ix_loans_user_id_borrow_date ON loans (user_id, borrow_date)'))
+    assert all(r['uses_index'] for r in verify(engine, workload, repeats=1))
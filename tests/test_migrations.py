@@ -0,0 +1,164 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, inspect, text
+from src.app_factory import db
+import src.models  # noqa: F401  (registers the model tables)
+from src.utils.migrations import (
+    MigrationError, baseline, load_migrations, migrate, migration_status, split_statements
+)
+
+def _write(directory, filename, sql):
+    (directory / filename).write_text(sql)
+
+@pytest.fixture
+def migrations_dir(tmp_path):
+    directory = tmp_path / 'migrations'
+    directory.mkdir()
+    _write(directory, '001_create_books.sql', """-- Migration script to create books
+CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT NOT NULL, genre TEXT);
+INSERT INTO books (title, genre) VALUES ('Dune; the novel', 'Fiction'), ('It''s', NULL);
+""")
+    _write(directory, '002_add_books_shelf.sql', """-- Migration script to add a shelf column
+ALTER TABLE books ADD COLUMN shelf TEXT;
+""")
+    return directory
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'library.db'}")
+
+def test_split_statements_respects_quotes_comments_and_dollar_bodies():
+    statements, options = split_statements("""-- migrate: dialect postgresql
+CREATE TABLE a (note TEXT DEFAULT 'x;y');  -- trailing; comment
+/* block; comment */ SELECT 1;
+DO $$ BEGIN PERFORM 1; END $$;
+-- migrate: backfill batch_size=10 pause_ms=0
+UPDATE a SET note = 'z' WHERE rowid IN (SELECT rowid FROM a WHERE note IS NULL LIMIT :batch_size);
+""")
+    assert options == {'dialect': 'postgresql'}
+    assert [s.sql.split()[0] for s in statements] == ['CREATE', '/*', 'DO', 'UPDATE']
+    assert statements[0].sql == "CREATE TABLE a (note TEXT DEFAULT 'x;y')"
+    assert statements[2].sql == 'DO $$ BEGIN PERFORM 1; END $$'
+    assert [s.backfill for s in statements] == [None, None, None, {'batch_size': 10, 'pause_ms': 0}]
+
+def test_migrations_apply_in_order_once(engine, migrations_dir):
+    assert migrate(engine, migrations_dir) == [1, 2]
+    columns = [c['name'] for c in inspect(engine).get_columns('books')]
+    assert columns == ['id', 'title', 'genre', 'shelf']
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT title FROM books ORDER BY id')).scalars().all() == ['Dune; the novel', "It's"]
+
+    assert migrate(engine, migrations_dir) == []
+    assert [entry['state'] for entry in migration_status(engine, migrations_dir)] == ['applied', 'applied']
+
+def test_failed_migration_rolls_back_and_stops(engine, migrations_dir):
+    _write(migrations_dir, '003_broken.sql', """CREATE TABLE tags (id INTEGER PRIMARY KEY);
+ALTER TABLE missing ADD COLUMN x TEXT;
+""")
+    _write(migrations_dir, '004_after.sql', 'CREATE TABLE later (id INTEGER PRIMARY KEY);\n')
+
+    with pytest.raises(MigrationError, match='003_broken.sql'):
+        migrate(engine, migrations_dir)
+    tables = inspect(engine).get_table_names()
+    assert 'books' in tables and 'tags' not in tables and 'later' not in tables
+    assert [e['state'] for e in migration_status(engine, migrations_dir)] == ['applied', 'applied', 'pending', 'pending']
+
+def test_dry_run_and_target_change_nothing_beyond_them(engine, migrations_dir):
+    lines = []
+    assert migrate(engine, migrations_dir, dry_run=True, log=lines.append) == [1, 2]
+    assert lines[0] == '001_create_books.sql (transaction)'
+    assert '  ALTER TABLE books ADD COLUMN shelf TEXT;' in lines
+    assert inspect(engine).get_table_names() == ['schema_migrations']
+
+    assert migrate(engine, migrations_dir, target=1) == [1]
+    assert 'shelf' not in [c['name'] for c in inspect(engine).get_columns('books')]
+
+def test_online_migration_builds_indexes_and_backfills_in_batches(engine, migrations_dir):
+    _write(migrations_dir, '003_backfill_genre.sql', """-- Migration script to index and backfill genres
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_books_genre ON books (genre);
+
+-- migrate: backfill batch_size=2 pause_ms=0
+UPDATE books SET genre = 'Unknown'
+ WHERE id IN (SELECT id FROM books WHERE genre IS NULL LIMIT :batch_size);
+""")
+    migrate(engine, migrations_dir, target=2)
+    with engine.begin() as conn:
+        conn.execute(text('INSERT INTO books (title) VALUES (:title)'), [{'title': f'b{i}'} for i in range(5)])
+
+    migration = load_migrations(migrations_dir)[-1]
+    assert not migration.transactional
+
+    log = []
+    assert migrate(engine, migrations_dir, log=log.append) == [3]
+    # Six untitled genres in batches of two: three full batches and an empty one
+    assert '    backfilled 6 rows in 4 batches' in log
+    assert [i['name'] for i in inspect(engine).get_indexes('books')] == ['ix_books_genre']
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT COUNT(*) FROM books WHERE genre IS NULL')).scalar() == 0
+
+def test_baseline_and_modified_files(engine, migrations_dir):
+    assert baseline(engine, migrations_dir, version=1) == [1]
+    assert migrate(engine, migrations_dir, dry_run=True) == [2]
+
+    _write(migrations_dir, '002_add_books_shelf.sql', 'ALTER TABLE books ADD COLUMN shelf_code TEXT;\n')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT, genre TEXT)'))
+    migrate(engine, migrations_dir)
+    _write(migrations_dir, '002_add_books_shelf.sql', 'ALTER TABLE books ADD COLUMN shelf TEXT;\n')
+
+    status = {entry['version']: entry for entry in migration_status(engine, migrations_dir)}
+    assert status[1]['baseline'] and status[1]['state'] == 'applied'
+    assert status[2]['state'] == 'modified'
+
+def test_duplicate_versions_and_other_dialects(engine, migrations_dir):
+    _write(migrations_dir, '003_partition.sql', '-- migrate: dialect postgresql\nSELECT 1;\n')
+    assert migrate(engine, migrations_dir) == [1, 2]
+    assert migration_status(engine, migrations_dir)[-1]['state'] == 'skipped'
+
+    _write(migrations_dir, '002_duplicate.sql', 'SELECT 1;\n')
+    with pytest.raises(MigrationError, match='share version 2'):
+        load_migrations(migrations_dir)
+
+def test_repository_migrations_target_the_model_tables():
+    migrations = load_migrations()
+    assert [m.version for m in migrations] == sorted({m.version for m in migrations})
+    for migration in migrations:
+        for statement in migration.statements:
+            assert 'REFERENCES "user"' not in statement.sql and 'TABLE book ' not in statement.sql
+    assert not next(m for m in migrations if m.name == 'add_advised_indexes').transactional
+
+def test_repository_migrations_build_the_model_schema_on_sqlite(engine):
+    # The two tables the original application created before migrations/; books
+    # already has the copy counts 004 adds, which SQLite must skip, not fail on
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY, fullname VARCHAR(100) NOT NULL, "
+            "email VARCHAR(100) NOT NULL UNIQUE, username VARCHAR(50) NOT NULL UNIQUE, "
+            "password_hash VARCHAR(255) NOT NULL, role VARCHAR(20), created_at DATETIME)"
+        )
+        conn.exec_driver_sql(
+            "CREATE TABLE books (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, "
+            "author VARCHAR(100) NOT NULL, isbn VARCHAR(20) UNIQUE, genre VARCHAR(50), "
+            "published_year INTEGER, total_copies INTEGER DEFAULT 1, "
+            "available_copies INTEGER DEFAULT 1, created_at DATETIME)"
+        )
+
+    expected = [m.version for m in load_migrations() if m.applies_to('sqlite')]
+    assert migrate(engine) == expected
+    assert migrate(engine) == []
+
+    inspector = inspect(engine)
+    with engine.connect() as conn:
+        index_names = set(conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'").scalars())
+        for table in db.metadata.sorted_tables:
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            assert {column.name for column in table.columns} <= columns, table.name
+            assert {index.name for index in table.indexes} <= index_names, table.name
+
+        # SERIAL keys became rowid aliases, so ids are still assigned
+        conn.exec_driver_sql("INSERT INTO holds (user_id, book_id) VALUES (1, 1)")
+        assert conn.exec_driver_sql("SELECT id FROM holds").scalar() == 1
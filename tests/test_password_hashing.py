@@ -0,0 +1,116 @@
+import sys
+import os
+import hashlib
+import threading
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import User
+from src.utils.passwords import PasswordHasher, PasswordHasherBusy, needs_rehash
+from werkzeug.security import generate_password_hash
+
+CURRENT_METHOD = 'pbkdf2:sha256:1000'
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'PASSWORD_HASH_METHOD': CURRENT_METHOD
+    })
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def _add_user(app, password_hash):
+    with app.app_context():
+        db.session.add(User(fullname='Seeded', email='seeded@example.com', username='seeded', password_hash=password_hash))
+        db.session.commit()
+
+def _stored_hash(app):
+    with app.app_context():
+        return User.query.filter_by(username='seeded').one().password_hash
+
+def test_needs_rehash_detects_outdated_parameters():
+    assert not needs_rehash(generate_password_hash('pw', CURRENT_METHOD), CURRENT_METHOD)
+    assert needs_rehash(generate_password_hash('pw', 'pbkdf2:sha256:500'), CURRENT_METHOD)
+    assert needs_rehash(generate_password_hash('pw', CURRENT_METHOD, salt_length=8), CURRENT_METHOD)
+    assert needs_rehash(hashlib.sha256(b'pw').hexdigest(), CURRENT_METHOD)
+
+def test_login_upgrades_outdated_hash(app, client):
+    _add_user(app, generate_password_hash('secret', 'pbkdf2:sha256:500'))
+
+    assert client.post('/api/auth/login', json={'username': 'seeded', 'password': 'secret'}).status_code == 200
+    assert _stored_hash(app).startswith(CURRENT_METHOD + '$')
+
+def test_login_upgrades_legacy_sha256_seed_hash(app, client):
+    _add_user(app, hashlib.sha256(b'student123').hexdigest())
+
+    assert client.post('/api/auth/login', json={'username': 'seeded', 'password': 'wrong'}).status_code == 401
+    assert client.post('/api/auth/login', json={'username': 'seeded', 'password': 'student123'}).status_code == 200
+    assert _stored_hash(app).startswith(CURRENT_METHOD + '$')
+
+def test_saturated_hasher_rejects_immediately():
+    hasher = PasswordHasher(method=CURRENT_METHOD, workers=1, queue_depth=0)
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=hasher.submit, args=(block,))
+    worker.start()
+    started.wait(5)
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash('pw')
+    finally:
+        release.set()
+        worker.join()
+    assert hasher.hash('pw').startswith(CURRENT_METHOD)
+
+def test_slow_hash_times_out_as_busy():
+    hasher = PasswordHasher(method=CURRENT_METHOD, workers=1, queue_depth=1, timeout=0.05)
+    release = threading.Event()
+
+    with pytest.raises(PasswordHasherBusy):
+        hasher.submit(release.wait, 5)
+    # Queued behind the slow hash: cancelled, so its slot is free again
+    with pytest.raises(PasswordHasherBusy):
+        hasher.hash('pw')
+    release.set()
+    assert hasher.hash('pw').startswith(CURRENT_METHOD)
+
+def test_saturation_maps_to_503(app, client, monkeypatch):
+    def busy(*args):
+        raise PasswordHasherBusy()
+
+    monkeypatch.setattr(app.extensions['password_hasher'], 'submit', busy)
+    _add_user(app, generate_password_hash('secret', CURRENT_METHOD))
+
+    response = client.post('/api/auth/login', json={'username': 'seeded', 'password': 'secret'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+def test_hash_timeout_maps_to_503(app, client, monkeypatch):
+    hasher = app.extensions['password_hasher']
+    release = threading.Event()
+    monkeypatch.setattr(hasher, 'timeout', 0.05)
+    monkeypatch.setattr('src.utils.passwords._check', lambda *args: release.wait(5))
+    _add_user(app, generate_password_hash('secret', CURRENT_METHOD))
+
+    try:
+        response = client.post('/api/auth/login', json={'username': 'seeded', 'password': 'secret'})
+    finally:
+        release.set()
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
@@ -0,0 +1,118 @@
+import sys
+import os
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import User
+from src.utils.rate_limit import RateLimiter, SqliteBucketStore
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'RATE_LIMIT_IP': '10/minute',
+        'RATE_LIMIT_USERNAME': '3/minute'
+    })
+    with app.app_context():
+        db.create_all()
+        admin = User(fullname='Admin', email='admin@example.com', username='admin', role='admin')
+        admin.set_password('secret')
+        db.session.add(admin)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def test_username_bucket_rejects_before_any_query(app, client):
+    for _ in range(3):
+        assert client.post('/api/auth/login', json={'username': 'victim', 'password': 'x'}).status_code == 401
+
+    # A made-up session cookie must not cost a web_sessions lookup either
+    client.set_cookie('session', 'x' * 43)
+    statements = []
+    with app.app_context():
+        listener = lambda *args: statements.append(args)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            response = client.post('/api/auth/login', json={'username': 'Victim ', 'password': 'x'})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert statements == []
+
+def test_ip_bucket_covers_many_usernames(client):
+    codes = [
+        client.post('/api/auth/register', json={'username': f'u{i}', 'email': f'u{i}@x.com',
+                                                'fullname': 'U', 'password': 'pw'}).status_code
+        for i in range(12)
+    ]
+    assert codes[:10] == [201] * 10
+    assert codes[10:] == [429, 429]
+
+def test_counters_exposed_to_admins(client):
+    token = client.post('/api/auth/login', json={'username': 'admin', 'password': 'secret'}).get_json()['access_token']
+    for _ in range(4):
+        client.post('/api/auth/login', json={'username': 'victim', 'password': 'x'})
+
+    response = client.get('/api/admin/admin/rate-limits', headers={'Authorization': f'Bearer {token}'})
+    assert response.get_json()['auth.login'] == {'allowed': 4, 'rejected': 1}
+    assert client.get('/api/admin/admin/rate-limits').status_code == 401
+
+def test_bucket_refills_over_time():
+    limiter = RateLimiter(ip_rate='2/minute', username_rate='2/minute')
+    assert limiter.check('auth.login', '1.2.3.4', now=0) == 0
+    assert limiter.check('auth.login', '1.2.3.4', now=0) == 0
+    assert limiter.check('auth.login', '1.2.3.4', now=0) > 0
+    assert limiter.check('auth.login', '1.2.3.4', now=30) == 0
+
+def test_rejected_ip_does_not_drain_username_bucket():
+    limiter = RateLimiter(ip_rate='2/minute', username_rate='3/minute')
+    for _ in range(10):
+        limiter.check('auth.login', '6.6.6.6', 'victim', now=0)
+
+    # Only the attacker's two allowed attempts were charged; the victim keeps the third
+    assert limiter.check('auth.login', '1.2.3.4', 'victim', now=0) == 0
+    assert limiter.check('auth.login', '1.2.3.4', 'victim', now=0) > 0
+
+def test_shared_store_is_seen_by_other_workers(tmp_path):
+    path = str(tmp_path / 'buckets.db')
+    worker_a = RateLimiter(store=SqliteBucketStore(path), ip_rate='1/minute')
+    worker_b = RateLimiter(store=SqliteBucketStore(path), ip_rate='1/minute')
+    assert worker_a.check('auth.login', '5.6.7.8', now=100) == 0
+    assert worker_b.check('auth.login', '5.6.7.8', now=100) > 0
+
+def _register_codes(app, forwarded_for):
+    client = app.test_client()
+    return [
+        client.post('/api/auth/register', json={'username': f'{forwarded_for}-{i}', 'email': f'{i}@{forwarded_for}.com',
+                                                'fullname': 'U', 'password': 'pw'},
+                    headers={'X-Forwarded-For': forwarded_for}).status_code
+        for i in range(3)
+    ]
+
+@pytest.mark.parametrize('proxies, separate', [(1, True), (0, False)])
+def test_clients_behind_a_trusted_proxy_get_their_own_bucket(proxies, separate):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'RATE_LIMIT_IP': '2/minute',
+        'TRUSTED_PROXY_COUNT': proxies
+    })
+    with app.app_context():
+        db.create_all()
+
+    assert _register_codes(app, '203.0.113.1') == [201, 201, 429]
+    # Same proxy address; a different client only counts as one when the proxy is trusted
+    assert _register_codes(app, '203.0.113.2')[0] == (201 if separate else 429)
@@ -0,0 +1,116 @@
+import sys
+import os
+import pytest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import g
+from sqlalchemy import insert
+from src.app_factory import create_app, db
+from src.models import Book, Event, User
+
+def _make_app(tmp_path, replica_url=None):
+    primary = tmp_path / 'primary.db'
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{primary}',
+        'REPLICA_DATABASE_URLS': replica_url or f"sqlite:///{tmp_path / 'replica.db'}",
+        'REPLICA_CHECK_SECONDS': 0,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'RATE_LIMIT_ENABLED': False,
+        'SESSION_BACKEND': 'memory'
+    })
+    with app.app_context():
+        db.create_all()
+        admin = User(fullname='Admin', email='admin@example.com', username='admin', role='admin')
+        admin.set_password('secret')
+        db.session.add_all([admin, Book(title='Primary copy', author='A', isbn='1', available_copies=3)])
+        db.session.commit()
+
+        # Two SQLite files stand in for a primary and its streaming replica
+        if replica_url is None:
+            replica_engine = app.extensions['replicas'].replicas[0].engine
+            db.metadata.create_all(replica_engine)
+            with replica_engine.begin() as conn:
+                conn.execute(insert(Book).values(id=1, title='Replica copy', author='A', isbn='1'))
+    return app
+
+@pytest.fixture
+def app(tmp_path):
+    app = _make_app(tmp_path)
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+def _admin_headers(client):
+    token = client.post('/api/auth/login', json={'username': 'admin', 'password': 'secret'})\
+        .get_json()['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+def test_catalog_reads_use_the_replica(app):
+    with app.test_client() as client:
+        assert client.get('/api/books/1').get_json()['title'] == 'Replica copy'
+        assert client.get('/api/books/').get_json()['books'][0]['title'] == 'Replica copy'
+
+def test_other_reads_stay_on_the_primary(app):
+    with app.test_client() as client:
+        # The borrow listing is not replica-routed; it joins users, only on the primary
+        client.post('/api/borrow/', json={'user_id': 1, 'book_id': 1})
+        with app.test_client() as other:
+            assert len(other.get('/api/borrow/').get_json()['records']) == 1
+
+def test_reads_after_a_write_go_to_the_primary(app):
+    with app.test_client() as client:
+        response = client.post('/api/borrow/', json={'user_id': 1, 'book_id': 1})
+        assert response.status_code == 201
+        assert 'read_primary_until' in response.headers['Set-Cookie']
+
+        book = client.get('/api/books/1').get_json()
+        assert book['title'] == 'Primary copy' and book['stock'] == 2
+
+    # A client that has not written keeps reading from the replica
+    with app.test_client() as other:
+        assert other.get('/api/books/1').get_json()['title'] == 'Replica copy'
+
+def test_lagging_replica_falls_back_to_the_primary(app):
+    with app.app_context():
+        db.session.add(Event(event_type='book.created', payload={},
+                             created_at=datetime.utcnow() - timedelta(seconds=60)))
+        db.session.commit()
+
+    with app.test_client() as client:
+        assert client.get('/api/books/1').get_json()['title'] == 'Primary copy'
+
+        status = client.get('/api/admin/admin/db-replicas', headers=_admin_headers(client)).get_json()
+        replica, = status['replicas']
+        assert status['enabled'] is True
+        assert replica['healthy'] is False and replica['lag_seconds'] >= 60
+        assert replica['error'] == 'Replication lag too high'
+
+def test_unreachable_replica_falls_back_to_the_primary(tmp_path):
+    app = _make_app(tmp_path, replica_url=f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+
+    with app.test_client() as client:
+        assert client.get('/api/books/1').get_json()['title'] == 'Primary copy'
+        replica, = app.extensions['replicas'].snapshot()
+        assert replica['healthy'] is False and replica['error']
+
+def test_writes_inside_a_routed_request_use_the_primary(app):
+    with app.test_request_context('/api/books/1'):
+        replicas = app.extensions['replicas']
+        g._replica = replicas.choose(db.engine)
+        assert g._replica is not None
+
+        assert db.session.get_bind(mapper=Book) is g._replica.engine
+        assert db.session.get_bind(mapper=Book, clause=insert(Book)) is db.engine
+
+def test_no_replicas_configured():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'RATE_LIMIT_ENABLED': False
+    })
+    assert 'replicas' not in app.extensions
+    with app.app_context():
+        assert db.session.get_bind(mapper=Book) is db.engine
@@ -0,0 +1,133 @@
+import sys
+import os
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import User
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'RATE_LIMIT_ENABLED': False
+    })
+    with app.app_context():
+        db.create_all()
+        admin = User(fullname='Admin', email='admin@example.com', username='admin', role='admin')
+        admin.set_password('secret')
+        reader = User(fullname='Reader One', email='reader@example.com', username='reader')
+        reader.set_password('secret')
+        db.session.add_all([admin, reader])
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def _login(client, username):
+    return client.post('/api/auth/login', json={'username': username, 'password': 'secret'}).get_json()
+
+def _auth(token):
+    return {'Authorization': f'Bearer {token}'}
+
+def test_login_issues_short_lived_pair(client):
+    tokens = _login(client, 'reader')
+    assert tokens['token_type'] == 'Bearer'
+    assert tokens['expires_in'] == 15 * 60
+    assert tokens['refresh_token']
+    assert tokens['user']['name'] == 'Reader One'
+
+def test_profile_is_served_from_token_without_queries(app, client):
+    token = _login(client, 'reader')['access_token']
+
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    response = client.get('/api/users/me', headers=_auth(token))
+
+    assert response.status_code == 200
+    assert response.get_json() == {'id': 2, 'username': 'reader', 'name': 'Reader One', 'role': 'student'}
+    assert statements == []
+
+def test_refresh_rotates_and_rejects_reuse(client):
+    tokens = _login(client, 'reader')
+
+    response = client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 200
+    rotated = response.get_json()
+    assert rotated['refresh_token'] != tokens['refresh_token']
+    assert client.get('/api/users/me', headers=_auth(rotated['access_token'])).status_code == 200
+
+    reused = client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert reused.status_code == 401
+
+    # Reuse means a copy is out there: the whole family is invalidated
+    assert client.get('/api/users/me', headers=_auth(rotated['access_token'])).status_code == 401
+    assert client.post('/api/auth/refresh', json={'refresh_token': rotated['refresh_token']}).status_code == 401
+    assert client.get('/api/users/me', headers=_auth(_login(client, 'reader')['access_token'])).status_code == 200
+
+def test_rotation_is_enforced_across_workers(tmp_path):
+    config = {
+        'TESTING': True,
+        'SECRET_KEY': 'shared-by-both-workers',
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'library.db'}",
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'RATE_LIMIT_ENABLED': False,
+        'SESSION_BACKEND': 'memory',
+        'SQLITE_MAINTENANCE_SECONDS': 0,
+        'TOKEN_REVOCATION_DB': str(tmp_path / 'revocations.db')
+    }
+    worker_a, worker_b = create_app(config), create_app(config)
+    with worker_a.app_context():
+        db.create_all()
+        reader = User(fullname='Reader One', email='reader@example.com', username='reader')
+        reader.set_password('secret')
+        db.session.add(reader)
+        db.session.commit()
+
+    tokens = _login(worker_a.test_client(), 'reader')
+    assert worker_a.test_client().post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']})\
+        .status_code == 200
+    replayed = worker_b.test_client().post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert replayed.status_code == 401
+
+    for app in (worker_a, worker_b):
+        with app.app_context():
+            db.engine.dispose()
+
+def test_refresh_token_is_not_an_access_token(client):
+    tokens = _login(client, 'reader')
+    assert client.get('/api/users/me', headers=_auth(tokens['refresh_token'])).status_code == 401
+
+    response = client.post('/api/auth/refresh', json={'refresh_token': tokens['access_token']})
+    assert response.status_code == 401
+
+def test_role_change_invalidates_outstanding_tokens(client):
+    admin_token = _login(client, 'admin')['access_token']
+    reader = _login(client, 'reader')
+
+    response = client.put('/api/admin/admin/users/2/role', json={'role': 'admin'}, headers=_auth(admin_token))
+    assert response.status_code == 200
+    assert response.get_json()['permissions_version'] == 2
+
+    assert client.get('/api/users/me', headers=_auth(reader['access_token'])).status_code == 401
+    assert client.post('/api/auth/refresh', json={'refresh_token': reader['refresh_token']}).status_code == 401
+
+    fresh = _login(client, 'reader')
+    profile = client.get('/api/users/me', headers=_auth(fresh['access_token'])).get_json()
+    assert profile['role'] == 'admin'
+
+def test_logout_revokes_refresh_token(client):
+    tokens = _login(client, 'reader')
+    response = client.post('/api/auth/logout', json={'refresh_token': tokens['refresh_token']},
+                           headers=_auth(tokens['access_token']))
+    assert response.status_code == 200
+    assert client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']}).status_code == 401
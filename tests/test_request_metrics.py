@@ -0,0 +1,94 @@
+import sys
+import os
+import logging
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import Book
+
+def _make_app(**config):
+    app = create_app(dict({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'RATE_LIMIT_ENABLED': False
+    }, **config))
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Book(title=f'Book {i}', author='Author', isbn=str(i), genre='Fiction') for i in range(3)
+        ])
+        db.session.commit()
+    return app
+
+@pytest.fixture
+def client():
+    app = _make_app()
+    with app.test_client() as client:
+        yield client
+    with app.app_context():
+        db.drop_all()
+
+def _samples(client, **kwargs):
+    response = client.get('/metrics', **kwargs)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    return dict(
+        line.rsplit(' ', 1) for line in response.get_data(as_text=True).splitlines()
+        if line and not line.startswith('#')
+    )
+
+def test_requests_are_counted_per_endpoint_and_status(client):
+    client.get('/api/books/')
+    client.get('/api/books/')
+    client.get('/api/books/999')
+    client.get('/no-such-page')
+
+    samples = _samples(client)
+    assert samples['http_requests_total{endpoint="books.get_books",method="GET",status="200"}'] == '2'
+    assert samples['http_requests_total{endpoint="books.get_book",method="GET",status="404"}'] == '1'
+    assert samples['http_requests_total{endpoint="unmatched",method="GET",status="404"}'] == '1'
+    assert samples['http_request_duration_milliseconds_count{endpoint="books.get_books"}'] == '2'
+    assert samples['http_request_duration_milliseconds_bucket{endpoint="books.get_books",le="+Inf"}'] == '2'
+
+def test_sql_statements_db_time_and_response_size(client):
+    body = client.get('/api/books/?per_page=2').get_data()
+
+    samples = _samples(client)
+    # One query for the page of books and one to count them
+    assert samples['http_request_sql_statements_sum{endpoint="books.get_books"}'] == '2.0'
+    assert samples['http_request_sql_statements_bucket{endpoint="books.get_books",le="1"}'] == '0'
+    assert samples['http_request_sql_statements_bucket{endpoint="books.get_books",le="2"}'] == '1'
+    assert float(samples['http_request_db_time_milliseconds_sum{endpoint="books.get_books"}']) > 0
+    assert float(samples['http_response_size_bytes_sum{endpoint="books.get_books"}']) == len(body)
+    assert 'db_pool_checkouts_total' in samples
+
+def test_failed_statements_leave_no_timing_state(client):
+    with client.application.app_context():
+        with db.engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(Exception):
+                    conn.exec_driver_sql('SELECT * FROM no_such_table')
+            assert conn.exec_driver_sql('SELECT 1').scalar() == 1
+            assert not conn.info.get('query_start')
+
+def test_query_budget_warning(caplog):
+    app = _make_app(QUERY_BUDGET=1)
+    with app.test_client() as client:
+        with caplog.at_level(logging.WARNING):
+            client.get('/api/books/')
+            client.get('/api/books/1')
+
+        warnings = [r.getMessage() for r in caplog.records if 'SQL statements' in r.getMessage()]
+        assert len(warnings) == 1
+        assert warnings[0].startswith('GET books.get_books issued 2 SQL statements (budget 1')
+        assert _samples(client)['http_requests_over_query_budget_total{endpoint="books.get_books"}'] == '1'
+
+def test_metrics_token():
+    app = _make_app(METRICS_TOKEN='scrape-me')
+    with app.test_client() as client:
+        assert client.get('/metrics').status_code == 401
+        samples = _samples(client, headers={'Authorization': 'Bearer scrape-me'})
+        assert samples['http_requests_total{endpoint="metrics",method="GET",status="401"}'] == '1'
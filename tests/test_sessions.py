@@ -0,0 +1,121 @@
+import sys
+import os
+import pytest
+from datetime import datetime, timedelta
+from flask import session
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import WebSession
+from src.utils.sessions import LegacyFilesystemSessions
+
+def _make_app(tmp_path, **config):
+    app = create_app(dict({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'library.db'}"
+    }, **config))
+
+    @app.route('/visit')
+    def visit():
+        session['visits'] = session.get('visits', 0) + 1
+        return {'visits': session['visits']}
+
+    @app.route('/peek')
+    def peek():
+        return {'visits': session.get('visits')}
+
+    with app.app_context():
+        db.create_all()
+    return app
+
+@pytest.fixture
+def app(tmp_path):
+    app = _make_app(tmp_path)
+    yield app
+    with app.app_context():
+        db.drop_all()
+        db.engine.dispose()
+
+def test_sql_sessions_round_trip(app):
+    client = app.test_client()
+    assert client.get('/visit').get_json() == {'visits': 1}
+    assert client.get('/visit').get_json() == {'visits': 2}
+
+    with app.app_context():
+        assert WebSession.query.count() == 1
+
+def test_unmodified_session_is_not_rewritten(app):
+    client = app.test_client()
+    client.get('/visit')
+
+    statements = []
+    with app.app_context():
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            assert client.get('/peek').get_json() == {'visits': 1}
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert len(statements) == 1
+    assert statements[0].startswith('SELECT')
+
+def test_requests_without_a_session_touch_no_table(app):
+    with app.app_context():
+        app.test_client().get('/peek')
+        assert WebSession.query.count() == 0
+
+def test_sweep_deletes_expired_sessions_in_batches(app):
+    now = datetime.utcnow()
+    with app.app_context():
+        db.session.add_all(
+            [WebSession(session_id=f'old{i}', data=b'\x80', expiry=now - timedelta(minutes=i + 1)) for i in range(5)]
+            + [WebSession(session_id='live', data=b'\x80', expiry=now + timedelta(days=1))]
+        )
+        db.session.commit()
+
+        app.session_interface.sweep_batch_size = 2
+        assert app.session_interface.sweep_expired(max_batches=1) == 2
+        assert app.session_interface.sweep_expired() == 3
+        assert [s.session_id for s in WebSession.query.all()] == ['live']
+
+def test_memory_backend(tmp_path):
+    app = _make_app(tmp_path, SESSION_BACKEND='memory')
+    client = app.test_client()
+    client.get('/visit')
+    assert client.get('/visit').get_json() == {'visits': 2}
+    assert len(app.session_interface.store) == 1
+
+def test_unknown_backend_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        _make_app(tmp_path, SESSION_BACKEND='redis')
+
+def test_legacy_directory_drains_into_sql(tmp_path):
+    legacy_dir = str(tmp_path / 'flask_session')
+    old_app = _make_app(tmp_path, SESSION_BACKEND='filesystem', SESSION_FILE_DIR=legacy_dir)
+    old_client = old_app.test_client()
+    old_client.get('/visit')
+    old_client.get('/visit')
+    cookie = old_client.get_cookie('session')
+    store_id = f'session:{cookie.value}'
+    assert LegacyFilesystemSessions(legacy_dir).cache.has(store_id)
+
+    app = _make_app(tmp_path, SESSION_LEGACY_DIR=legacy_dir)
+    client = app.test_client()
+    client.set_cookie('session', cookie.value)
+
+    assert client.get('/visit').get_json() == {'visits': 3}
+    assert not LegacyFilesystemSessions(legacy_dir).cache.has(store_id)
+    with app.app_context():
+        assert WebSession.query.count() == 1
+
+def test_remove_expired_legacy_files(tmp_path):
+    legacy = LegacyFilesystemSessions(str(tmp_path / 'flask_session'))
+    legacy.cache.set('session:old', b'x', timeout=1)
+    legacy.cache.set('session:new', b'x', timeout=3600)
+
+    assert legacy.remove_expired(now=datetime.utcnow().timestamp() + 10) == (1, 1)
+    assert legacy.pop('session:new') == b'x'
+    assert legacy.pop('session:new') is None
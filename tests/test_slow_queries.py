@@ -0,0 +1,120 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text
+from src.app_factory import create_app, db
+from src.models import Book, User
+from src.utils.slow_queries import SlowQueryLog, redact_parameters, statement_shape
+
+def _make_app(**config):
+    app = create_app(dict({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        # Every statement counts as slow
+        'SLOW_QUERY_MS': 0.0001,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'RATE_LIMIT_ENABLED': False,
+        'SESSION_BACKEND': 'memory'
+    }, **config))
+    with app.app_context():
+        db.create_all()
+        admin = User(fullname='Admin', email='admin@example.com', username='admin', role='admin')
+        admin.set_password('secret')
+        db.session.add_all([admin, Book(title='Dune', author='Herbert', isbn='1', genre='Fiction')])
+        db.session.commit()
+    app.extensions['slow_query_log'].clear()
+    return app
+
+@pytest.fixture
+def app():
+    app = _make_app()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+def _admin_headers(client):
+    token = client.post('/api/auth/login', json={'username': 'admin', 'password': 'secret'})\
+        .get_json()['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+def test_statement_shape_and_redaction():
+    assert statement_shape("SELECT *\n  FROM books WHERE id IN (?, ?, ?) AND title = 'x' LIMIT 10") == \
+        'SELECT * FROM books WHERE id IN (?) AND title = ? LIMIT ?'
+    assert redact_parameters(('jane@example.com', 3, None, b'\x00\x01')) == ['<str:16>', 3, None, '<bytes:2>']
+    assert redact_parameters({'email': 'jane@example.com', 'id': 7}) == {'email': '<str:16>', 'id': 7}
+
+def test_slow_requests_are_recorded_with_endpoint_and_plan(app):
+    with app.test_client() as client:
+        client.get('/api/books/?genre=Fiction')
+
+    log = app.extensions['slow_query_log']
+    log.wait_for_plans()
+    entries = [e for e in log.snapshot() if e['endpoint'] == 'books.get_books']
+    assert entries and all('FROM books' in e['statement'] for e in entries)
+
+    filtered = next(e for e in entries if '<str:7>' in e['parameters'])
+    assert 'Fiction' not in str(filtered['parameters'])
+    assert filtered['plan']['plan'] and any('books' in line for line in filtered['plan']['plan'])
+    assert filtered['plan']['error'] is None
+
+def test_one_plan_per_statement_shape(app):
+    with app.test_client() as client:
+        client.get('/api/books/1')
+        client.get('/api/books/2')
+
+    log = app.extensions['slow_query_log']
+    lookups = [e for e in log.snapshot() if e['endpoint'] == 'books.get_book']
+    assert len(lookups) == 2
+    assert lookups[0]['fingerprint'] == lookups[1]['fingerprint']
+    assert len(log.plans) == len({e['fingerprint'] for e in log.snapshot()})
+
+def test_ring_buffer_is_bounded():
+    engine = create_engine('sqlite://')
+    log = SlowQueryLog(threshold_ms=0, capacity=3)
+    log.attach(engine)
+    with engine.connect() as conn:
+        for i in range(5):
+            conn.execute(text('SELECT :i'), {'i': i})
+
+    entries = log.snapshot()
+    assert len(entries) == 3
+    assert [e['parameters'] for e in entries] == [[4], [3], [2]]
+    assert entries[0]['endpoint'] is None
+    assert len(log.plans) == 1
+
+def test_failed_statements_leave_no_timing_state():
+    engine = create_engine('sqlite://')
+    log = SlowQueryLog(threshold_ms=0)
+    log.attach(engine)
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(Exception):
+                conn.execute(text('SELECT * FROM no_such_table'))
+        conn.execute(text('SELECT 1'))
+        assert not conn.info.get('slow_query_start')
+    assert [e['statement'] for e in log.snapshot()] == ['SELECT 1']
+
+def test_admin_endpoint(app):
+    with app.test_client() as client:
+        assert client.get('/api/admin/admin/slow-queries').status_code == 401
+
+        headers = _admin_headers(client)
+        client.get('/api/books/1')
+        response = client.get('/api/admin/admin/slow-queries?limit=2', headers=headers)
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['enabled'] is True and body['threshold_ms'] == 0.0001
+        assert len(body['queries']) == 2
+        assert body['queries'][0]['id'] > body['queries'][1]['id']
+
+def test_disabled():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SLOW_QUERY_MS': 0,
+        'RATE_LIMIT_ENABLED': False
+    })
+    assert 'slow_query_log' not in app.extensions
@@ -0,0 +1,103 @@
+import sys
+import os
+import threading
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import User
+from src.utils.sqlite_tuning import SQLiteMaintenance, sqlite_pragmas
+
+def _make_app(tmp_path, **config):
+    app = create_app(dict({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'library.db'}",
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'RATE_LIMIT_ENABLED': False,
+        'SESSION_BACKEND': 'memory',
+        'SQLITE_MAINTENANCE_SECONDS': 3600
+    }, **config))
+    with app.app_context():
+        db.create_all()
+        admin = User(fullname='Admin', email='admin@example.com', username='admin', role='admin')
+        admin.set_password('secret')
+        db.session.add(admin)
+        db.session.commit()
+    return app
+
+@pytest.fixture
+def app(tmp_path):
+    app = _make_app(tmp_path)
+    yield app
+    app.extensions['sqlite_maintenance'].stop()
+    with app.app_context():
+        db.engine.dispose()
+
+def _pragma(app, name):
+    with app.app_context(), db.engine.connect() as conn:
+        return conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+
+def test_profile_is_applied_to_every_connection(app):
+    assert _pragma(app, 'journal_mode') == 'wal'
+    # NORMAL = 1, MEMORY = 2
+    assert _pragma(app, 'synchronous') == 1
+    assert _pragma(app, 'temp_store') == 2
+    assert _pragma(app, 'busy_timeout') == 5000
+    assert _pragma(app, 'cache_size') == -65536
+    assert _pragma(app, 'mmap_size') == 256 * 1024 * 1024
+
+    # A second pooled connection is tuned as well
+    with app.app_context(), db.engine.connect() as first, db.engine.connect() as second:
+        assert first.exec_driver_sql('PRAGMA synchronous').scalar() == 1
+        assert second.exec_driver_sql('PRAGMA synchronous').scalar() == 1
+    assert app.extensions['sqlite_profile'].connections >= 2
+
+def test_settings_and_opting_out(tmp_path):
+    pragmas = dict(sqlite_pragmas({'SQLITE_SYNCHRONOUS': 'full', 'SQLITE_CACHE_SIZE_KB': 2048}))
+    assert pragmas['synchronous'] == 'full' and pragmas['cache_size'] == -2048
+    assert [name for name, _ in sqlite_pragmas({})][:2] == ['busy_timeout', 'journal_mode']
+
+    app = _make_app(tmp_path, SQLITE_TUNING=False)
+    assert 'sqlite_profile' not in app.extensions
+    assert _pragma(app, 'journal_mode') == 'delete'
+
+    memory = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'SESSION_BACKEND': 'memory'})
+    assert 'sqlite_profile' not in memory.extensions
+
+def test_maintenance_checkpoints_and_optimizes(app):
+    with app.app_context():
+        for i in range(20):
+            db.session.add(User(fullname=f'U{i}', email=f'u{i}@example.com', username=f'u{i}', password_hash='x'))
+        db.session.commit()
+        maintenance = SQLiteMaintenance(db.engine, interval=3600)
+
+    maintenance.run_once()
+    snapshot = maintenance.snapshot()
+    assert snapshot['runs'] == 1 and snapshot['last_error'] is None
+    checkpoint = snapshot['last_checkpoint']
+    assert checkpoint['busy'] is False and checkpoint['checkpointed_frames'] == checkpoint['wal_frames']
+
+def test_maintenance_thread_starts_once_per_process(app):
+    maintenance = app.extensions['sqlite_maintenance']
+    assert not maintenance.snapshot()['running']
+
+    def running():
+        return sum(1 for t in threading.enumerate() if t.name == 'sqlite-maintenance')
+
+    before = running()
+    with app.test_client() as client:
+        client.get('/api/books/')
+        client.get('/api/books/')
+    assert running() == before + 1 and maintenance.snapshot()['running']
+
+def test_admin_endpoint(app):
+    with app.test_client() as client:
+        token = client.post('/api/auth/login', json={'username': 'admin', 'password': 'secret'})\
+            .get_json()['access_token']
+        body = client.get('/api/admin/admin/db-sqlite', headers={'Authorization': f'Bearer {token}'}).get_json()
+
+    assert body['enabled']
+    assert body['pragmas']['current']['journal_mode'] == 'wal'
+    assert body['pragmas']['configured']['synchronous'] == 'normal'
+    assert body['maintenance']['interval_seconds'] == 3600
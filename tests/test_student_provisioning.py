@@ -0,0 +1,107 @@
+import sys
+import os
+import io
+import time
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import ProvisioningJob, User
+from src.utils import provisioning
+from src.utils.provisioning import provision_students, read_roster
+from werkzeug.security import check_password_hash
+
+METHOD = 'pbkdf2:sha256:1000'
+
+ROSTER = """fullname,email,username,password
+Ada Lovelace,ada@uni.edu,ada,pw-ada
+Existing Clash,new@uni.edu,taken,pw
+Email Clash,TAKEN@example.com,fresh,pw
+No Password,np@uni.edu,nopass,
+Alan Turing,alan@uni.edu,alan,pw-alan
+Ada Twin,ada2@uni.edu,ada,pw
+"""
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'PASSWORD_HASH_METHOD': METHOD
+    })
+    with app.app_context():
+        db.create_all()
+        admin = User(fullname='Admin', email='admin@example.com', username='admin', role='admin')
+        admin.set_password('secret')
+        db.session.add(admin)
+        db.session.add(User(fullname='Taken', email='taken@example.com', username='taken', password_hash='x'))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+def test_provisioning_creates_users_and_reports_row_errors(app):
+    progress = []
+    with app.app_context():
+        rows, errors = read_roster(io.StringIO(ROSTER))
+        report = provision_students(rows, errors, batch_size=1, processes=2,
+                                    progress=lambda done, total: progress.append((done, total)))
+
+        assert report['created'] == 2
+        assert [(e['row'], e['error']) for e in report['errors']] == [
+            (3, 'Username already exists'),
+            (4, 'Email already exists'),
+            (5, 'Missing password'),
+            (7, 'Username already exists'),
+        ]
+        ada = User.query.filter_by(username='ada').one()
+        assert ada.role == 'student'
+        assert ada.password_hash.startswith(METHOD + '$')
+        assert check_password_hash(ada.password_hash, 'pw-ada')
+    assert progress == [(1, 2), (2, 2)]
+
+def test_roster_without_required_columns_is_rejected():
+    with pytest.raises(ValueError):
+        read_roster(io.StringIO('name,email\nA,a@b.c\n'))
+
+def test_admin_import_endpoint_runs_in_background(app):
+    client = app.test_client()
+    token = client.post('/api/auth/login', json={'username': 'admin', 'password': 'secret'}).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.post('/api/admin/admin/users/import?processes=1',
+                           data={'roster': (io.BytesIO(ROSTER.encode()), 'roster.csv')},
+                           headers=headers)
+    assert response.status_code == 202
+    status_url = response.get_json()['status_url']
+
+    for _ in range(100):
+        job = client.get(status_url, headers=headers).get_json()
+        if job['status'] != 'running':
+            break
+        time.sleep(0.1)
+
+    assert job['status'] == 'finished'
+    assert job['created'] == 2
+    assert len(job['errors']) == 4
+
+    # Kept in the database, where every worker reads it from
+    with app.app_context():
+        assert db.session.get(ProvisioningJob, job['id']).status == 'finished'
+
+def test_accounts_created_during_an_import_become_row_errors(app, monkeypatch):
+    # As if "taken" had been created by someone else after the roster was checked
+    monkeypatch.setattr(provisioning, '_existing', lambda column, values: set())
+    with app.app_context():
+        rows, errors = read_roster(io.StringIO(ROSTER))
+        report = provision_students(rows, errors, batch_size=10, processes=64)
+
+        assert report['created'] == 2
+        assert [(e['row'], e['error']) for e in report['errors']] == [
+            (3, 'Username or email already exists'),
+            (4, 'Username or email already exists'),
+            (5, 'Missing password'),
+            (7, 'Username already exists'),
+        ]
+        assert {u.username for u in User.query} == {'admin', 'taken', 'ada', 'alan'}
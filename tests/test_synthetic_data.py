@@ -0,0 +1,89 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, select
+from src.app_factory import create_app, db
+from src.models import Book, BookRating, BorrowRecord, User
+from src.utils.synthetic_data import dataset_sizes, generate_library
+
+SIZES = {'users': 20, 'books': 50, 'borrow_records': 300, 'ratings': 90}
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'RATE_LIMIT_ENABLED': False
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+def _rows(model):
+    return [tuple(row) for row in db.session.execute(select(*model.__table__.columns).order_by(model.id))]
+
+def test_dataset_sizes():
+    assert dataset_sizes(1) == {'users': 200_000, 'books': 1_000_000, 'borrow_records': 10_000_000, 'ratings': 5_000_000}
+    assert dataset_sizes(0.001)['borrow_records'] == 10_000
+    assert dataset_sizes(0)['users'] == 1
+
+def test_generates_requested_rows_with_valid_references(app):
+    ranges = generate_library(db.engine, SIZES, 'hash', seed=1, chunk_size=7)
+
+    assert ranges == {'users': (1, 20), 'books': (1, 50), 'borrow_records': (1, 300), 'ratings': (1, 90)}
+    for model, table in ((User, 'users'), (Book, 'books'), (BorrowRecord, 'borrow_records'), (BookRating, 'ratings')):
+        assert db.session.scalar(select(func.count()).select_from(model)) == SIZES[table]
+
+    assert db.session.scalar(select(User.role).where(User.id == 1)) == 'admin'
+    assert db.session.scalar(select(func.max(BorrowRecord.user_id))) <= 20
+    assert db.session.scalar(select(func.max(BorrowRecord.book_id))) <= 50
+    assert db.session.scalar(select(func.count()).where(BorrowRecord.due_date < BorrowRecord.borrow_date)) == 0
+    pairs = db.session.execute(select(BookRating.user_id, BookRating.book_id)).all()
+    assert len(set(pairs)) == len(pairs)
+
+def test_same_seed_same_library(app):
+    generate_library(db.engine, SIZES, 'hash', seed=3)
+    first = [_rows(model) for model in (User, Book, BorrowRecord, BookRating)]
+
+    db.drop_all()
+    db.create_all()
+    generate_library(db.engine, SIZES, 'hash', seed=3)
+    assert [_rows(model) for model in (User, Book, BorrowRecord, BookRating)] == first
+
+def test_appends_after_existing_rows(app):
+    generate_library(db.engine, SIZES, 'hash')
+    ranges = generate_library(db.engine, SIZES, 'hash', seed=2)
+
+    assert ranges['users'] == (21, 20) and ranges['books'] == (51, 50)
+    assert db.session.scalar(select(func.count()).select_from(Book)) == 100
+    assert db.session.scalar(select(func.min(BorrowRecord.user_id)).where(BorrowRecord.id > 300)) >= 21
+
+def test_realistic_distributions(app):
+    sizes = {'users': 200, 'books': 1000, 'borrow_records': 20000, 'ratings': 2000}
+    generate_library(db.engine, sizes, 'hash', seed=5)
+
+    # Zipfian popularity: the top 1% of books account for a large share of loans
+    loans = sorted(db.session.execute(
+        select(func.count()).select_from(BorrowRecord).group_by(BorrowRecord.book_id)
+    ).scalars(), reverse=True)
+    assert sum(loans[:10]) > 0.25 * sizes['borrow_records']
+
+    # Quiet summers, and some loans returned late with a fine
+    month = func.substr(BorrowRecord.borrow_date, 6, 2)
+    by_month = dict(db.session.execute(select(month, func.count()).group_by(month)).all())
+    assert by_month['07'] < 0.6 * by_month['10']
+    late = db.session.scalar(select(func.count()).where(BorrowRecord.fine > 0))
+    assert 0.05 * sizes['borrow_records'] < late < 0.2 * sizes['borrow_records']
+
+    # Shelf counts and rating aggregates agree with the generated rows
+    assert db.session.scalar(select(func.min(Book.available_copies))) >= 0
+    book_id, count, average = db.session.execute(
+        select(BookRating.book_id, func.count(), func.avg(BookRating.rating))
+        .group_by(BookRating.book_id).order_by(func.count().desc()).limit(1)
+    ).one()
+    book = db.session.get(Book, book_id)
+    assert book.ratings_count == count and book.average_rating == pytest.approx(average, abs=0.01)
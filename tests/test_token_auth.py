@@ -0,0 +1,151 @@
+import sys
+import os
+import time
+import pytest
+import jwt
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import User
+from src.utils import token_auth
+from src.utils.token_auth import SqliteRevocationStore, TokenVerifier
+
+SECRET = 'test-secret-key-with-enough-length!'
+
+@pytest.fixture
+def client():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'
+    })
+    with app.app_context():
+        db.create_all()
+        user = User(fullname='Reader', email='reader@example.com', username='reader')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+    with app.test_client() as client:
+        yield client
+    with app.app_context():
+        db.drop_all()
+
+def _token(exp_in=3600, **claims):
+    payload = {'user_id': 1, 'role': 'student', 'exp': int(time.time()) + exp_in}
+    payload.update(claims)
+    return jwt.encode(payload, SECRET, algorithm='HS256')
+
+def test_claims_are_cached_until_exp(monkeypatch):
+    verifier = TokenVerifier(SECRET)
+    calls = []
+    real_decode = jwt.decode
+    monkeypatch.setattr(token_auth.jwt, 'decode', lambda *a, **kw: calls.append(1) or real_decode(*a, **kw))
+
+    token = _token()
+    for _ in range(5):
+        assert verifier.decode(token)['user_id'] == 1
+    assert len(calls) == 1
+
+def test_expired_token_is_rejected():
+    verifier = TokenVerifier(SECRET)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verifier.decode(_token(exp_in=-10))
+
+def test_revocation_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / 'revocations.db')
+    worker_a = TokenVerifier(SECRET, store=SqliteRevocationStore(path))
+    worker_b = TokenVerifier(SECRET, store=SqliteRevocationStore(path))
+
+    token = _token()
+    worker_a.decode(token)
+    worker_b.decode(token)
+
+    worker_a.revoke(token)
+    with pytest.raises(jwt.InvalidTokenError):
+        worker_a.decode(token)
+    with pytest.raises(jwt.InvalidTokenError):
+        worker_b.decode(token)
+
+    # Other tokens are unaffected
+    assert worker_b.decode(_token(user_id=2))['user_id'] == 2
+
+def test_revocations_outlive_cache_pressure_until_the_token_expires(tmp_path):
+    path = str(tmp_path / 'revocations.db')
+    worker_a = TokenVerifier(SECRET, store=SqliteRevocationStore(path), cache_size=1)
+    worker_b = TokenVerifier(SECRET, store=SqliteRevocationStore(path), cache_size=1)
+
+    tokens = [_token(user_id=i) for i in range(50)]
+    for token in tokens:
+        assert worker_a.revoke(token)
+    for token in tokens:
+        with pytest.raises(token_auth.TokenRevoked):
+            worker_b.decode(token)
+
+    # Only the token's own expiry lifts a revocation
+    short = _token(exp_in=1, user_id=99)
+    worker_a.revoke(short)
+    worker_b._prune(time.time() + 5)
+    assert token_auth.token_hash(short) not in worker_b.revoked
+    assert all(token_auth.token_hash(token) in worker_b.revoked for token in tokens)
+
+def test_revocation_seen_even_when_the_file_looks_unchanged(tmp_path):
+    path = str(tmp_path / 'revocations.db')
+    worker_a = TokenVerifier(SECRET, store=SqliteRevocationStore(path))
+    worker_b = TokenVerifier(SECRET, store=SqliteRevocationStore(path))
+    worker_a.revoke(_token(user_id=2))
+
+    token = _token()
+    worker_b.decode(token)
+    before = os.stat(path)
+
+    # Committed within the same mtime tick, without growing the file
+    worker_a.revoke(token)
+    os.utime(path, ns=(before.st_atime_ns, before.st_mtime_ns))
+    assert os.stat(path).st_size == before.st_size
+
+    with pytest.raises(token_auth.TokenRevoked):
+        worker_b.decode(token)
+
+def test_only_one_worker_wins_a_revocation(tmp_path):
+    path = str(tmp_path / 'revocations.db')
+    workers = [TokenVerifier(SECRET, store=SqliteRevocationStore(path)) for _ in range(3)]
+    token = _token()
+    assert [worker.revoke(token) for worker in workers] == [True, False, False]
+
+    # A fresh process reads the revocation back from the file
+    with pytest.raises(token_auth.TokenRevoked):
+        TokenVerifier(SECRET, store=SqliteRevocationStore(path)).decode(token)
+
+def test_logout_revokes_token_immediately(client):
+    token = client.post('/api/auth/login', json={'username': 'reader', 'password': 'secret'}).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    assert client.get('/api/borrow/history', headers=headers).status_code == 200
+    assert client.post('/api/auth/logout', headers=headers).status_code == 200
+
+    response = client.get('/api/borrow/history', headers=headers)
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Invalid token'
+
+def test_logout_requires_token(client):
+    assert client.post('/api/auth/logout').status_code == 401
+
+def test_unset_jwt_secret_generates_one_key_per_host(tmp_path, monkeypatch):
+    monkeypatch.delenv('JWT_SECRET', raising=False)
+    config = {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SESSION_BACKEND': 'memory',
+        'SECRET_KEY_FILE': str(tmp_path / 'instance' / 'secret_key')
+    }
+    worker_a, worker_b = create_app(config), create_app(config)
+    key = worker_a.config['SECRET_KEY']
+    assert len(key) == 64 and worker_b.config['SECRET_KEY'] == key
+    assert os.stat(config['SECRET_KEY_FILE']).st_mode & 0o777 == 0o600
+    assert os.listdir(tmp_path / 'instance') == ['secret_key']
+
+    # Tests get their own key; an explicit JWT_SECRET always wins
+    assert create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})\
+        .config['SECRET_KEY'] not in (key, None)
+    monkeypatch.setenv('JWT_SECRET', SECRET)
+    assert create_app(config).config['SECRET_KEY'] == SECRET
+
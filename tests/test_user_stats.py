@@ -0,0 +1,117 @@
+import sys
+import os
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app_factory import create_app, db
+from src.models import Book, BorrowRecord, Fees, User, UserStats
+from src.utils.user_stats import rebuild_user_stats, refresh_overdue_counts
+from datetime import date, timedelta
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'RATE_LIMIT_ENABLED': False
+    })
+    with app.app_context():
+        db.create_all()
+        reader = User(fullname='Reader', email='reader@example.com', username='reader')
+        reader.set_password('secret')
+        other = User(fullname='Other', email='other@example.com', username='other')
+        other.set_password('secret')
+        db.session.add_all([reader, other, Book(title='Dragons', author='A', isbn='2222222222', available_copies=3)])
+        db.session.commit()
+
+        # Seeded outside the app: one long-overdue open loan and two fees
+        long_ago = date.today() - timedelta(days=30)
+        db.session.add(BorrowRecord(user_id=1, book_id=1, borrow_date=long_ago, due_date=long_ago + timedelta(days=14)))
+        db.session.add(Fees(user_id=1, date=long_ago, amount=2.5, reason='Late return'))
+        db.session.add(Fees(user_id=1, date=long_ago, amount=4.0, reason='Paid', paid=True))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def _auth(client, username='reader'):
+    token = client.post('/api/auth/login', json={'username': username, 'password': 'secret'}).get_json()['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+def test_summary_is_built_then_served_by_primary_key(app, client):
+    headers = _auth(client)
+    summary = client.get('/api/users/1/summary', headers=headers).get_json()
+    assert summary['total_loans'] == 1
+    assert summary['open_loans'] == 1
+    assert summary['overdue_loans'] == 1
+    assert summary['unpaid_fines'] == 2.5
+    assert summary['ratings_count'] == 0
+
+    statements = []
+    with app.app_context():
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            assert client.get('/api/users/1/summary', headers=headers).status_code == 200
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert len(statements) == 1
+    assert 'FROM user_stats' in statements[0]
+
+def test_borrow_return_and_rating_keep_counters_current(app, client):
+    headers = _auth(client)
+    client.get('/api/users/1/summary', headers=headers)
+
+    record_id = client.post('/api/borrow/', json={'user_id': 1, 'book_id': 1}).get_json()['id']
+    summary = client.get('/api/users/1/summary', headers=headers).get_json()
+    assert (summary['total_loans'], summary['open_loans']) == (2, 2)
+
+    # Returning the overdue loan also drops it from the overdue count
+    client.put('/api/borrow/1/return')
+    client.put(f'/api/borrow/{record_id}/return')
+    assert client.post('/api/books/1/ratings', json={'rating': 4}).status_code == 401
+    client.post('/api/books/1/ratings', json={'rating': 4}, headers=headers)
+    client.post('/api/books/1/ratings', json={'rating': 5}, headers=headers)
+
+    summary = client.get('/api/users/1/summary', headers=headers).get_json()
+    assert (summary['total_loans'], summary['open_loans'], summary['overdue_loans']) == (2, 0, 0)
+    assert summary['ratings_count'] == 1
+
+    # Counted against whoever is signed in, not a fixed demo user
+    client.post('/api/books/1/ratings', json={'rating': 3}, headers=_auth(client, 'other'))
+    assert client.get('/api/users/2/summary', headers=_auth(client, 'other')).get_json()['ratings_count'] == 1
+    assert client.get('/api/users/1/summary', headers=headers).get_json()['ratings_count'] == 1
+
+def test_summary_access_is_limited_to_self_and_admins(client):
+    assert client.get('/api/users/1/summary').status_code == 401
+    assert client.get('/api/users/1/summary', headers=_auth(client, 'other')).status_code == 403
+    assert client.get('/api/users/99/summary', headers=_auth(client, 'other')).status_code == 403
+
+def test_rebuild_reconciles_drift(app):
+    with app.app_context():
+        assert rebuild_user_stats(batch_size=1) == 2
+        db.session.add(Fees(user_id=2, date=date.today(), amount=1.0, reason='Seeded'))
+        db.session.commit()
+        assert db.session.get(UserStats, 2).unpaid_fines == 0.0
+
+        rebuild_user_stats()
+        db.session.expire_all()
+        assert db.session.get(UserStats, 2).unpaid_fines == 1.0
+        assert db.session.get(UserStats, 1).overdue_loans == 1
+
+def test_overdue_refresh_follows_the_calendar(app):
+    with app.app_context():
+        rebuild_user_stats(today=date.today() - timedelta(days=60))
+        assert db.session.get(UserStats, 1).overdue_loans == 0
+
+        assert refresh_overdue_counts() == 1
+        db.session.expire_all()
+        assert db.session.get(UserStats, 1).overdue_loans == 1
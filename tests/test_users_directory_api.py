@@ -0,0 +1,108 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from werkzeug.datastructures import MultiDict
+from src.app_factory import create_app, db
+from src.models import User
+from src.routes.users import _users_statements
+from src.utils.index_advisor import full_scans, table_aliases
+from src.utils.pagination import encode_cursor
+
+@pytest.fixture
+def client():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'RATE_LIMIT_ENABLED': False
+    })
+    with app.app_context():
+        db.create_all()
+        admin = User(fullname='Admin', email='admin@example.com', username='admin', role='admin')
+        admin.set_password('secret')
+        db.session.add(admin)
+        db.session.add_all([
+            User(fullname='Alice Smith', email='alice@uni.edu', username='asmith', password_hash='x'),
+            User(fullname='Bob Jones', email='bob@uni.edu', username='bjones', password_hash='x'),
+            User(fullname='Alan Turing', email='turing@uni.edu', username='aturing', password_hash='x',
+                 role='admin'),
+            User(fullname='Carol 100%', email='carol@uni.edu', username='c_ross', password_hash='x')
+        ])
+        db.session.commit()
+    with app.test_client() as client:
+        token = client.post('/api/auth/login', json={'username': 'admin', 'password': 'secret'})\
+            .get_json()['access_token']
+        client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        yield client
+    with app.app_context():
+        db.drop_all()
+
+def _usernames(response):
+    return [user['username'] for user in response.get_json()['users']]
+
+def test_requires_admin(client):
+    del client.environ_base['HTTP_AUTHORIZATION']
+    assert client.get('/api/users/').status_code == 401
+
+def test_prefix_search_matches_any_name_column(client):
+    # username 'asmith', fullname 'Alice Smith', 'Alan Turing', and 'admin'
+    assert _usernames(client.get('/api/users/?q=A')) == ['admin', 'asmith', 'aturing']
+    assert _usernames(client.get('/api/users/?q=bob@')) == ['bjones']
+    # Prefix only: 'smith' appears mid-string but never at the start
+    assert _usernames(client.get('/api/users/?q=smith')) == []
+
+def test_wildcards_in_search_are_literal(client):
+    assert _usernames(client.get('/api/users/?q=c_')) == ['c_ross']
+    assert _usernames(client.get('/api/users/?q=%25')) == []
+
+def test_role_filter_and_keyset_pagination(client):
+    first = client.get('/api/users/?role=admin&limit=1').get_json()
+    assert [u['username'] for u in first['users']] == ['admin']
+
+    second = client.get(f"/api/users/?role=admin&limit=1&cursor={first['next_cursor']}").get_json()
+    assert [u['username'] for u in second['users']] == ['aturing']
+    assert second['next_cursor'] is None
+
+def test_field_projection(client):
+    users = client.get('/api/users/?fields=id,username&limit=2').get_json()['users']
+    assert users == [{'id': 1, 'username': 'admin'}, {'id': 2, 'username': 'asmith'}]
+
+    assert client.get('/api/users/?fields=password_hash').status_code == 400
+
+def test_invalid_cursor(client):
+    assert client.get('/api/users/?cursor=garbage').status_code == 400
+    assert client.get(f"/api/users/?q=a&cursor={encode_cursor([3, 'a', 1])}").status_code == 400
+    assert client.get(f"/api/users/?q=a&cursor={encode_cursor([2])}").status_code == 400
+
+def test_search_pages_through_each_column_in_turn(client):
+    # 'a' matches usernames admin, asmith and aturing; 'Alice Smith' and
+    # 'Alan Turing' are the same users again
+    pages, cursor = [], ''
+    while cursor is not None:
+        body = client.get(f'/api/users/?q=a&limit=2&cursor={cursor}' if cursor else '/api/users/?q=a&limit=2')\
+            .get_json()
+        pages.append([user['username'] for user in body['users']])
+        cursor = body['next_cursor']
+    assert pages == [['admin', 'asmith'], ['aturing']]
+
+    # Listed once, under username, though email and fullname match too
+    assert _usernames(client.get('/api/users/?q=b')) == ['bjones']
+
+def test_search_reads_each_column_through_its_index(client):
+    with client.application.app_context():
+        statements, _, _ = _users_statements(MultiDict({'q': 'al'}), 20, 'sqlite')
+        assert len(statements) == 3
+        later, _, _ = _users_statements(MultiDict({'q': 'al', 'cursor': encode_cursor([1, 'alice@', 2])}),
+                                        20, 'sqlite')
+        assert [index for index, _ in later] == [1, 2]
+        statements += later
+        for index, statement in statements:
+            sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+            plan = [row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))]
+            # Searched through ix_users_lower_<column>, already in page order
+            assert not full_scans(plan, 'sqlite', table_aliases(sql)), plan
+            assert any('ix_users_lower_' in step for step in plan), plan
+            assert not any('TEMP B-TREE' in step for step in plan), plan
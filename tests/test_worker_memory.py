@@ -0,0 +1,121 @@
+import sys
+import os
+import gc
+import multiprocessing
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+np = pytest.importorskip('numpy')
+
+from src.app_factory import create_app, db
+from src.ml.recommendation_engine import BookRecommendationEngine
+from src.models import User
+from src.utils.memory import child_pids, process_memory
+
+pytestmark = pytest.mark.skipif(process_memory() is None, reason='needs /proc/<pid>/smaps_rollup')
+
+# 64 MiB of float32, large enough to stand out from the interpreter's own pages
+MATRIX_SIDE = 4096
+
+@pytest.fixture
+def models_dir(tmp_path):
+    engine = BookRecommendationEngine()
+    # Stand-ins for the fitted TfidfVectorizer/TruncatedSVD, so sklearn is not needed
+    engine.content_vectorizer = {'vocabulary': ['dune', 'emma']}
+    engine.svd_model = {'components': 2}
+    engine.content_similarity_matrix = np.random.default_rng(0).random((MATRIX_SIDE, MATRIX_SIDE))
+    engine.save_models(str(tmp_path))
+    # Until written back, freshly saved pages would show as dirty in a process mapping them
+    os.sync()
+    return str(tmp_path)
+
+def _in_child(target, *args):
+    """Run target(*args) in a forked child and return what it returns"""
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    child = context.Process(target=lambda: results.put(target(*args)))
+    child.start()
+    result = results.get(timeout=60)
+    child.join(timeout=60)
+    return result
+
+def _private_kb_after_reading(matrix, copy):
+    if copy:
+        matrix = np.array(matrix)
+    float(matrix.sum())
+    # Private_Dirty: a memory-mapped file read by one process alone counts as
+    # Private_Clean, though it is page cache any other process can share
+    return process_memory()['private_dirty']
+
+def test_load_models_maps_the_matrix_read_only(models_dir):
+    engine = BookRecommendationEngine()
+    assert engine.load_models(models_dir, mmap=True)
+    assert isinstance(engine.content_similarity_matrix, np.memmap)
+    assert engine.content_similarity_matrix.dtype == np.float32
+    assert engine.content_vectorizer == {'vocabulary': ['dune', 'emma']}
+    with pytest.raises(ValueError):
+        engine.content_similarity_matrix[0, 0] = 1
+
+    assert BookRecommendationEngine().load_models(models_dir)
+    assert not BookRecommendationEngine().load_models(os.path.join(models_dir, 'missing'))
+
+@pytest.mark.parametrize('mmap', [False, True])
+def test_forked_worker_shares_what_the_master_loaded(models_dir, mmap):
+    engine = BookRecommendationEngine()
+    assert engine.load_models(models_dir, mmap=mmap)
+    matrix = engine.content_similarity_matrix
+    # As gunicorn.conf.py does once the app is preloaded
+    gc.collect()
+    gc.freeze()
+    try:
+        shared_kb = _in_child(_private_kb_after_reading, matrix, False)
+        copied_kb = _in_child(_private_kb_after_reading, matrix, True)
+    finally:
+        gc.unfreeze()
+
+    matrix_kb = MATRIX_SIDE * MATRIX_SIDE * 4 // 1024
+    # A worker reading every row of the inherited matrix owns none of it
+    assert shared_kb < matrix_kb / 4
+    assert copied_kb - shared_kb > matrix_kb * 3 / 4
+
+def test_memory_accounting():
+    usage = process_memory()
+    assert set(usage) >= {'rss', 'pss', 'uss', 'shared'}
+    assert 0 < usage['uss'] <= usage['rss']
+
+    context = multiprocessing.get_context('fork')
+    stop = context.Event()
+    child = context.Process(target=stop.wait)
+    child.start()
+    try:
+        assert child.pid in child_pids(os.getpid())
+    finally:
+        stop.set()
+        child.join()
+
+def test_admin_endpoint(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'library.db'}",
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'RATE_LIMIT_ENABLED': False,
+        'SESSION_BACKEND': 'memory',
+        'SQLITE_MAINTENANCE_SECONDS': 0
+    })
+    with app.app_context():
+        db.create_all()
+        admin = User(fullname='Admin', email='admin@example.com', username='admin', role='admin')
+        admin.set_password('secret')
+        db.session.add(admin)
+        db.session.commit()
+
+    with app.test_client() as client:
+        token = client.post('/api/auth/login', json={'username': 'admin', 'password': 'secret'})\
+            .get_json()['access_token']
+        body = client.get('/api/admin/admin/memory', headers={'Authorization': f'Bearer {token}'}).get_json()
+    with app.app_context():
+        db.engine.dispose()
+
+    assert body['pid'] == os.getpid() and body['master_pid'] == os.getppid()
+    assert 0 < body['memory_kb']['uss'] <= body['memory_kb']['rss']